@@ -0,0 +1,280 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Compiler benchmark
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Time each stage Nacar goes through to turn a synthetic blueprint into a Nacar
+app: parse the YAML blueprint, validate it, set its missing optional
+attributes, translate it, and write the app to a file.
+Run from the project root with `python3 -m benchmarks.compiler`, adding
+`--json` to print results that can be saved. Pass two saved results to
+`--compare` to flag the stages that got slower. It exits with status 1 if any
+did, so it can be used to gate releases.
+"""
+
+import os
+import sys
+import json
+import tempfile
+from argparse import ArgumentParser
+from datetime import datetime
+from statistics import median
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from yaml import safe_dump
+
+from benchmarks.synthetic import generate_blueprint
+from nacar.__version__ import __version__
+from nacar.file_io import FileIO
+from nacar.main import TRANSLATORS
+from nacar.schema import Schema
+from nacar.validator import NacarValidator
+from nacar.translate.itranslator import ITranslator
+
+
+# The stages of `Nacar.run()`, in the order they run.
+STAGES = ['parse_yml_file', 'validate', 'set_missing_optional_attributes',
+          'translate_blueprint', 'write_nacar_app_to_file']
+# The parameters that tell a scenario apart when comparing results.
+SCENARIO_KEYS = ['screens', 'options_per_screen', 'fan_out', 'depth',
+                 'action_length', 'target', 'options']
+
+
+def time_stage(times: Dict[str, List[float]], stage: str, run: Callable):
+    start = perf_counter()
+    result = run()
+    times[stage].append(perf_counter() - start)
+    return result
+
+
+def run_stages(blueprint_path: str,
+               target: str,
+               options: dict,
+               times: Dict[str, List[float]]) -> int:
+    """
+    Run every stage once, as `Nacar.run()` does, adding the time each takes
+    to `times`.
+    :return: The size in bytes of the Nacar app.
+    """
+    validator = NacarValidator()
+    blueprint_schema = Schema.get_blueprint_schema()
+
+    blueprint = time_stage(times, 'parse_yml_file',
+                           lambda: FileIO.parse_yml_file(blueprint_path))
+    if not time_stage(times, 'validate',
+                      lambda: validator.validate(blueprint, blueprint_schema)):
+        raise RuntimeError(f"The synthetic blueprint is not valid: "
+                           f"{validator.errors}")
+    blueprint = time_stage(
+        times, 'set_missing_optional_attributes',
+        lambda: Schema.set_missing_optional_attributes(blueprint))
+
+    translator: ITranslator = TRANSLATORS[target](blueprint, options)
+    translation, screen_chunks, runtime_files = time_stage(
+        times, 'translate_blueprint',
+        lambda: (translator.translate_blueprint(),
+                 translator.translate_screen_chunks(),
+                 translator.translate_runtime()))
+
+    app_path = os.path.splitext(blueprint_path)[0]
+    target_language = translator.get_target_language()
+
+    def write_app():
+        FileIO.write_nacar_app_to_file(translation, app_path, target_language)
+        if screen_chunks:
+            FileIO.write_nacar_app_screens_to_dir(
+                screen_chunks, f"{app_path}.screens", target_language)
+        if runtime_files:
+            FileIO.write_nacar_runtime_to_dir(
+                runtime_files, os.path.dirname(app_path), target_language)
+
+    time_stage(times, 'write_nacar_app_to_file', write_app)
+    return len(translation.encode('utf-8'))
+
+
+def benchmark(screens_count: int,
+              options_per_screen: int,
+              fan_out: int,
+              depth: Optional[int],
+              action_length: Optional[int],
+              target: str,
+              options: dict,
+              repeat: int) -> dict:
+    blueprint = generate_blueprint(screens_count, options_per_screen, fan_out,
+                                   depth, action_length)
+    times: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        blueprint_path = os.path.join(tmp_dir, 'blueprint.yml')
+        with open(blueprint_path, 'w') as file:
+            safe_dump(blueprint, file, sort_keys=False)
+        blueprint_bytes = os.path.getsize(blueprint_path)
+        for _ in range(repeat):
+            app_bytes = run_stages(blueprint_path, target, options, times)
+
+    stages = {
+        stage: {'median_ms': round(median(times[stage]) * 1000, 3),
+                'min_ms': round(min(times[stage]) * 1000, 3)}
+        for stage in STAGES
+    }
+    return {
+        'screens': screens_count,
+        'options_per_screen': options_per_screen,
+        'fan_out': fan_out,
+        'depth': depth,
+        'action_length': action_length,
+        'target': target,
+        'options': options,
+        'repeat': repeat,
+        'bytes': {'blueprint': blueprint_bytes, 'app': app_bytes},
+        'stages': stages,
+        'total_ms': round(sum(s['median_ms'] for s in stages.values()), 3)
+    }
+
+
+#   Compare results ───────────────────────────────────────────────────────────
+
+def get_scenario(result: dict) -> str:
+    return json.dumps({key: result.get(key) for key in SCENARIO_KEYS},
+                      sort_keys=True)
+
+
+def compare_results(baseline: dict,
+                    current: dict,
+                    threshold: float,
+                    min_ms: float) -> Tuple[List[dict], List[dict]]:
+    """
+    Compare the fastest run of every stage of the scenarios found in both
+    results, which is the time least affected by other load on the machine.
+    :param threshold: The percentage a stage may get slower by before it is
+        flagged as a regression.
+    :param min_ms: Stages that got slower by fewer milliseconds than this
+        are not flagged, as the difference is likely to be noise.
+    :return: A comparison per scenario and stage, and those that regressed.
+    """
+    baseline_results = {get_scenario(r): r for r in baseline['results']}
+    comparisons = []
+    for result in current['results']:
+        baseline_result = baseline_results.get(get_scenario(result))
+        if baseline_result is None:
+            continue
+        for stage in STAGES + ['total']:
+            if stage == 'total':
+                before = sum(s['min_ms']
+                             for s in baseline_result['stages'].values())
+                after = sum(s['min_ms'] for s in result['stages'].values())
+            else:
+                before = baseline_result['stages'][stage]['min_ms']
+                after = result['stages'][stage]['min_ms']
+            change = (after - before) / before * 100 if before else 0.0
+            comparisons.append({
+                'screens': result['screens'],
+                'options_per_screen': result['options_per_screen'],
+                'stage': stage,
+                'baseline_ms': before,
+                'current_ms': after,
+                'change_percent': round(change, 1),
+                'regression': change > threshold and after - before >= min_ms
+            })
+    return comparisons, [c for c in comparisons if c['regression']]
+
+
+def print_comparison(baseline: dict, current: dict,
+                     comparisons: List[dict]) -> None:
+    print(f"{baseline['nacar_version']} ({baseline['date']}) -> "
+          f"{current['nacar_version']} ({current['date']})")
+    print(f"{'screens':>8} {'options':>8} {'stage':<32} {'before ms':>10} "
+          f"{'after ms':>10} {'change':>8}")
+    for comparison in comparisons:
+        flag = '  REGRESSION' if comparison['regression'] else ''
+        print(f"{comparison['screens']:>8} "
+              f"{comparison['options_per_screen']:>8} "
+              f"{comparison['stage']:<32} "
+              f"{comparison['baseline_ms']:>10.1f} "
+              f"{comparison['current_ms']:>10.1f} "
+              f"{comparison['change_percent']:>+7.1f}%{flag}")
+
+
+def compare(baseline_path: str,
+            current_path: str,
+            threshold: float,
+            min_ms: float) -> int:
+    with open(baseline_path) as file:
+        baseline = json.load(file)
+    with open(current_path) as file:
+        current = json.load(file)
+
+    comparisons, regressions = compare_results(baseline, current,
+                                               threshold, min_ms)
+    if not comparisons:
+        print("The results share no scenarios to compare.")
+        return 1
+    print_comparison(baseline, current, comparisons)
+    print(f"{len(regressions)} stage(s) got more than {threshold}% slower.")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = ArgumentParser(prog='python3 -m benchmarks.compiler')
+    parser.add_argument('--screens', type=int, nargs='+',
+                        default=[10, 100, 999])
+    parser.add_argument('--options', type=int, default=10)
+    parser.add_argument('--fan-out', type=int, default=3)
+    parser.add_argument('--depth', type=int)
+    parser.add_argument('--action-length', type=int)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target', choices=TRANSLATORS.keys(),
+                        default='bash')
+    parser.add_argument('--minify', action='store_true')
+    parser.add_argument('--shard', action='store_true')
+    parser.add_argument('--table', action='store_true')
+    parser.add_argument('--runtime', action='store_true')
+    parser.add_argument('--json', action='store_true',
+                        help="Print results as JSON.")
+    parser.add_argument('--compare', nargs=2,
+                        metavar=('BASELINE', 'CURRENT'),
+                        help="Compare two results saved with --json.")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Flag stages that got slower by more than this "
+                             "percentage. Defaults to 10.")
+    parser.add_argument('--min-ms', type=float, default=1.0,
+                        help="Ignore stages that got slower by fewer "
+                             "milliseconds than this. Defaults to 1.")
+    arguments = parser.parse_args()
+
+    if arguments.compare:
+        sys.exit(compare(*arguments.compare, arguments.threshold,
+                         arguments.min_ms))
+
+    options = {'minify': arguments.minify,
+               'shard': arguments.shard,
+               'table': arguments.table,
+               'runtime': arguments.runtime}
+    results = [benchmark(screens_count, arguments.options, arguments.fan_out,
+                         arguments.depth, arguments.action_length,
+                         arguments.target, options, arguments.repeat)
+               for screens_count in arguments.screens]
+
+    if arguments.json:
+        print(json.dumps({
+            'nacar_version': __version__,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python_version': sys.version.split()[0],
+            'results': results
+        }, indent=2))
+        return
+
+    print(f"{'screens':>8} {'options':>8} "
+          + ' '.join(f"{stage.split('_')[0]:>10}" for stage in STAGES)
+          + f" {'total ms':>10}")
+    for result in results:
+        print(f"{result['screens']:>8} {result['options_per_screen']:>8} "
+              + ' '.join(f"{result['stages'][stage]['median_ms']:>10.1f}"
+                         for stage in STAGES)
+              + f" {result['total_ms']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
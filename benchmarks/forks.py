@@ -0,0 +1,72 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Fork tracer
+▔▔▔▔▔▔▔▔▔▔▔
+Trace a bash Nacar app and list the commands that fork a process, grouped by
+keystroke. Shared by the runtime benchmark and the runtime tests.
+"""
+
+import os
+import re
+import subprocess
+from glob import glob
+from typing import List
+
+
+def get_forking_commands_per_keystroke(app_path: str,
+                                       keystrokes: str) -> List[List[str]]:
+    """
+    Run a bash Nacar app, feeding it `keystrokes` on stdin, and trace every
+    command it runs by pointing BASH_XTRACEFD at a separate file.
+    A command forks if it runs in a subshell or is not a builtin, keyword or
+    function defined by the app.
+    :return: One list of forking commands per step, where a step is every
+        command run between two reads of a keystroke. The first step is the
+        startup and first frame; the last one runs on exit.
+    """
+    # Apps that load screens on demand define them in a sibling directory,
+    # and apps sharing a runtime source it from a sibling file.
+    source_paths = (
+        [app_path] + glob(f"{app_path}.screens/*.sh")
+        + glob(os.path.join(os.path.dirname(app_path), 'nacar-runtime*.sh'))
+    )
+    functions = set()
+    for source_path in source_paths:
+        with open(source_path) as source:
+            functions |= set(re.findall(r'^(\w+)\(\) \{', source.read(),
+                                        re.M))
+    builtins = set(subprocess.run(['bash', '-c', 'compgen -b; compgen -k'],
+                                  stdout=subprocess.PIPE)
+                   .stdout.decode('utf-8').split()) | {'(('}
+
+    trace_path = f"{app_path}.trace"
+    tracer = (f'PS4="+$BASH_SUBSHELL "; exec 9>"{trace_path}"; '
+              f'BASH_XTRACEFD=9; set -x; source "{app_path}"')
+    subprocess.run(['bash', '-c', tracer],
+                   input=keystrokes.encode('utf-8'),
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                   env={**os.environ, 'LC_ALL': 'C.UTF-8'}, timeout=10)
+
+    steps: List[List[str]] = [[]]
+    trace_line_re = re.compile(r'^\++(\d+) (.*)$')
+    with open(trace_path) as trace:
+        for line in trace:
+            match = trace_line_re.match(line)
+            if match is None:
+                continue
+            subshell_level, command = int(match[1]), match[2]
+            if command.startswith('read -rs -p'):
+                steps.append([])
+                continue
+            name = command.split(' ')[0]
+            is_assignment = re.match(r'^\w+(\[.*\])?\+?=', command)
+            if (subshell_level > 0
+                    or not (is_assignment or name in builtins
+                            or name in functions)):
+                steps[-1].append(command)
+    os.remove(trace_path)
+
+    return steps
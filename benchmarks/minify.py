@@ -0,0 +1,68 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Minify benchmark
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Report the size of bash Nacar apps translated from synthetic blueprints,
+and the time `bash -n` takes to parse them, with and without minifying.
+Run from the project root with `python3 -m benchmarks.minify`.
+"""
+
+import os
+import subprocess
+import tempfile
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+from typing import Tuple
+
+from benchmarks.synthetic import generate_blueprint
+from nacar.schema import Schema
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+
+
+def measure_app(blueprint: dict, minify: bool, repeat: int) -> Tuple[int, float]:  # noqa
+    """
+    :return: The size of the app in bytes and the median time in seconds
+        that `bash -n` takes to parse it.
+    """
+    translation = BlueprintToBash(blueprint, {'minify': minify}) \
+        .translate_blueprint()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_path = os.path.join(tmp_dir, 'app')
+        with open(app_path, 'w') as app:
+            app.write(translation)
+
+        parse_times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            subprocess.run(['bash', '-n', app_path], check=True)
+            parse_times.append(perf_counter() - start)
+
+    return len(translation.encode('utf-8')), median(parse_times)
+
+
+def main():
+    parser = ArgumentParser(prog='python3 -m benchmarks.minify')
+    parser.add_argument('--screens', type=int, nargs='+',
+                        default=[10, 100, 999])
+    parser.add_argument('--options', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    arguments = parser.parse_args()
+
+    print(f"{'screens':>8} {'bytes':>10} {'minified':>10} "
+          f"{'parse ms':>9} {'minified':>9}")
+    for screens_count in arguments.screens:
+        blueprint = Schema.set_missing_optional_attributes(
+            generate_blueprint(screens_count, arguments.options))
+        size, parse_time = measure_app(blueprint, False, arguments.repeat)
+        min_size, min_parse_time = measure_app(blueprint, True,
+                                               arguments.repeat)
+        print(f"{screens_count:>8} {size:>10} {min_size:>10} "
+              f"{parse_time * 1000:>9.1f} {min_parse_time * 1000:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
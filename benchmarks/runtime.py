@@ -0,0 +1,289 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Runtime benchmark
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Run bash Nacar apps translated from synthetic blueprints under a
+pseudo-terminal and drive them with scripted keystrokes: navigate down to the
+deepest screen, back up with the left arrow, and exit with ESC. Report the time
+to first frame, the latency of each keystroke, the bytes written to the
+terminal, and the commands that fork a process. Pass `--target python` or
+`--target sh` to measure Python or POSIX sh Nacar apps instead. POSIX sh apps
+are run by /bin/sh, and their forks are not counted.
+Run from the project root with `python3 -m benchmarks.runtime`, adding
+`--json` to print results that can be tracked across releases.
+"""
+
+import os
+import pty
+import json
+import select
+import subprocess
+import tempfile
+from argparse import ArgumentParser
+from datetime import datetime
+from statistics import mean, median
+from time import perf_counter
+from typing import List, Optional, Tuple
+
+from benchmarks.forks import get_forking_commands_per_keystroke
+from benchmarks.synthetic import generate_blueprint
+from nacar.__version__ import __version__
+from nacar.file_io import FileIO
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.main import TRANSLATORS
+from nacar.translate.itranslator import ITranslator
+
+
+# Bash and POSIX sh apps print this prompt once a frame is drawn and they
+# wait for a keystroke.
+PROMPT = b"  \x1b[1;32m$\x1b[0m "
+# Curses only sends what changed on the terminal, so a Python app's frame is
+# taken to be drawn once no more output arrives for this many seconds. Its
+# latency is measured up to the last byte received.
+QUIET_PERIOD = 0.05
+LEFT_ARROW, ESC = '\x1b[D', '\x1b'
+# Seconds to wait for the app to respond before giving up.
+TIMEOUT = 10
+
+
+def get_depth(screens_count: int, fan_out: int) -> int:
+    """
+    :return: The number of links followed from 'home' to reach the deepest
+        screen of a synthetic blueprint, always following the first link.
+    """
+    depth, index = 0, 0
+    while index * fan_out + 1 < screens_count:
+        index = index * fan_out + 1
+        depth += 1
+    return depth
+
+
+def get_keystrokes(depth: int) -> List[str]:
+    # Synthetic blueprints bind the first link of every screen to 'b'.
+    return ['b'] * depth + [LEFT_ARROW] * depth + [ESC]
+
+
+def write_app(blueprint: dict,
+              target: str,
+              options: dict,
+              app_dir: str) -> str:
+    translator: ITranslator = TRANSLATORS[target](blueprint, options)
+    target_language = translator.get_target_language()
+    app_path = os.path.join(app_dir, 'app')
+    FileIO.write_nacar_app_to_file(translator.translate_blueprint(),
+                                   app_path, target_language)
+    screen_chunks = translator.translate_screen_chunks()
+    if screen_chunks:
+        FileIO.write_nacar_app_screens_to_dir(screen_chunks,
+                                              f"{app_path}.screens",
+                                              target_language)
+    return app_path
+
+
+def read_until(fd: int,
+               is_done,
+               deadline: float,
+               quiet_period: Optional[float] = None) -> Tuple[bytes, float]:
+    """
+    Read from `fd` until `is_done(output)` is true, the app exits, or, if a
+    `quiet_period` is given, no more output arrives for that long.
+    :return: The output and the time its last byte was read at.
+    """
+    output = b''
+    last_read = perf_counter()
+    while not is_done(output):
+        remaining = deadline - perf_counter()
+        if remaining <= 0:
+            raise TimeoutError("The Nacar app did not respond in time.")
+        wait = remaining
+        if quiet_period is not None and output:
+            wait = min(remaining, quiet_period)
+        readable, _, _ = select.select([fd], [], [], wait)
+        if not readable:
+            if quiet_period is not None and output:
+                break
+            continue
+        try:
+            chunk = os.read(fd, 65536)
+        except OSError:  # The app exited and closed the terminal.
+            break
+        if chunk == b'':
+            break
+        output += chunk
+        last_read = perf_counter()
+    return output, last_read
+
+
+def drive_app(app_path: str, target: str, keystrokes: List[str]) -> Tuple[float, int, List[float], List[int]]:  # noqa
+    """
+    Run the app under a pseudo-terminal, typing each keystroke once the
+    previous frame has been drawn.
+    :return: The time to first frame in seconds, the bytes of the first
+        frame, and the latency in seconds and bytes written for each
+        keystroke. The last keystroke is expected to exit the app.
+    """
+    controller_fd, terminal_fd = pty.openpty()
+    start = perf_counter()
+    app = subprocess.Popen([app_path], stdin=terminal_fd, stdout=terminal_fd,
+                           stderr=terminal_fd, start_new_session=True,
+                           env={**os.environ, 'LC_ALL': 'C.UTF-8',
+                                'TERM': 'xterm'})
+    os.close(terminal_fd)
+
+    def frame_is_drawn(output: bytes) -> bool:
+        return target != 'python' and output.endswith(PROMPT)
+
+    def has_exited(_: bytes) -> bool:
+        return False
+
+    quiet_period = QUIET_PERIOD if target == 'python' else None
+    try:
+        output, drawn = read_until(controller_fd, frame_is_drawn,
+                                   start + TIMEOUT, quiet_period)
+        first_frame_time = drawn - start
+        first_frame_bytes = len(output)
+
+        latencies, bytes_written = [], []
+        for index, keystroke in enumerate(keystrokes):
+            is_last = index == len(keystrokes) - 1
+            sent = perf_counter()
+            os.write(controller_fd, keystroke.encode('utf-8'))
+            output, drawn = read_until(
+                controller_fd,
+                has_exited if is_last else frame_is_drawn,
+                sent + TIMEOUT,
+                None if is_last else quiet_period)
+            latencies.append(drawn - sent)
+            bytes_written.append(len(output))
+        app.wait(TIMEOUT)
+    finally:
+        if app.poll() is None:
+            app.kill()
+        os.close(controller_fd)
+
+    return first_frame_time, first_frame_bytes, latencies, bytes_written
+
+
+def percentile(values: List[float], percent: int) -> float:
+    # Nearest-rank percentile.
+    ranked = sorted(values)
+    rank = max(1, -(-percent * len(ranked) // 100))
+    return ranked[rank - 1]
+
+
+def benchmark(screens_count: int,
+              options_per_screen: int,
+              fan_out: int,
+              target: str,
+              options: dict,
+              repeat: int) -> dict:
+    blueprint = generate_blueprint(screens_count, options_per_screen, fan_out)
+    if options.get('differential_redraw'):
+        blueprint['meta']['differential_redraw'] = True
+    blueprint = Schema.set_missing_optional_attributes(blueprint)
+    translator_options = {k: v for k, v in options.items()
+                          if k != 'differential_redraw'}
+    depth = get_depth(screens_count, fan_out)
+    keystrokes = get_keystrokes(depth)
+
+    first_frame_times, navigation_latencies, exit_times = [], [], []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_path = write_app(blueprint, target, translator_options, tmp_dir)
+        for _ in range(repeat):
+            first_frame_time, first_frame_bytes, latencies, bytes_written = \
+                drive_app(app_path, target, keystrokes)
+            first_frame_times.append(first_frame_time)
+            # Exiting on ESC waits for the rest of an escape sequence, so it
+            # is reported apart from navigation.
+            navigation_latencies += latencies[:-1]
+            exit_times.append(latencies[-1])
+        # Python apps run in a single process until an action replaces it.
+        forks: Optional[List[List[str]]] = [[]] if target == 'python' else None
+        if target == 'bash':
+            forks = get_forking_commands_per_keystroke(app_path,
+                                                       ''.join(keystrokes))
+
+    navigation_ms = [latency * 1000 for latency in navigation_latencies]
+    return {
+        'screens': screens_count,
+        'options_per_screen': options_per_screen,
+        'fan_out': fan_out,
+        'depth': depth,
+        'target': target,
+        'options': options,
+        'keystrokes': len(keystrokes),
+        'first_frame_ms': round(median(first_frame_times) * 1000, 2),
+        'keystroke_latency_ms': {
+            'p50': round(percentile(navigation_ms, 50), 2),
+            'p90': round(percentile(navigation_ms, 90), 2),
+            'p99': round(percentile(navigation_ms, 99), 2),
+            'max': round(max(navigation_ms), 2)
+        },
+        'exit_ms': round(median(exit_times) * 1000, 2),
+        'bytes': {
+            'first_frame': first_frame_bytes,
+            'per_keystroke': round(mean(bytes_written[:-1]), 1),
+            'total': first_frame_bytes + sum(bytes_written)
+        },
+        'forks': None if forks is None else {
+            'startup': len(forks[0]),
+            'keystrokes': sum(len(step) for step in forks[1:])
+        }
+    }
+
+
+def main():
+    parser = ArgumentParser(prog='python3 -m benchmarks.runtime')
+    parser.add_argument('--screens', type=int, nargs='+',
+                        default=[10, 100, 999])
+    parser.add_argument('--options', type=int, default=10)
+    parser.add_argument('--fan-out', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target', choices=TRANSLATORS.keys(),
+                        default='bash')
+    parser.add_argument('--minify', action='store_true')
+    parser.add_argument('--shard', action='store_true')
+    parser.add_argument('--differential-redraw', action='store_true')
+    parser.add_argument('--json', action='store_true',
+                        help="Print results as JSON.")
+    arguments = parser.parse_args()
+
+    options = {'minify': arguments.minify,
+               'shard': arguments.shard,
+               'differential_redraw': arguments.differential_redraw}
+    results = [benchmark(screens_count, arguments.options, arguments.fan_out,
+                         arguments.target, options, arguments.repeat)
+               for screens_count in arguments.screens]
+
+    if arguments.json:
+        print(json.dumps({
+            'nacar_version': __version__,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'bash_version': subprocess.run(
+                ['bash', '-c', 'echo $BASH_VERSION'],
+                stdout=subprocess.PIPE).stdout.decode('utf-8').strip(),
+            'results': results
+        }, indent=2))
+        return
+
+    print(f"{'screens':>8} {'depth':>6} {'first frame ms':>15} "
+          f"{'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} "
+          f"{'bytes/key':>10} {'forks':>6}")
+    for result in results:
+        latency = result['keystroke_latency_ms']
+        forks = ('-' if result['forks'] is None
+                 else result['forks']['startup']
+                 + result['forks']['keystrokes'])
+        print(f"{result['screens']:>8} {result['depth']:>6} "
+              f"{result['first_frame_ms']:>15.1f} "
+              f"{latency['p50']:>7.2f} {latency['p90']:>7.2f} "
+              f"{latency['p99']:>7.2f} "
+              f"{result['bytes']['per_keystroke']:>10.1f} {forks:>6}")
+
+
+if __name__ == '__main__':
+    main()
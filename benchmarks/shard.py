@@ -0,0 +1,117 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Sharding benchmark
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Report the time bash Nacar apps translated from synthetic blueprints take to
+draw their first frame, written to a single file and sharded into a file per
+screen. Apps are run with no input, so they exit after the first frame.
+Also report the bytes the sharded launcher grows by for each screen, which
+bash parses before drawing any frame, and exit with status 1 if that is over
+`--max-launcher-bytes-per-screen`.
+Run from the project root with `python3 -m benchmarks.shard`.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+
+from benchmarks.synthetic import generate_blueprint
+from nacar.file_io import FileIO
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+
+
+# Each screen adds a line to the sharded launcher's tables of screens and
+# their chunks. Sharded apps launch in about the same time whatever their
+# number of screens only for as long as that is all it adds.
+MAX_LAUNCHER_BYTES_PER_SCREEN = 80
+
+
+def get_launcher_bytes_per_screen(screens_count: int,
+                                  options_count: int) -> float:
+    """
+    :return: The bytes the sharded launcher of a synthetic blueprint grows by
+        for each screen past the first.
+    """
+    def get_launcher_bytes(screens: int) -> int:
+        blueprint = Schema.set_missing_optional_attributes(
+            generate_blueprint(screens, options_count))
+        translation = BlueprintToBash(blueprint, {'shard': True}) \
+            .translate_blueprint()
+        return len(translation.encode())
+
+    return ((get_launcher_bytes(screens_count) - get_launcher_bytes(1))
+            / (screens_count - 1))
+
+
+def measure_first_frame(blueprint: dict, shard: bool, repeat: int) -> float:
+    """
+    :return: The median time in seconds the app takes to draw its first frame
+        and exit.
+    """
+    translator = BlueprintToBash(blueprint, {'shard': shard})
+    translation = translator.translate_blueprint()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_path = os.path.join(tmp_dir, 'app')
+        FileIO.write_nacar_app_to_file(translation, app_path,
+                                       TargetLanguage.BASH)
+        if shard:
+            FileIO.write_nacar_app_screens_to_dir(
+                translator.translate_screen_chunks(),
+                f"{app_path}.screens",
+                TargetLanguage.BASH)
+
+        first_frame_times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            subprocess.run([app_path], stdin=subprocess.DEVNULL,
+                           stdout=subprocess.DEVNULL, check=True)
+            first_frame_times.append(perf_counter() - start)
+
+    return median(first_frame_times)
+
+
+def main():
+    parser = ArgumentParser(prog='python3 -m benchmarks.shard')
+    parser.add_argument('--screens', type=int, nargs='+',
+                        default=[10, 100, 999])
+    parser.add_argument('--options', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-launcher-bytes-per-screen', type=float,
+                        default=MAX_LAUNCHER_BYTES_PER_SCREEN,
+                        help="Exit with status 1 if the sharded launcher "
+                             "grows by more bytes than this for each screen. "
+                             f"Defaults to {MAX_LAUNCHER_BYTES_PER_SCREEN}.")
+    arguments = parser.parse_args()
+
+    print(f"{'screens':>8} {'first frame ms':>15} {'sharded':>9}")
+    for screens_count in arguments.screens:
+        blueprint = Schema.set_missing_optional_attributes(
+            generate_blueprint(screens_count, arguments.options))
+        first_frame_time = measure_first_frame(blueprint, False,
+                                               arguments.repeat)
+        sharded_first_frame_time = measure_first_frame(blueprint, True,
+                                                       arguments.repeat)
+        print(f"{screens_count:>8} {first_frame_time * 1000:>15.1f} "
+              f"{sharded_first_frame_time * 1000:>9.1f}")
+
+    launcher_bytes_per_screen = get_launcher_bytes_per_screen(
+        max(max(arguments.screens), 2), arguments.options)
+    print(f"The sharded launcher grows by {launcher_bytes_per_screen:.1f} "
+          f"bytes for each screen.")
+    if launcher_bytes_per_screen > arguments.max_launcher_bytes_per_screen:
+        print(f"That is over the budget of "
+              f"{arguments.max_launcher_bytes_per_screen:g} bytes.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Shared runtime benchmark
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Report the bytes on disk taken by a batch of bash Nacar apps translated from
+synthetic blueprints, and the time one of them takes to draw its first frame,
+with each app defining its own utilities and with every app sourcing a shared
+runtime. Apps are run with no input, so they exit after the first frame.
+Run from the project root with `python3 -m benchmarks.shared_runtime`.
+"""
+
+import os
+import subprocess
+import tempfile
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+from typing import Tuple
+
+from benchmarks.synthetic import generate_blueprint
+from nacar.file_io import FileIO
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+
+
+def measure_batch(blueprint: dict,
+                  apps_count: int,
+                  runtime: bool,
+                  repeat: int) -> Tuple[int, float]:
+    """
+    :return: The bytes taken by the apps, and their runtime if shared, and
+        the median time in seconds the first app takes to draw its first
+        frame and exit.
+    """
+    translator = BlueprintToBash(blueprint, {'runtime': runtime})
+    translation = translator.translate_blueprint()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for index in range(apps_count):
+            FileIO.write_nacar_app_to_file(
+                translation, os.path.join(tmp_dir, f"app-{index}"),
+                TargetLanguage.BASH)
+            FileIO.write_nacar_runtime_to_dir(translator.translate_runtime(),
+                                              tmp_dir, TargetLanguage.BASH)
+        size = sum(os.path.getsize(os.path.join(tmp_dir, file_name))
+                   for file_name in os.listdir(tmp_dir))
+
+        first_frame_times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            subprocess.run([os.path.join(tmp_dir, 'app-0')],
+                           stdin=subprocess.DEVNULL,
+                           stdout=subprocess.DEVNULL, check=True)
+            first_frame_times.append(perf_counter() - start)
+
+    return size, median(first_frame_times)
+
+
+def main():
+    parser = ArgumentParser(prog='python3 -m benchmarks.shared_runtime')
+    parser.add_argument('--apps', type=int, nargs='+', default=[1, 10, 300])
+    parser.add_argument('--screens', type=int, default=10)
+    parser.add_argument('--options', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    arguments = parser.parse_args()
+
+    blueprint = Schema.set_missing_optional_attributes(
+        generate_blueprint(arguments.screens, arguments.options))
+    print(f"{'apps':>6} {'bytes':>10} {'shared':>10} "
+          f"{'first frame ms':>15} {'shared':>7}")
+    for apps_count in arguments.apps:
+        size, first_frame_time = measure_batch(blueprint, apps_count, False,
+                                               arguments.repeat)
+        shared_size, shared_first_frame_time = measure_batch(
+            blueprint, apps_count, True, arguments.repeat)
+        print(f"{apps_count:>6} {size:>10} {shared_size:>10} "
+              f"{first_frame_time * 1000:>15.1f} "
+              f"{shared_first_frame_time * 1000:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Synthetic blueprints
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Generate valid blueprints of a given size to benchmark Nacar with.
+"""
+
+from string import ascii_lowercase
+from typing import List, Optional
+
+
+def get_parents(screens_count: int,
+                fan_out: int,
+                depth: Optional[int] = None) -> List[int]:
+    """
+    :param depth: The number of links from 'home' to the deepest screen. If
+        not given, screens fill a complete tree breadth first.
+    :return: The index of the parent of every screen but 'home'. Screens on
+        the path to the deepest screen are always their parent's first child.
+    """
+    if depth is None:
+        return [(index - 1) // fan_out for index in range(1, screens_count)]
+
+    if screens_count > 1 and depth < 1:
+        raise ValueError("The depth must be at least 1.")
+
+    parents: List[int] = []
+    levels, children = [0], [0]
+    # Reach the requested depth first, then fill shallower screens in order.
+    candidate = 0
+    for index in range(1, screens_count):
+        if index <= depth:
+            parent = index - 1
+        else:
+            while (children[candidate] >= fan_out
+                   or levels[candidate] >= depth):
+                candidate += 1
+                if candidate == index:
+                    raise ValueError(f"{screens_count} screens do not fit in "
+                                     f"a tree of fan out {fan_out} and "
+                                     f"depth {depth}.")
+            parent = candidate
+        parents.append(parent)
+        levels.append(levels[parent] + 1)
+        children.append(0)
+        children[parent] += 1
+    return parents
+
+
+def generate_blueprint(screens_count: int,
+                       options_per_screen: int,
+                       fan_out: int = 3,
+                       depth: Optional[int] = None,
+                       action_length: Optional[int] = None) -> dict:
+    """
+    Screens form a tree rooted at 'home', where each screen links to up to
+    `fan_out` children. Links are bound to the keys 'b' to 'z', so `fan_out`
+    may be at most 25. The remaining options are actions bound to their
+    position, as digits of the same width eg. '07'.
+    :param screens_count: Number of screens, including 'home'.
+    :param options_per_screen: Number of options on every screen.
+    :param fan_out: Maximum number of links on a screen.
+    :param depth: Number of links from 'home' to the deepest screen, reached
+        by always following the link bound to 'b'. If not given, screens fill
+        a complete tree.
+    :param action_length: Length of every action, padded with dots.
+    :return: A blueprint as returned by `FileIO.parse_yml_file()`.
+    """
+    if not 0 < fan_out <= 25:
+        raise ValueError("The fan out must be between 1 and 25.")
+
+    def screen_name(index: int) -> str:
+        return 'home' if index == 0 else f"screen{index}"
+
+    def action(index: int) -> str:
+        command = f"echo 'action {index}"
+        padding = '.' * ((action_length or 0) - len(command) - 1)
+        return f"{command}{padding}'"
+
+    children: List[List[int]] = [[] for _ in range(screens_count)]
+    for child, parent in enumerate(get_parents(screens_count, fan_out, depth),
+                                   start=1):
+        children[parent].append(child)
+
+    # Keys of the same width never start one another.
+    key_width = len(str(options_per_screen - 1))
+    screens = []
+    for index in range(screens_count):
+        options: list = [{'name': f"{ascii_lowercase[1 + i]} {screen_name(c)}",
+                          'link': screen_name(c)}
+                         for i, c in enumerate(children[index])]
+        options = options[:options_per_screen]
+        options += [{'name': f"action {i}", 'key': f"{i:0{key_width}d}",
+                     'action': action(i)}
+                    for i in range(len(options), options_per_screen)]
+        screens.append({'name': screen_name(index), 'options': options})
+
+    return {
+        'title': f"Synthetic {screens_count}x{options_per_screen}",
+        'meta': {'authors': ['Nacar benchmarks']},
+        'screens': screens
+    }
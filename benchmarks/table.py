@@ -0,0 +1,83 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Screen table benchmark
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Report the time taken to translate synthetic blueprints to bash Nacar apps,
+the size of the apps, and the time they take to draw their first frame, with
+functions per screen and with the 'table' option. Apps are run with no input,
+so they exit after the first frame.
+Run from the project root with `python3 -m benchmarks.table`.
+"""
+
+import os
+import subprocess
+import tempfile
+from argparse import ArgumentParser
+from statistics import median
+from time import perf_counter
+from typing import Tuple
+
+from benchmarks.synthetic import generate_blueprint
+from nacar.file_io import FileIO
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+
+
+def measure_app(blueprint: dict,
+                table: bool,
+                repeat: int) -> Tuple[float, int, float]:
+    """
+    :return: The median time in seconds taken to translate the blueprint,
+        the size of the app in bytes, and the median time in seconds the app
+        takes to draw its first frame and exit.
+    """
+    translation_times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        translation = BlueprintToBash(blueprint,
+                                      {'table': table}).translate_blueprint()
+        translation_times.append(perf_counter() - start)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        app_path = os.path.join(tmp_dir, 'app')
+        FileIO.write_nacar_app_to_file(translation, app_path,
+                                       TargetLanguage.BASH)
+
+        first_frame_times = []
+        for _ in range(repeat):
+            start = perf_counter()
+            subprocess.run([app_path], stdin=subprocess.DEVNULL,
+                           stdout=subprocess.DEVNULL, check=True)
+            first_frame_times.append(perf_counter() - start)
+
+    return (median(translation_times), len(translation.encode('utf-8')),
+            median(first_frame_times))
+
+
+def main():
+    parser = ArgumentParser(prog='python3 -m benchmarks.table')
+    parser.add_argument('--screens', type=int, nargs='+',
+                        default=[10, 100, 999])
+    parser.add_argument('--options', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=5)
+    arguments = parser.parse_args()
+
+    print(f"{'screens':>8} {'':>6} {'translate ms':>13} {'app KiB':>8} "
+          f"{'first frame ms':>15}")
+    for screens_count in arguments.screens:
+        blueprint = Schema.set_missing_optional_attributes(
+            generate_blueprint(screens_count, arguments.options))
+        for table in (False, True):
+            translation_time, app_size, first_frame_time = measure_app(
+                blueprint, table, arguments.repeat)
+            print(f"{screens_count:>8} {'table' if table else 'code':>6} "
+                  f"{translation_time * 1000:>13.1f} {app_size / 1024:>8.1f} "
+                  f"{first_frame_time * 1000:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Blueprint cache
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Keep the blueprints `Nacar.run()` has parsed, validated and set the missing
+optional attributes of, so that translating an unchanged blueprint again, eg.
+after upgrading Nacar's templates, can skip straight to translation.
+Entries are stored with `marshal`, which is compact and quick to load. Like
+`pickle`, it is not secure against malformed or maliciously constructed data,
+so keep the cache in a directory only the users running Nacar can write to.
+"""
+
+import os
+import json
+import marshal
+import hashlib
+from typing import Optional
+
+from nacar.__version__ import __version__
+from nacar.schema import Schema
+
+
+def get_schema_version() -> str:
+    """
+    Return a version that changes whenever the blueprints accepted by Nacar,
+    or the defaults set on them, may have changed. The validator's rules and
+    the defaults are code, so are covered by Nacar's version. The schema is
+    digested as well so that changing it during development is noticed.
+    """
+    schema = {'blueprint': Schema.get_blueprint_schema(),
+              'subschemas': Schema.get_blueprint_subschemas()}
+    digest = hashlib.sha256(json.dumps(schema, sort_keys=True)
+                            .encode('utf-8')).hexdigest()
+    return f"{__version__}-{digest[:16]}"
+
+
+class BlueprintCache:
+    """
+    :param cache_dir: The directory entries are kept in, created if missing.
+        May be shared by any number of Nacar processes.
+    """
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+        self.schema_version = get_schema_version()
+
+    def get_key(self, blueprint_path: str) -> str:
+        """
+        Return a digest of the blueprint's content and the schema version.
+        :raise FileNotFoundError: If the blueprint does not exist.
+        """
+        with open(blueprint_path, 'rb') as blueprint_file:
+            content = blueprint_file.read()
+        return hashlib.sha256(self.schema_version.encode('utf-8') + b'\0'
+                              + content).hexdigest()
+
+    def get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.marshal")
+
+    def load(self, key: str) -> Optional[dict]:
+        """
+        :return: The validated blueprint with its missing optional attributes
+            set, or None if there is no entry for the key or it is unreadable.
+        """
+        try:
+            with open(self.get_entry_path(key), 'rb') as entry:
+                blueprint = marshal.load(entry)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return blueprint if isinstance(blueprint, dict) else None
+
+    def store(self, key: str, blueprint: dict) -> None:
+        """
+        Write an entry for the blueprint. Entries are replaced whole, so a
+        process loading one while it is written never reads half of it.
+        Blueprints that cannot be stored are parsed and validated every time.
+        """
+        entry_path = self.get_entry_path(key)
+        temp_entry_path = f"{entry_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_entry_path, 'wb') as entry:
+                marshal.dump(blueprint, entry)
+            os.replace(temp_entry_path, entry_path)
+        except (OSError, ValueError):
+            # The cache directory cannot be written to, or the blueprint
+            # holds values marshal cannot store.
+            try:
+                os.remove(temp_entry_path)
+            except OSError:
+                pass
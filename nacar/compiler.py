@@ -0,0 +1,165 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Compiler
+▔▔▔▔▔▔▔▔
+Turn a blueprint into a Nacar app in memory, without reading or writing
+files, for code that embeds Nacar. `AsyncCompiler` runs compiles in an
+executor so that an asyncio event loop is not blocked by parsing, validating
+and translating, and has a burst of requests for the same blueprint compile
+it only once.
+"""
+
+import asyncio
+import hashlib
+import json
+from copy import deepcopy
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional, Type, Union, cast
+
+from yaml import safe_load
+
+from nacar.schema import Schema, InvalidSchemaError
+from nacar.validator import NacarValidator
+from nacar.translate.itranslator import ITranslator
+from nacar.translate.target_language import TargetLanguage
+
+
+@dataclass(frozen=True)
+class CompiledApp:
+    translation: str
+    # The screens of sharded apps, keyed by the name of their file.
+    screen_chunks: Dict[str, str]
+    target_language: TargetLanguage
+    # The runtime sourced by apps that share one, keyed by file name.
+    runtime_files: Dict[str, str] = field(default_factory=dict)
+    # Problems with the blueprint that did not stop it compiling.
+    warnings: List[str] = field(default_factory=list)
+
+
+def compile_blueprint(blueprint: Union[str, dict],
+                      translator_class: Type[ITranslator],
+                      translator_options: Optional[dict]=None) -> CompiledApp:
+    """
+    Parse, validate and translate a blueprint. Each call uses validators and
+    translators of its own, so calls may run in several threads at once.
+    :param blueprint: A YAML blueprint, or a blueprint already parsed.
+    :raise InvalidSchemaError: If the blueprint is not valid.
+    """
+    parsed_blueprint: dict
+    if isinstance(blueprint, str):
+        parsed_blueprint = safe_load(blueprint)
+    else:
+        # Setting missing optional attributes must not change the caller's.
+        parsed_blueprint = deepcopy(blueprint)
+
+    validator = NacarValidator()
+    if not validator.validate(parsed_blueprint,
+                              Schema.get_blueprint_schema()):
+        raise InvalidSchemaError(validator.errors)
+    parsed_blueprint = Schema.set_missing_optional_attributes(parsed_blueprint)
+
+    # Translators take a blueprint and options, unlike ITranslator itself.
+    translator = cast(Callable[..., ITranslator], translator_class)(
+        parsed_blueprint, translator_options)
+    return CompiledApp(translator.translate_blueprint(),
+                       translator.translate_screen_chunks(),
+                       translator.get_target_language(),
+                       translator.translate_runtime(),
+                       validator.warnings)
+
+
+def get_blueprint_key(blueprint: Union[str, dict],
+                      translator_class: Type[ITranslator],
+                      translator_options: Optional[dict]=None) -> str:
+    """
+    Return a digest identifying the app a blueprint compiles to. Parsed
+    blueprints with the same content have the same key, whatever the order
+    of their keys.
+    """
+    content = (blueprint if isinstance(blueprint, str)
+               else json.dumps(blueprint, sort_keys=True, default=str))
+    return hashlib.sha256(json.dumps([
+        content,
+        f"{translator_class.__module__}.{translator_class.__qualname__}",
+        translator_options or {}
+    ], sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class AsyncCompiler:
+    """
+    :param executor: Runs `compile_blueprint()`. A `ProcessPoolExecutor`
+        lets compiles run in parallel. Defaults to the event loop's default
+        executor, a thread pool.
+    :param max_concurrency: The most compiles running at once. Others wait
+        their turn without taking up a worker.
+    Use an AsyncCompiler from a single event loop at a time.
+    """
+
+    def __init__(self,
+                 translator_class: Type[ITranslator],
+                 translator_options: Optional[dict]=None,
+                 executor: Optional[Executor]=None,
+                 max_concurrency: int=4) -> None:
+        self.translator_class = translator_class
+        self.translator_options = translator_options
+        self.executor = executor
+        self.max_concurrency = max_concurrency
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Compiles in progress and the number of callers awaiting each.
+        self.in_flight: Dict[str, List] = {}
+
+    def get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores belong to the event loop they are first used in.
+        loop = asyncio.get_running_loop()
+        if self.semaphore is None or self.loop is not loop:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.loop = loop
+        return self.semaphore
+
+    def forget(self, key: str, task: asyncio.Future) -> None:
+        if key in self.in_flight and self.in_flight[key][0] is task:
+            del self.in_flight[key]
+
+    async def run_compile(self, blueprint: Union[str, dict]) -> CompiledApp:
+        async with self.get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor,
+                partial(compile_blueprint, blueprint, self.translator_class,
+                        self.translator_options))
+
+    async def compile(self, blueprint: Union[str, dict]) -> CompiledApp:
+        """
+        Compile a blueprint without blocking the event loop. Callers asking
+        for a blueprint that is already being compiled share its result.
+        Cancelling a call only cancels the compile if no other caller is
+        awaiting it. A compile that has started in the executor runs to the
+        end, but its result is dropped.
+        :raise InvalidSchemaError: If the blueprint is not valid.
+        """
+        key = get_blueprint_key(blueprint, self.translator_class,
+                                self.translator_options)
+        if key not in self.in_flight:
+            task = asyncio.ensure_future(self.run_compile(blueprint))
+            self.in_flight[key] = [task, 0]
+            task.add_done_callback(partial(self.forget, key))
+        entry = self.in_flight[key]
+        task = entry[0]
+
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if entry[1] == 1:
+                # Later callers start a compile of their own.
+                self.forget(key, task)
+                task.cancel()
+            raise
+        finally:
+            entry[1] -= 1
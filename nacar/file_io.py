@@ -10,9 +10,11 @@ and read & write the content of files.
 """
 
 import os
+import glob
 from os.path import exists as file_exists
 from os.path import abspath
 import stat
+from typing import List
 
 from yaml import safe_load
 from yaml.scanner import ScannerError
@@ -68,7 +70,9 @@ class FileIO:
         if file_exists(target_file_path):
             os.remove(target_file_path)
 
-        if target_language == TargetLanguage.BASH:
+        if target_language in (TargetLanguage.BASH,
+                               TargetLanguage.PYTHON,
+                               TargetLanguage.POSIX_SH):
             with open(target_file_path, 'w') as outfile:
                 outfile.write(script_content)
                 FileIO.make_file_executable(target_file_path)
@@ -77,3 +81,64 @@ class FileIO:
             raise NotImplementedError(f"There is no writer configured for "
                                       f"writing Nacar apps in "
                                       f"{target_language.name.title()}.")
+
+    @staticmethod
+    def write_nacar_app_screens_to_dir(screen_chunks: dict,
+                                       target_dir_path: str,
+                                       target_language: TargetLanguage) -> None:  # noqa
+        """
+        Write the code for each screen of a Nacar app that loads screens on
+        demand to a file of its own, replacing any screens written before.
+        :param screen_chunks: output of 'translate_screen_chunks()'.
+        :param target_dir_path: absolute path of the directory to write to.
+        :param target_language: a TargetLanguage enum value.
+        """
+        if target_language != TargetLanguage.BASH:
+            raise NotImplementedError(f"There is no writer configured for "
+                                      f"writing Nacar apps in "
+                                      f"{target_language.name.title()}.")
+
+        os.makedirs(target_dir_path, exist_ok=True)
+        stale_file_paths = glob.glob(os.path.join(target_dir_path, '*.sh'))
+        for stale_file_path in stale_file_paths:
+            os.remove(stale_file_path)
+
+        for screen, chunk in screen_chunks.items():
+            with open(os.path.join(target_dir_path, f"{screen}.sh"), 'w') as outfile:  # noqa
+                outfile.write(chunk)
+
+    @staticmethod
+    def write_nacar_runtime_to_dir(runtime_files: dict,
+                                   target_dir_path: str,
+                                   target_language: TargetLanguage) -> List[str]:  # noqa
+        """
+        Write the runtime shared by Nacar apps to the directory they are in.
+        A runtime file that already holds the same code is left as it is, so
+        a batch of apps written to one directory shares a single runtime.
+        Files are replaced whole, so apps running while they are rewritten
+        never source half a runtime.
+        :param runtime_files: output of 'translate_runtime()'.
+        :param target_dir_path: absolute path of the directory to write to.
+        :param target_language: a TargetLanguage enum value.
+        :return: The names of the files written.
+        """
+        if target_language != TargetLanguage.BASH:
+            raise NotImplementedError(f"There is no writer configured for "
+                                      f"writing Nacar runtimes in "
+                                      f"{target_language.name.title()}.")
+
+        written_file_names = []
+        for file_name, content in runtime_files.items():
+            file_path = os.path.join(target_dir_path, file_name)
+            if file_exists(file_path):
+                with open(file_path) as infile:
+                    if infile.read() == content:
+                        continue
+
+            temp_file_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(temp_file_path, 'w') as outfile:
+                outfile.write(content)
+            os.replace(temp_file_path, file_path)
+            written_file_names.append(file_name)
+
+        return written_file_names
@@ -13,18 +13,43 @@ functionalities - read YAML blueprints, parse to in-memory object,
 translate, and finally write to file.
 """
 
-from sys import argv
+import cProfile
+from sys import argv, stderr
 import os.path as os_path
-from typing import Type, List
+from argparse import ArgumentParser, Namespace
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from typing import Dict, Iterator, Type, List, Optional, Union
 
 from yaml.scanner import ScannerError
 
+from nacar.cache import BlueprintCache
 from nacar.file_io import FileIO
+from nacar.compiler import AsyncCompiler, CompiledApp
+from nacar.report import AppReport, SizeBudgetExceededError, count_lines
 from nacar.schema import Schema, InvalidSchemaError
+from nacar.stages import (Stage, StageHooks, StageTimings, StageMemory,
+                          MemoryBudgetExceededError, parse_memory_size)
 from nacar.validator import NacarValidator
 from nacar.translate.itranslator import ITranslator
 from nacar.translate.target_language import TargetLanguage
 from nacar.translate.to_bash.to_bash import BlueprintToBash
+from nacar.translate.to_python.to_python import BlueprintToPython
+from nacar.translate.to_posix_sh.to_posix_sh import BlueprintToPosixSh
+
+
+# Translators by the name of their target language, as passed to `--target`.
+TRANSLATORS: Dict[str, Type[ITranslator]] = {
+    'bash': BlueprintToBash,
+    'python': BlueprintToPython,
+    'sh': BlueprintToPosixSh
+}
+# The extension of the file Nacar apps are written to, by target language.
+APP_FILE_EXTENSIONS: Dict[TargetLanguage, str] = {
+    TargetLanguage.BASH: '',
+    TargetLanguage.PYTHON: '.py',
+    TargetLanguage.POSIX_SH: ''
+}
 
 
 class Nacar:
@@ -32,11 +57,57 @@ class Nacar:
                  file_io: FileIO,
                  schema: Schema,
                  validator: NacarValidator,
-                 translator_class: Type[ITranslator]):
+                 translator_class: Type[ITranslator],
+                 translator_options: Optional[dict]=None,
+                 hooks: Optional[List[StageHooks]]=None,
+                 executor: Optional[Executor]=None,
+                 max_concurrency: int=4,
+                 cache: Optional[BlueprintCache]=None,
+                 report: bool=False,
+                 max_size: Optional[int]=None):
+        """
+        :param report: Account for the size of each section of the app in
+            `app_report` when running.
+        :param max_size: The bytes the app, with its screen files if sharded,
+            may take before `run()` raises `SizeBudgetExceededError` rather
+            than write it.
+        """
         self.file_io = file_io
         self.schema = schema
         self.validator = validator
         self.translator_class = translator_class
+        self.translator_options = (translator_options
+                                   if translator_options is not None else {})
+        self.hooks = hooks if hooks is not None else []
+        self.cache = cache
+        self.report = report
+        self.max_size = max_size
+        self.app_report: Optional[AppReport] = None
+        self.async_compiler = AsyncCompiler(translator_class,
+                                            self.translator_options,
+                                            executor, max_concurrency)
+
+    @contextmanager
+    def stage(self, stage: Stage) -> Iterator[None]:
+        """
+        Tell every hook when the given stage starts and ends.
+        """
+        for hook in self.hooks:
+            hook.on_stage_start(stage)
+        try:
+            yield
+        finally:
+            for hook in self.hooks:
+                hook.on_stage_end(stage)
+
+    async def compile_async(self, blueprint: Union[str, dict]) -> CompiledApp:
+        """
+        Compile a YAML or parsed blueprint to a Nacar app in memory, running
+        the work in the executor passed to the constructor so the event loop
+        is not blocked. See `AsyncCompiler.compile()`. Stage hooks are not
+        told about these compiles.
+        """
+        return await self.async_compiler.compile(blueprint)
 
     @staticmethod
     def get_blueprint_path_from_arguments(arguments: List[str]) -> str:
@@ -56,69 +127,228 @@ class Nacar:
 
         return blueprint_path
 
-    def run(self, blueprint_path):
+    @staticmethod
+    def get_options_from_arguments(arguments: List[str]) -> Namespace:
         """
-        Read and parse the given blueprint and validate it. If valid, output
-        a Nacar script written in the Translator's TargetLanguage.
-        :param blueprint_path: Path to the YAML blueprint to process.
-        :return:
+        Parse the options that may follow the path to the blueprint.
+        """
+        parser = ArgumentParser(prog='nacar',
+                                usage='%(prog)s <blueprint>.yml [options]')
+        parser.add_argument('--target', choices=TRANSLATORS.keys(),
+                            default='bash',
+                            help="The language to write the Nacar app in. "
+                                 "Defaults to bash.")
+        parser.add_argument('--minify', action='store_true',
+                            help="Strip comments and whitespace from the "
+                                 "Nacar app and shorten its identifiers.")
+        parser.add_argument('--shard', action='store_true',
+                            help="Write each screen to a file of its own, "
+                                 "loaded the first time it is shown.")
+        parser.add_argument('--table', action='store_true',
+                            help="Describe screens with arrays of data read "
+                                 "by shared functions, rather than with "
+                                 "functions per screen.")
+        parser.add_argument('--runtime', action='store_true',
+                            help="Source the utilities and main loop from a "
+                                 "runtime shared by the Nacar apps in the "
+                                 "same directory, written next to the app.")
+        parser.add_argument('--timings', nargs='?', const='table',
+                            choices=['table', 'json'],
+                            help="Print the wall-clock and CPU time taken by "
+                                 "each stage to stderr, as a table or JSON.")
+        parser.add_argument('--memory', nargs='?', const='table',
+                            choices=['table', 'json'],
+                            help="Print the memory allocated at the end of "
+                                 "each stage and its peak during the stage "
+                                 "to stderr, as a table or JSON.")
+        parser.add_argument('--max-memory', metavar='SIZE',
+                            type=parse_memory_size,
+                            help="Abort if a stage allocates more than this "
+                                 "much memory, eg. 512M or 2G.")
+        parser.add_argument('--report', nargs='?', const='table',
+                            choices=['table', 'json'],
+                            help="Print the bytes and lines of each section "
+                                 "of the Nacar app, and its largest screens, "
+                                 "to stderr, as a table or JSON.")
+        parser.add_argument('--top-screens', metavar='N', type=int,
+                            default=5,
+                            help="The number of largest screens listed by "
+                                 "--report. Defaults to 5.")
+        parser.add_argument('--max-size', metavar='SIZE',
+                            type=parse_memory_size,
+                            help="Fail without writing the Nacar app if it "
+                                 "takes more than this many bytes, with its "
+                                 "screen files if sharded, eg. 64K.")
+        parser.add_argument('--cache', metavar='DIR',
+                            help="Keep validated blueprints in this "
+                                 "directory, so that unchanged blueprints "
+                                 "are not parsed and validated again.")
+        parser.add_argument('--profile', metavar='OUT.prof',
+                            help="Profile the run with cProfile and write "
+                                 "the stats to the given file.")
+
+        options = parser.parse_args(arguments[2:])
+        if options.target != 'bash' and (options.minify or options.shard
+                                         or options.table or options.runtime):
+            parser.error("--minify, --shard, --table and --runtime are only "
+                         "supported when targeting bash.")
+        if options.shard and options.table:
+            parser.error("--shard and --table cannot be used together.")
+
+        return options
+
+    def get_valid_blueprint(self, blueprint_path: str) -> Optional[dict]:
+        """
+        Read, parse and validate the given blueprint, and set its missing
+        optional attributes. When the blueprint cache holds an entry for the
+        blueprint, it is returned instead.
+        :return: The blueprint, or None if it could not be read or parsed.
+        :raise InvalidSchemaError: If the blueprint is not valid.
         """
         blueprint: dict
+        cache_key: Optional[str] = None
+
+        if self.cache is not None:
+            with self.stage(Stage.CACHE_LOAD):
+                try:
+                    cache_key = self.cache.get_key(blueprint_path)
+                except FileNotFoundError:
+                    # Reported when parsing the blueprint.
+                    pass
+                cached_blueprint = (self.cache.load(cache_key)
+                                    if cache_key is not None else None)
+            if cached_blueprint is not None:
+                return cached_blueprint
 
         try:
-            blueprint: dict = self.file_io.parse_yml_file(blueprint_path)
+            with self.stage(Stage.PARSE):
+                blueprint = self.file_io.parse_yml_file(blueprint_path)
         except (FileNotFoundError, ScannerError) as e:
             print(str(e))
-            return
+            return None
 
         # Pass the blueprint schema to the Cerberus validator.
         try:
-            blueprint_schema: dict = Schema.get_blueprint_schema()
+            with self.stage(Stage.SCHEMA_LOAD):
+                blueprint_schema: dict = Schema.get_blueprint_schema()
         except (FileNotFoundError, ScannerError) as e:
             print(str(e))
-            return
+            return None
 
         # Validate the blueprint schema.
         try:
-            schema_is_valid: bool = (self.validator
-                                     .validate(blueprint, blueprint_schema))
+            with self.stage(Stage.VALIDATE):
+                schema_is_valid: bool = (self.validator
+                                         .validate(blueprint, blueprint_schema))  # noqa
         except RuntimeError as e:
             print(e)
-            return
+            return None
         if not schema_is_valid:
             raise InvalidSchemaError(self.validator.errors)
+        for warning in self.validator.warnings:
+            print(f"Warning: {warning}", file=stderr)
+
+        with self.stage(Stage.SET_DEFAULTS):
+            blueprint = self.schema.set_missing_optional_attributes(blueprint)
+
+        if self.cache is not None and cache_key is not None:
+            with self.stage(Stage.CACHE_STORE):
+                self.cache.store(cache_key, blueprint)
 
-        blueprint = self.schema.set_missing_optional_attributes(blueprint)
+        return blueprint
+
+    def run(self, blueprint_path):
+        """
+        Read and parse the given blueprint and validate it. If valid, output
+        a Nacar script written in the Translator's TargetLanguage.
+        :param blueprint_path: Path to the YAML blueprint to process.
+        :return:
+        """
+        blueprint = self.get_valid_blueprint(blueprint_path)
+        if blueprint is None:
+            return
 
         # Translate the in-memory blueprint to a Nacar app (as a string).
         try:
-            translator: ITranslator = self.translator_class(blueprint)
-            translation: str = translator.translate_blueprint()
+            with self.stage(Stage.TRANSLATE):
+                translator: ITranslator = self.translator_class(
+                    blueprint, self.translator_options)
+                translation: str = translator.translate_blueprint()
+                screen_chunks: Dict[str, str] = translator.translate_screen_chunks()  # noqa
+                runtime_files: Dict[str, str] = translator.translate_runtime()  # noqa
         except (TypeError, NotImplementedError) as e:
             print(e)
             return
 
+        # Measure the app before writing it, so an app over budget is not.
+        if self.report or self.max_size is not None:
+            with self.stage(Stage.MEASURE):
+                self.app_report = AppReport(translation,
+                                            translator.translate_sections(),
+                                            translator.translate_screens(),
+                                            screen_chunks)
+            self.app_report.check_size_budget(self.max_size)
+
         # Write the Nacar app to a file that is a sibling of the blueprint.
         outdir, file_name = os_path.split(os_path.abspath(blueprint_path))
         blueprint_file_name, extension = os_path.splitext(file_name)
+        app_file_name = blueprint_file_name + APP_FILE_EXTENSIONS.get(
+            translator.get_target_language(), '')
+        app_path = os_path.join(outdir, app_file_name)
         try:
-            FileIO.write_nacar_app_to_file(
-                translation,
-                os_path.join(outdir, blueprint_file_name),
-                translator.get_target_language())
+            with self.stage(Stage.WRITE):
+                FileIO.write_nacar_app_to_file(
+                    translation,
+                    app_path,
+                    translator.get_target_language())
+                # Screens loaded on demand are written to a sibling directory.
+                if screen_chunks:
+                    FileIO.write_nacar_app_screens_to_dir(
+                        screen_chunks,
+                        f"{app_path}.screens",
+                        translator.get_target_language())
+                # Apps in the same directory share the runtime they source.
+                written_runtime_files: List[str] = []
+                if runtime_files:
+                    written_runtime_files = FileIO.write_nacar_runtime_to_dir(
+                        runtime_files,
+                        outdir,
+                        translator.get_target_language())
         except (NotImplementedError, FileNotFoundError) as e:
             print(e)
             return
 
-        # Print out a message to signal successful execution.
-        success_message = f"\nConverted blueprint '{file_name}' to "
+        with self.stage(Stage.REPORT):
+            # Print out a message to signal successful execution.
+            success_message = f"\nConverted blueprint '{file_name}' to "
 
-        if translator.get_target_language() == TargetLanguage.BASH:
-            success_message += f"bash Nacar app '{blueprint_file_name}'."
-            with open(os_path.join(outdir, blueprint_file_name)) as app:
-                success_message += f" Wrote {len(app.readlines()) + 1} lines."
+            if translator.get_target_language() in (TargetLanguage.BASH,
+                                                    TargetLanguage.POSIX_SH):
+                shell = ('bash' if translator.get_target_language()
+                         == TargetLanguage.BASH else 'POSIX sh')
+                success_message += (f"{shell} Nacar app "
+                                    f"'{blueprint_file_name}'.")
+                success_message += (f" Wrote {count_lines(translation) + 1}"
+                                    f" lines")
+                if screen_chunks:
+                    success_message += (f" and {len(screen_chunks)} screen"
+                                        f" files to"
+                                        f" '{blueprint_file_name}.screens'")
+                success_message += "."
+                for runtime_file_name in runtime_files:
+                    if runtime_file_name in written_runtime_files:
+                        success_message += (f" Wrote the runtime it sources"
+                                            f" to '{runtime_file_name}'.")
+                    else:
+                        success_message += (f" The runtime it sources in"
+                                            f" '{runtime_file_name}' was"
+                                            f" already up to date.")
+            elif translator.get_target_language() == TargetLanguage.PYTHON:
+                success_message += f"Python Nacar app '{app_file_name}'."
+                success_message += (f" Wrote {count_lines(translation)}"
+                                    f" lines.")
 
-        print(f"{success_message}\n")
+            print(f"{success_message}\n")
 
 
 def main():
@@ -129,18 +359,67 @@ def main():
         return
 
     if blueprint_path is not None:
+        options = Nacar.get_options_from_arguments(argv)
         file_io = FileIO()
         schema = Schema()
-        validator = NacarValidator()
-        # The only translator for the time being is the Bash Translator.
-        translator_class: Type[ITranslator] = BlueprintToBash
-        nacar = Nacar(file_io, schema, validator, translator_class)
+        # The validator looks subschemas up in the schema's registry.
+        validator = NacarValidator(schema_registry=schema.schema_registry)
+        translator_class: Type[ITranslator] = TRANSLATORS[options.target]
+        translator_options = {'minify': options.minify,
+                              'shard': options.shard,
+                              'table': options.table,
+                              'runtime': options.runtime}
+        timings = StageTimings()
+        memory = StageMemory(options.max_memory)
+        hooks: List[StageHooks] = []
+        if options.timings:
+            hooks.append(timings)
+        # Last, so that other hooks are told a stage ended before it aborts.
+        if options.memory or options.max_memory is not None:
+            hooks.append(memory)
+        cache = (BlueprintCache(options.cache)
+                 if options.cache is not None else None)
+        nacar = Nacar(file_io, schema, validator, translator_class,
+                      translator_options, hooks, cache=cache,
+                      report=options.report is not None,
+                      max_size=options.max_size)
 
+        profile = cProfile.Profile() if options.profile else None
+        budget_exceeded = False
         try:
-            nacar.run(blueprint_path)
+            if profile is not None:
+                profile.runcall(nacar.run, blueprint_path)
+            else:
+                nacar.run(blueprint_path)
         except InvalidSchemaError as err:
             print(f"'{os_path.abspath(blueprint_path)}' is not a valid blueprint.")  # noqa
             print(f"{err.message}")
+        except (MemoryBudgetExceededError, SizeBudgetExceededError) as err:
+            print(err)
+            budget_exceeded = True
+        finally:
+            memory.stop()
+            if profile is not None:
+                profile.dump_stats(options.profile)
+            if options.timings == 'json':
+                print(timings.to_json(), file=stderr)
+            elif options.timings == 'table':
+                print(timings.to_table(), file=stderr)
+            if options.memory == 'json':
+                print(memory.to_json(), file=stderr)
+            elif options.memory == 'table':
+                print(memory.to_table(), file=stderr)
+            if nacar.app_report is not None:
+                if options.report == 'json':
+                    print(nacar.app_report.to_json(options.top_screens),
+                          file=stderr)
+                elif options.report == 'table':
+                    print(nacar.app_report.to_table(options.top_screens),
+                          file=stderr)
+
+        # Exit with an error so that whatever ran Nacar knows it aborted.
+        if budget_exceeded:
+            raise SystemExit(1)
 
 
 if __name__ == '__main__':
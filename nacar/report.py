@@ -0,0 +1,126 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Compile report
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Account for the bytes and lines of a Nacar app by section, eg. its utilities
+or its screen flow, and list its largest screens, as printed by the `--report`
+option. `AppReport.check_size_budget()` fails a build whose app is larger
+than the budget set with `--max-size`.
+"""
+
+from json import dumps as json_dumps
+from typing import Dict, List, Optional
+
+
+class SizeBudgetExceededError(Exception):
+    """
+    Raised when a Nacar app is larger than the size budget allows.
+    """
+
+    def __init__(self, size: int, budget: int):
+        self.size = size
+        self.budget = budget
+        super().__init__(f"The Nacar app is {size} bytes, over the size "
+                         f"budget of {budget} bytes.")
+
+
+def count_bytes(code: str) -> int:
+    return len(code.encode('utf-8'))
+
+
+def count_lines(code: str) -> int:
+    """
+    Count lines the way `readlines()` would, so that a last line with no
+    newline at its end is counted.
+    """
+    return code.count('\n') + (1 if code and not code.endswith('\n') else 0)
+
+
+class AppReport:
+    """
+    :param translation: The Nacar app.
+    :param sections: The code of each section of the app, keyed by section
+        name. Code not in any section is accounted for as 'other'.
+    :param screens: The code defining each screen, keyed by screen name.
+    :param screen_chunks: The screen files of sharded apps, keyed by the
+        name of their file. They count towards the size of the app.
+    """
+
+    def __init__(self,
+                 translation: str,
+                 sections: Dict[str, str],
+                 screens: Optional[Dict[str, str]] = None,
+                 screen_chunks: Optional[Dict[str, str]] = None) -> None:
+        self.sections: Dict[str, Dict[str, int]] = {
+            name: {'bytes': count_bytes(code), 'lines': count_lines(code)}
+            for name, code in sections.items()
+        }
+        other_bytes = (count_bytes(translation)
+                       - sum(s['bytes'] for s in self.sections.values()))
+        if other_bytes:
+            self.sections['other'] = {
+                'bytes': other_bytes,
+                'lines': (count_lines(translation)
+                          - sum(s['lines'] for s in self.sections.values()))
+            }
+        if screen_chunks:
+            chunks = ''.join(screen_chunks.values())
+            self.sections['screen_files'] = {'bytes': count_bytes(chunks),
+                                             'lines': count_lines(chunks)}
+        self.screens: Dict[str, Dict[str, int]] = {
+            name: {'bytes': count_bytes(code), 'lines': count_lines(code)}
+            for name, code in (screens or {}).items()
+        }
+
+    def get_size(self) -> int:
+        """
+        :return: The bytes taken by the app, and its screen files if sharded.
+        """
+        return sum(section['bytes'] for section in self.sections.values())
+
+    def get_largest_screens(self, top: int) -> Dict[str, Dict[str, int]]:
+        largest = sorted(self.screens.items(),
+                         key=lambda screen: screen[1]['bytes'], reverse=True)
+        return dict(largest[:top])
+
+    def check_size_budget(self, budget: Optional[int]) -> None:
+        """
+        :raise SizeBudgetExceededError: If the app is larger than the budget.
+        """
+        if budget is not None and self.get_size() > budget:
+            raise SizeBudgetExceededError(self.get_size(), budget)
+
+    def to_json(self, top: int = 5) -> str:
+        return json_dumps({
+            'sections': self.sections,
+            'total': {
+                'bytes': self.get_size(),
+                'lines': sum(s['lines'] for s in self.sections.values())
+            },
+            'largest_screens': self.get_largest_screens(top)
+        })
+
+    def to_table(self, top: int = 5) -> str:
+        size = self.get_size()
+        lines: List[str] = [f"{'section':<26} {'bytes':>8} {'lines':>6} "
+                            f"{'%':>6}"]
+        for name, section in self.sections.items():
+            share = section['bytes'] / size * 100 if size else 0.0
+            lines.append(f"{name:<26} {section['bytes']:>8} "
+                         f"{section['lines']:>6} {share:>6.1f}")
+        lines.append(f"{'total':<26} {size:>8} "
+                     f"{sum(s['lines'] for s in self.sections.values()):>6} "
+                     f"{100.0 if size else 0.0:>6.1f}")
+
+        largest_screens = self.get_largest_screens(top)
+        if largest_screens:
+            lines.append('')
+            lines.append(f"{'largest screens':<26} {'bytes':>8} "
+                         f"{'lines':>6}")
+            for name, screen in largest_screens.items():
+                lines.append(f"{name:<26} {screen['bytes']:>8} "
+                             f"{screen['lines']:>6}")
+        return '\n'.join(lines)
@@ -5,20 +5,21 @@ Copyright 2022 Alberto Morón Hernández
 
 Schema utilities
 ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
-Create modular subschemas to add to the Cerberus schema registry,
+Create modular subschemas to add to a Cerberus schema registry,
 set missing optional attributes on a blueprint, get properties
 from the parsed blueprint.
 """
 
-from typing import List, Dict
+from typing import List, Dict, Tuple
 
-from cerberus import schema_registry
+from cerberus.schema import SchemaRegistry
 
 
 class Schema:
 
     def __init__(self):
-        self.add_blueprint_subschemas_to_registry()
+        # Hand it to the validators checking blueprints against this schema.
+        self.schema_registry = self.get_schema_registry()
 
     @staticmethod
     def get_blueprint_subschemas() -> dict:
@@ -33,7 +34,9 @@ class Schema:
                     'schema': {'type': 'string', 'required': False, 'minlength': 1, 'maxlength': 64}  # noqa
                 },
                 'width': {'type': 'integer', 'required': False, 'min': 40, 'max': 180},               # noqa
-                'show_made_with_on_exit': {'type': 'boolean', 'required': False}                      # noqa
+                'show_made_with_on_exit': {'type': 'boolean', 'required': False},                     # noqa
+                'differential_redraw': {'type': 'boolean', 'required': False},                        # noqa
+                'page_size': {'type': 'integer', 'required': False, 'min': 0, 'max': 10}              # noqa
             },
 
             'screen': {
@@ -44,29 +47,38 @@ class Schema:
                     'maxlength': 999,
                     'schema': {
                         'type': 'dict',
-                        'anyof_schema': ['screen__option--link', 'screen__option--action']            # noqa
+                        'schema': 'screen__option'
                     }
                 }
             },
-            'screen__option--link': {
+            # Options either link to a screen or run an action. This is not an
+            # `anyof_schema` rule as Cerberus checks those against every
+            # option on the screen, for each option.
+            'screen__option': {
                 'name': {'type': 'string', 'required': True, 'minlength': 1, 'maxlength': 64},        # noqa
-                'link': {'type': 'string', 'required': True, 'minlength': 1, 'maxlength': 64}         # noqa
-            },
-            'screen__option--action': {
-                'name': {'type': 'string', 'required': True, 'minlength': 1, 'maxlength': 64},        # noqa
-                'action': {'type': 'string', 'required': True, 'minlength': 1, 'maxlength': 256}      # noqa
+                # Defaults to the first character of the name.
+                'key': {'type': 'string', 'required': False, 'regex': '[A-Za-z0-9]{1,3}'},            # noqa
+                'link': {'type': 'string', 'required': True, 'excludes': 'action', 'minlength': 1, 'maxlength': 64},     # noqa
+                'action': {'type': 'string', 'required': True, 'excludes': 'link', 'minlength': 1, 'maxlength': 256},    # noqa
+                # When to run the action. Defaults to 'on_exit'.
+                'run': {'type': 'string', 'required': False, 'dependencies': 'action', 'allowed': ['on_exit', 'in_place', 'in_background']}  # noqa
             }
         }
 
         return modular_schemas
 
     @staticmethod
-    def add_blueprint_subschemas_to_registry():
+    def get_schema_registry() -> SchemaRegistry:
         """
-        Add modular blueprint schemas to Cerberus' default schema registry.
+        Return a new registry holding the modular blueprint schemas. Cerberus'
+        default registry is global to the process, so it is never changed:
+        validators look subschemas up in a registry of their own, and may
+        validate blueprints in several threads at once.
         """
+        registry = SchemaRegistry()
         for name, schema in Schema.get_blueprint_subschemas().items():
-            schema_registry.add(name, schema)
+            registry.add(name, schema)
+        return registry
 
     @staticmethod
     def get_blueprint_schema() -> dict:
@@ -111,6 +123,10 @@ class Schema:
             blueprint['meta']['width'] = 80
         if not exists(blueprint, ['meta', 'show_made_with_on_exit']):
             blueprint['meta']['show_made_with_on_exit'] = True
+        if not exists(blueprint, ['meta', 'differential_redraw']):
+            blueprint['meta']['differential_redraw'] = False
+        if not exists(blueprint, ['meta', 'page_size']):
+            blueprint['meta']['page_size'] = 0
 
         return blueprint
 
@@ -143,12 +159,7 @@ class Schema:
         @param blueprint {dict}: the blueprint under consideration.
         @return {int}: the number of options in the screen with most options.
         """
-        number_of_options_per_screen: List[int] = []
-        for screen in Schema.get_screen_names(blueprint):
-            options_count = len(Schema.get_options_for_screen(blueprint, screen))  # noqa
-            number_of_options_per_screen += [options_count]
-
-        return max(number_of_options_per_screen)
+        return max(len(screen['options']) for screen in blueprint['screens'])
 
     @staticmethod
     def get_options_for_screen(blueprint: dict, screen_name: str) -> list:
@@ -157,6 +168,98 @@ class Schema:
                 return screen['options']
         return []
 
+    @staticmethod
+    def get_options_by_screen(blueprint: dict) -> Dict[str, list]:
+        """
+        Return the options of every screen, keyed by screen name. Prefer this
+        to calling `get_options_for_screen()` for each screen, which searches
+        the screens every time.
+        """
+        return {screen['name']: screen['options']
+                for screen in blueprint['screens']}
+
+    @staticmethod
+    def get_paged_screens(blueprint: dict) -> List[str]:
+        """
+        Return the screens with more options than fit the page, which show
+        their options a page at a time. Paging is off if the page size is 0.
+        """
+        page_size = blueprint['meta']['page_size']
+        if page_size == 0:
+            return []
+
+        return [s['name'] for s in blueprint['screens']
+                if len(s['options']) > page_size]
+
+    @staticmethod
+    def get_screen_heights(blueprint: dict) -> Dict[str, int]:
+        """
+        Return the number of lines each screen shows between its breadcrumbs
+        and its bottom padding. Paged screens show a page of options followed
+        by a pager line.
+        """
+        page_size = blueprint['meta']['page_size']
+        paged_screens = set(Schema.get_paged_screens(blueprint))
+        return {s['name']: page_size + 1 if s['name'] in paged_screens
+                else len(s['options'])
+                for s in blueprint['screens']}
+
+    @staticmethod
+    def get_bottom_paddings(blueprint: dict) -> Dict[str, int]:
+        """
+        Return the blank lines each screen shows below its options, which pad
+        every screen to the height of the tallest one.
+        """
+        screen_heights = Schema.get_screen_heights(blueprint)
+        max_height = max(screen_heights.values())
+        return {screen: 1 + (max_height - height)
+                for screen, height in screen_heights.items()}
+
+    @staticmethod
+    def get_option_key(option: dict) -> str:
+        """
+        Return the key that selects an option, in lower case: its `key` if
+        set, or else the first character of its name. Keys are not case
+        sensitive.
+        """
+        return option.get('key', option['name'][0]).lower()
+
+    @staticmethod
+    def get_option_label(option: dict) -> Tuple[str, str]:
+        """
+        Split the label shown for an option into the key, shown in brackets,
+        and the text that follows it. Keys that start the option's name are
+        shown in its place, eg. '[D]evelop', and others before it, eg.
+        '[2] Deploy'.
+        """
+        key = Schema.get_option_key(option)
+        name = option['name']
+        if name.lower().startswith(key):
+            return key.upper(), name[len(key):]
+        return key.upper(), f" {name}"
+
+    @staticmethod
+    def get_action_run(option: dict) -> str:
+        """
+        Return when an option's action runs: 'on_exit', once the app exits,
+        'in_place', returning to the screen once it finishes, or
+        'in_background', as a job running while the app is used.
+        """
+        return option.get('run', 'on_exit')
+
+    @staticmethod
+    def get_key_prefixes(options: list) -> List[str]:
+        """
+        Return the keys typed on the way to typing the multi-character keys
+        of the given options, eg. 'd' for the key 'de'.
+        """
+        prefixes: Dict[str, None] = {}
+        for option in options:
+            key = Schema.get_option_key(option)
+            for end in range(1, len(key)):
+                prefixes[key[:end]] = None
+        return list(prefixes)
+
 
 class InvalidSchemaError(Exception):
     """
@@ -0,0 +1,198 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Stages and stage hooks
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+The stages `Nacar.run()` goes through to turn a blueprint into a Nacar app.
+Code embedding Nacar may pass hooks to be told when each stage starts and
+ends. `StageTimings` is a hook that records the time taken by each stage, as
+printed by the `--timings` option, and `StageMemory` records the memory each
+stage allocates, as printed by the `--memory` option.
+"""
+
+import re
+import tracemalloc
+from enum import Enum
+from json import dumps as json_dumps
+from time import perf_counter, process_time
+from typing import Dict, List, Optional, Tuple
+
+
+class Stage(Enum):
+    # Cache stages only run when a blueprint cache is used. On a cache hit,
+    # the stages up to and including setting defaults are skipped.
+    CACHE_LOAD = 'cache_load'
+    PARSE = 'parse'
+    SCHEMA_LOAD = 'schema_load'
+    VALIDATE = 'validate'
+    SET_DEFAULTS = 'set_defaults'
+    CACHE_STORE = 'cache_store'
+    TRANSLATE = 'translate'
+    # Only runs when the app's size is reported or checked against a budget.
+    MEASURE = 'measure'
+    WRITE = 'write'
+    REPORT = 'report'
+
+
+class StageHooks:
+    """
+    Subclass and override the methods of interest. A stage that fails still
+    ends, so every `on_stage_start()` is followed by an `on_stage_end()`.
+    """
+
+    def on_stage_start(self, stage: Stage) -> None:
+        pass
+
+    def on_stage_end(self, stage: Stage) -> None:
+        pass
+
+
+class StageTimings(StageHooks):
+    """
+    Record the wall-clock and CPU time taken by every stage that ran.
+    """
+
+    def __init__(self) -> None:
+        self.started: Dict[Stage, Tuple[float, float]] = {}
+        self.timings: Dict[Stage, Dict[str, float]] = {}
+
+    def on_stage_start(self, stage: Stage) -> None:
+        self.started[stage] = (perf_counter(), process_time())
+
+    def on_stage_end(self, stage: Stage) -> None:
+        wall_start, cpu_start = self.started.pop(stage)
+        self.timings[stage] = {
+            'wall_ms': round((perf_counter() - wall_start) * 1000, 3),
+            'cpu_ms': round((process_time() - cpu_start) * 1000, 3)
+        }
+
+    def to_json(self) -> str:
+        timings = {stage.value: timing
+                   for stage, timing in self.timings.items()}
+        return json_dumps({
+            'stages': timings,
+            'total': {
+                'wall_ms': round(sum(t['wall_ms']
+                                     for t in timings.values()), 3),
+                'cpu_ms': round(sum(t['cpu_ms']
+                                    for t in timings.values()), 3)
+            }
+        })
+
+    def to_table(self) -> str:
+        lines: List[str] = [f"{'stage':<14} {'wall ms':>10} {'cpu ms':>10}"]
+        for stage, timing in self.timings.items():
+            lines.append(f"{stage.value:<14} {timing['wall_ms']:>10.1f} "
+                         f"{timing['cpu_ms']:>10.1f}")
+        lines.append(f"{'total':<14} "
+                     f"{sum(t['wall_ms'] for t in self.timings.values()):>10.1f} "  # noqa
+                     f"{sum(t['cpu_ms'] for t in self.timings.values()):>10.1f}")  # noqa
+        return '\n'.join(lines)
+
+
+class MemoryBudgetExceededError(Exception):
+    """
+    Raised when a stage allocates more memory than the budget allows.
+    """
+
+    def __init__(self, stage: Stage, peak: int, budget: int):
+        self.stage = stage
+        self.peak = peak
+        self.budget = budget
+        super().__init__(f"The '{stage.value}' stage allocated "
+                         f"{format_memory_size(peak)}, over the memory budget "
+                         f"of {format_memory_size(budget)}.")
+
+
+def format_memory_size(size: int) -> str:
+    """
+    :param size: A number of bytes.
+    :return: The size in bytes (B), KiB or MiB, whichever is the largest unit
+        the size has at least one of, eg. '512 B' or '1.5 MiB'.
+    """
+    if size < 2 ** 10:
+        return f"{size} B"
+    if size < 2 ** 20:
+        return f"{size / 2 ** 10:.1f} KiB"
+    return f"{size / 2 ** 20:.1f} MiB"
+
+
+def parse_memory_size(size: str) -> int:
+    """
+    :param size: A number of bytes, optionally followed by K, M or G for
+        kibibytes, mebibytes or gibibytes, eg. '512M'.
+    :return: The size in bytes.
+    """
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([KMG]?)i?B?', size.strip(),
+                         re.IGNORECASE)
+    if match is None:
+        raise ValueError(f"'{size}' is not a memory size such as '512M'.")
+    number, unit = match.groups()
+    exponent = {'': 0, 'K': 1, 'M': 2, 'G': 3}[unit.upper()]
+    return int(float(number) * 1024 ** exponent)
+
+
+class StageMemory(StageHooks):
+    """
+    Record, with tracemalloc, the memory allocated by Python at the end of
+    every stage that ran and its peak during the stage. Tracing starts with
+    the first stage and makes stages run slower.
+    :param budget: If given, the bytes a stage may peak at before
+        `MemoryBudgetExceededError` is raised as it ends. A stage is only
+        checked once it ends, so it should be given some headroom.
+    """
+
+    def __init__(self, budget: Optional[int] = None) -> None:
+        self.budget = budget
+        self.memory: Dict[Stage, Dict[str, int]] = {}
+        self.started_tracing = False
+        # The memory allocated, and its peak, when the running stage started.
+        self.start_memory: Tuple[int, int] = (0, 0)
+
+    def on_stage_start(self, stage: Stage) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        # `reset_peak()` was added in Python 3.9.
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self.start_memory = tracemalloc.get_traced_memory()
+
+    def on_stage_end(self, stage: Stage) -> None:
+        current, peak = tracemalloc.get_traced_memory()
+        start_current, start_peak = self.start_memory
+        if not hasattr(tracemalloc, 'reset_peak') and peak <= start_peak:
+            # The peak was reached before the stage started, so the most the
+            # stage is known to have allocated is at its start or end.
+            peak = max(start_current, current)
+        self.memory[stage] = {'current_bytes': current, 'peak_bytes': peak}
+        if self.budget is not None and peak > self.budget:
+            raise MemoryBudgetExceededError(stage, peak, self.budget)
+
+    def stop(self) -> None:
+        """
+        Stop tracing memory allocations, if this hook started doing so.
+        """
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def to_json(self) -> str:
+        return json_dumps({
+            'stages': {stage.value: memory
+                       for stage, memory in self.memory.items()},
+            'peak_bytes': max((m['peak_bytes']
+                               for m in self.memory.values()), default=0),
+            'budget_bytes': self.budget
+        })
+
+    def to_table(self) -> str:
+        lines: List[str] = [f"{'stage':<14} {'current MiB':>12} "
+                            f"{'peak MiB':>10}"]
+        for stage, memory in self.memory.items():
+            lines.append(f"{stage.value:<14} "
+                         f"{memory['current_bytes'] / 2 ** 20:>12.1f} "
+                         f"{memory['peak_bytes'] / 2 ** 20:>10.1f}")
+        return '\n'.join(lines)
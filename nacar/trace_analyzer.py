@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Trace analyzer
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Summarise the trace files written by bash Nacar apps run with NACAR_TRACE
+set to a file path. Report how long each screen takes to render, from being
+shown to its frame being drawn, and to respond, from a keystroke being read
+to the next frame being drawn.
+Run with `python3 -m nacar.trace_analyzer <trace file>`.
+"""
+
+from sys import argv
+from statistics import mean, median
+from typing import Dict, List, NamedTuple, Optional
+
+
+class TraceEvent(NamedTuple):
+    # Seconds since the epoch.
+    timestamp: float
+    # One of N(avigate to), S(how screen), D(raw frame), K(eystroke), A(ction).
+    code: str
+    # The screen, keystroke or action the event applies to.
+    subject: str
+
+
+class TraceAnalyzer:
+
+    @staticmethod
+    def parse_trace_line(line: str) -> Optional[TraceEvent]:
+        """
+        :param line: A line of a trace file eg. '1656675000.123456 S home'.
+        :return: The event logged by the line, or None if it is malformed.
+        """
+        try:
+            timestamp, code, subject = line.rstrip('\n').split(' ', 2)
+            # EPOCHREALTIME uses the locale's decimal separator.
+            return TraceEvent(float(timestamp.replace(',', '.')),
+                              code, subject)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def parse_trace_file(file_path: str) -> List[TraceEvent]:
+        with open(file_path) as trace:
+            events = [TraceAnalyzer.parse_trace_line(line) for line in trace]
+        return [event for event in events if event is not None]
+
+    @staticmethod
+    def get_screen_timings(events: List[TraceEvent]) -> Dict[str, Dict[str, List[float]]]:  # noqa
+        """
+        Pair each frame drawn with the screen being shown and the keystroke
+        that led to it.
+        :return: For each screen, the seconds each of its renders took and the
+            seconds from each keystroke to the screen's next frame.
+        """
+        timings: Dict[str, Dict[str, List[float]]] = {}
+        shown: Optional[TraceEvent] = None
+        keystroke: Optional[TraceEvent] = None
+        for event in events:
+            if event.code == 'S':
+                shown = event
+            elif event.code == 'K':
+                keystroke = event
+            elif event.code == 'D':
+                screen_timings = timings.setdefault(
+                    event.subject, {'render': [], 'response': []})
+                if shown is not None and shown.subject == event.subject:
+                    screen_timings['render'].append(
+                        event.timestamp - shown.timestamp)
+                if keystroke is not None:
+                    screen_timings['response'].append(
+                        event.timestamp - keystroke.timestamp)
+                shown, keystroke = None, None
+
+        return timings
+
+    @staticmethod
+    def summarize_screen_timings(events: List[TraceEvent]) -> List[str]:
+        """
+        :return: The lines of a table of render and response times in
+            milliseconds per screen, slowest screen first.
+        """
+        timings = TraceAnalyzer.get_screen_timings(events)
+        lines = [f"{'screen':<20} {'renders':>8} {'mean ms':>8} "
+                 f"{'median ms':>10} {'max ms':>8} {'response ms':>12}"]
+        by_mean_render = sorted(
+            timings.items(),
+            key=lambda item: -mean(item[1]['render'] or [0]))
+        for screen, screen_timings in by_mean_render:
+            render_ms = [t * 1000 for t in screen_timings['render']] or [0]
+            response_ms = [t * 1000 for t in screen_timings['response']]
+            response = f"{median(response_ms):.2f}" if response_ms else '-'
+            lines.append(f"{screen:<20} {len(screen_timings['render']):>8} "
+                         f"{mean(render_ms):>8.2f} {median(render_ms):>10.2f} "
+                         f"{max(render_ms):>8.2f} {response:>12}")
+        return lines
+
+
+def main():
+    try:
+        trace_path = argv[1]
+    except IndexError:
+        print("Please pass the path to a Nacar trace file as the first argument.")  # noqa
+        return
+
+    try:
+        events = TraceAnalyzer.parse_trace_file(trace_path)
+    except FileNotFoundError:
+        print(f"The trace file '{trace_path}' does not exist.")
+        return
+
+    print('\n'.join(TraceAnalyzer.summarize_screen_timings(events)))
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,7 @@ Find out more about translators by reading `/docs/Translators.md`.
 
 from os import path as os_path
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional
 
 from jinja2 import Environment, FileSystemLoader
 
@@ -26,7 +26,7 @@ class ITranslator(ABC):
     set_template_data(data: dict) -> None
     screens: List[str]
     set_screens() -> None
-    __init__(blueprint: dict) -> None
+    __init__(blueprint: dict, options: dict) -> None
 
     <target_language> translator utilities
       └ get_target_language() -> TargetLanguage
@@ -55,28 +55,36 @@ class ITranslator(ABC):
       - not dependent on the blueprint.
 
     Translate blueprint to <target_language>
-      └ translate_blueprint() -> str
+      ├ translate_blueprint() -> str
+      ├ translate_screen_chunks() -> Dict[str, str]
+      ├ translate_runtime() -> Dict[str, str]
+      ├ translate_sections() -> Dict[str, str]
+      ├ translate_screens() -> Dict[str, str]
+      └ render_template_blocks(template_name: str) -> Dict[str, str]
     """
 
-    @property
-    @abstractmethod
-    def template_data(self) -> dict:
-        # A dictionary containing all data necessary to
-        # generate the application using templates.
-        raise NotImplementedError
+    # A dictionary containing all data necessary to
+    # generate the application using templates.
+    template_data: dict
 
     @abstractmethod
     def set_template_data(self, data: dict) -> None:
         raise NotImplementedError
 
-    @property
-    @abstractmethod
-    def screens(self) -> List[str]:
-        # A list of screen names as defined by the blueprint.
-        raise NotImplementedError
+    # A list of screen names as defined by the blueprint.
+    screens: List[str]
 
-    def __init__(self, blueprint: dict, translator_dir: str) -> None:
+    def __init__(self,
+                 blueprint: dict,
+                 translator_dir: str,
+                 options: Optional[dict]=None) -> None:
         self.blueprint = blueprint
+        # Output options supported by the translator eg. 'minify'.
+        self.options = options if options is not None else {}
+        # Set per instance so that translators running in several threads
+        # at once never share state.
+        self.template_data = {}
+        self.screens = []
         self.set_screens()
 
         templates_dir = os_path.join(translator_dir, 'templates')
@@ -142,3 +150,36 @@ class ITranslator(ABC):
     @abstractmethod
     def translate_blueprint(self) -> str:
         raise NotImplementedError
+
+    def translate_screen_chunks(self) -> Dict[str, str]:
+        # Translators whose apps load screens on demand override this to
+        # return the code for each screen, keyed by the name of its file.
+        return {}
+
+    def translate_runtime(self) -> Dict[str, str]:
+        # Translators whose apps source code shared by every app override
+        # this to return that code, keyed by the name of its file.
+        return {}
+
+    def translate_sections(self) -> Dict[str, str]:
+        # Translators whose base template divides the app into blocks
+        # override this to return the code of each section of the app last
+        # translated, keyed by section name.
+        return {}
+
+    def translate_screens(self) -> Dict[str, str]:
+        # Translators that render each screen's code on its own override
+        # this to return that code, keyed by screen name.
+        return {}
+
+    def render_template_blocks(self, template_name: str) -> Dict[str, str]:
+        """
+        Render each block of a template on its own with the template data.
+        :return: The code of every block that is not empty, keyed by block
+            name in the order the blocks appear in the template.
+        """
+        template = self.jinja_env.get_template(template_name)
+        context = template.new_context(self.template_data)
+        blocks = {name: ''.join(render_block(context))
+                  for name, render_block in template.blocks.items()}
+        return {name: code for name, code in blocks.items() if code}
@@ -14,3 +14,5 @@ from enum import Enum
 
 class TargetLanguage(Enum):
     BASH = 1
+    PYTHON = 2
+    POSIX_SH = 3
@@ -0,0 +1,176 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Bash template minifier
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Strip comments, section banners, indentation and blank lines from the bash
+templates, and shorten the internal identifiers they define. Templates are
+minified as they are loaded, before the blueprint is rendered into them, so
+the commands in a blueprint's actions are never modified.
+"""
+
+import re
+from typing import Callable, Dict, List, Tuple
+
+from jinja2 import Environment, FileSystemLoader
+
+
+# Functions and global variables defined by the templates, and the shorter
+# names they are given when minifying. The underscore prefix keeps them from
+# shadowing commands that may be called by actions.
+SHORT_IDENTIFIERS: Dict[str, str] = {
+    # Utilities.
+    'clear_screen': '_c',
+    'repeat': '_r',
+    'REPEATED': '_R',
+    'trace': '_tr',
+    'TRACE_FD': '_TF',
+    'prepare_terminal': '_pr',
+    'restore_terminal': '_rt',
+    'exit_on_interrupt': '_xi',
+    'TERMINAL_SETTINGS': '_TS',
+    'read_escape_sequence': '_re',
+    'ESCAPE_SEQUENCE': '_ES',
+    # Screen-building utilities.
+    'build_static_screen_lines': '_bs',
+    'add_frame_line': '_fl',
+    'print_blank_screen_line': '_pb',
+    'print_screen_top': '_pt',
+    'print_breadcrumbs': '_pc',
+    'push_breadcrumb': '_bp',
+    'pop_breadcrumb': '_bo',
+    'set_breadcrumbs_line': '_bl',
+    'print_screen_bottom': '_pf',
+    'FRAME': '_F',
+    'BLANK_SCREEN_LINE': '_BL',
+    'SCREEN_TOP_LINE': '_TL',
+    'SCREEN_BOTTOM_LINE': '_FL',
+    'BREADCRUMB_DELIMITER': '_BD',
+    'ELLIPSIS': '_E',
+    'BREADCRUMB_PREFIXES': '_BP',
+    'BREADCRUMB_PREFIX_WIDTHS': '_BW',
+    'BREADCRUMB_PLAIN_PREFIXES': '_BT',
+    'BREADCRUMBS_LINE': '_BC',
+    'SCREEN_WIDTH': '_W',
+    'TITLE': '_T',
+    'FIRST_OPTION_LINE': '_FO',
+    'OPTION_LINE_START': '_OST',
+    'HIGHLIGHT_MARK': '_HK',
+    'mark_highlighted_option': '_mk',
+    # Screen flow.
+    'navigate_to': '_n',
+    'navigate_back': '_nb',
+    'follow_deep_link': '_fd',
+    'resolve_deep_link': '_rd',
+    'DEEP_LINK': '_DK',
+    'DEEP_LINKS': '_DL',
+    'DEEP_LINK_ACTIONS': '_DA',
+    'show_active_screen': '_sa',
+    'check_keystroke': '_k',
+    'turn_page': '_tp',
+    'select_paged_option': '_so',
+    'select_option': '_sl',
+    'move_highlight': '_mv',
+    'invoke_action': '_iv',
+    'run_in_place': '_ri',
+    'start_job': '_sj',
+    'print_job_status': '_pj',
+    'BREADCRUMBS': '_B',
+    'ACTIVE_SCREEN': '_S',
+    'INVOKE_ON_EXIT': '_I',
+    'PAGE': '_P',
+    'PAGE_SIZE': '_PS',
+    'OPTIONS_COUNT': '_OC',
+    'HIGHLIGHT': '_HL',
+    'TYPED_KEYS': '_TK',
+    'ACTION_RUNS': '_AR',
+    'ACTION_NAMES': '_AN',
+    'JOBS': '_J',
+    'JOB_PIDS': '_JP',
+    'JOB_STATUSES': '_JS',
+    'JOBS_RUNNING': '_JR',
+    'load_screen': '_ls',
+    'SCREENS_DIR': '_SD',
+    'LOADED_SCREENS': '_LS',
+    'SHARED_SCREENS': '_SH',
+    # Screen table.
+    'handle_keystroke': '_hk',
+    'OPTION_NAMES': '_ON',
+    'OPTION_LABEL_KEYS': '_OLB',
+    'OPTION_LINKS': '_OLK',
+    'OPTION_ACTIONS': '_OAC',
+    'OPTION_KEYS': '_OKY',
+    'SCREEN_FIRST_OPTIONS': '_SF',
+    'SCREEN_OPTIONS_COUNTS': '_SC',
+    'MAX_SCREEN_HEIGHT': '_MH',
+    # Screen rendering.
+    'draw_frame': '_d',
+    'print_option_page': '_po',
+    'print_option_table': '_pot',
+    'print_option_table_page': '_pop',
+    'show_screen': '_ss',
+    'invoke_action_on_exit': '_ia',
+    'show_exit_screen': '_se',
+    'PREVIOUS_FRAME': '_PF',
+    'SPACES_8': '_S8',
+    'SPACES_32': '_S32',
+    # Main loop.
+    'run_main_loop': '_ml',
+}
+
+# Identifiers built from a screen's name by the templates or at runtime.
+SHORT_IDENTIFIER_PATTERNS: List[Tuple[str, str]] = [
+    (r'\bshow_(\$\{screen\}|\{\{ screen\.lower\(\) \}\})_screen\b',
+     r'_s_\1'),
+    (r'\bhandle_(\$\{1\}|\{\{ screen\.lower\(\) \}\})_keystroke\b', r'_h_\1'),
+    (r'\bresolve_(\$\{screen\}|\{\{ screen\.lower\(\) \}\})_deep_link\b',
+     r'_g_\1'),
+    (r'\baction_(\{\{ loop\.index \}\}|\$\{OPTION_ACTIONS)', r'_a\1'),
+    (r'_OPTION_LINES\b', r'_OL'),
+    (r'_OPTION_LINKS\b', r'_OK'),
+    (r'_OPTION_ACTIONS\b', r'_OA'),
+]
+
+# A comment after code, separated from it by at least two spaces.
+TRAILING_COMMENT_RE = re.compile(r'\s{2,}# .*$')
+# Indentation inside a raw block at the start of a line.
+RAW_BLOCK_INDENTATION_RE = re.compile(r'^(\{% raw %\})\s+')
+
+
+def minify_bash_template(source: str) -> str:
+    """
+    :param source: The source of a bash Jinja template.
+    :return: The template without bash comments, indentation or blank lines,
+        and with internal identifiers shortened.
+    """
+    for pattern, replacement in SHORT_IDENTIFIER_PATTERNS:
+        source = re.sub(pattern, replacement, source)
+    for name, short_name in SHORT_IDENTIFIERS.items():
+        source = re.sub(rf'\b{name}\b', short_name, source)
+
+    lines: List[str] = []
+    for line in source.split('\n'):
+        line = TRAILING_COMMENT_RE.sub('', line.strip())
+        line = RAW_BLOCK_INDENTATION_RE.sub(r'\1', line)
+        # Keep the shebang, which is the only line starting with '#!'.
+        if line == '' or (line.startswith('#') and not line.startswith('#!')):
+            continue
+        lines.append(line)
+
+    return '\n'.join(lines)
+
+
+class MinifyingLoader(FileSystemLoader):
+    """
+    Load bash templates from the filesystem, minifying them.
+    """
+
+    def get_source(
+        self,
+        environment: Environment,
+        template: str
+    ) -> Tuple[str, str, Callable[[], bool]]:
+        source, file_name, uptodate = super().get_source(environment, template)
+        return minify_bash_template(source), file_name, uptodate
@@ -9,14 +9,18 @@ Implements the ITranslator interface to turn blueprints into bash Nacar apps.
 Find out more about translators by reading `/docs/Translators.md`.
 """
 
+import json
+from os import path as os_path
 from os.path import dirname, abspath
-from typing import List
+from shlex import quote
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 from nacar.__version__ import __version__
 from nacar.schema import Schema
 from nacar.translate.itranslator import ITranslator
 from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_bash.minify import MinifyingLoader
 
 
 class BlueprintToBash(ITranslator):
@@ -24,8 +28,9 @@ class BlueprintToBash(ITranslator):
     template_data: dict
     set_template_data(data: dict) -> None
     screens: List[str]
+    screen_options: Dict[str, list]
     set_screens() -> None
-    __init__(blueprint: dict) -> None
+    __init__(blueprint: dict, options: dict) -> None
 
     Bash translator utilities
       ├ get_target_language() -> TargetLanguage
@@ -42,29 +47,69 @@ class BlueprintToBash(ITranslator):
     Screen-building utilities
       └ set_screen_building_utilities() -> None
 
+    Screen flow
+      ├ get_shared_screens() -> Dict[str, str]
+      ├ get_actions() -> dict
+      ├ get_deep_links() -> dict
+      └ set_screen_flow_template_variables() -> None
+
+    Screen table
+      ├ get_screen_table() -> dict
+      └ set_screen_table_template_variables() -> None
+
     Screen-rendering code
       └ set_screen_rendering_template_variables() -> None
 
     Nacar app's main loop
       └ set_main_loop_code_template_variables() -> None
 
+    Shared runtime
+      ├ get_runtime_version() -> str
+      ├ get_runtime_file_name() -> str
+      └ set_runtime_template_variables() -> None
+
     Translate blueprint to Bash
-      └ translate_blueprint() -> str
+      ├ set_all_template_variables() -> None
+      ├ translate_blueprint() -> str
+      ├ translate_screen_chunks() -> Dict[str, str]
+      ├ translate_runtime() -> Dict[str, str]
+      ├ translate_sections() -> Dict[str, str]
+      └ translate_screens() -> Dict[str, str]
     """
 
-    template_data: dict = {}
+    template_data: dict
 
     def set_template_data(self, data: dict) -> None:
         self.template_data = data
 
-    screens: List[str] = []
+    screens: List[str]
+    screen_options: Dict[str, list]
 
     def set_screens(self) -> None:
         self.screens = Schema.get_screen_names(self.blueprint)
+        self.screen_options = Schema.get_options_by_screen(self.blueprint)
 
-    def __init__(self, blueprint: dict) -> None:
+    def __init__(self, blueprint: dict, options: Optional[dict]=None) -> None:
+        """
+        :param blueprint: A validated blueprint with optional attributes set.
+        :param options: Output options. Set 'minify' to strip comments and
+            whitespace from the app and shorten its internal identifiers.
+            Set 'shard' to define each screen in a file of its own, which the
+            app sources the first time the screen is shown.
+            Set 'table' to describe screens with arrays of data read by a
+            single set of functions, rather than with functions per screen.
+            Set 'runtime' to source the utilities, screen-building utilities
+            and main loop from a runtime file shared by every app in the same
+            directory, rather than defining them in the app.
+        """
         translator_dir = dirname(abspath(__file__))
-        super().__init__(blueprint, translator_dir)
+        super().__init__(blueprint, translator_dir, options)
+        # Write strings from the blueprint into the app as shell words.
+        self.jinja_env.filters['quote'] = quote
+
+        if self.options.get('minify'):
+            templates_dir = os_path.join(translator_dir, 'templates')
+            self.jinja_env.loader = MinifyingLoader(templates_dir)
 
 #   Bash translator utilities ─────────────────────────────────────────────────
 
@@ -94,7 +139,8 @@ class BlueprintToBash(ITranslator):
 
     def set_app_config_template_variables(self) -> None:
         app_config_data = {
-            'screen_width': self.blueprint['meta']['width']
+            'screen_width': self.blueprint['meta']['width'],
+            'page_size': self.blueprint['meta']['page_size']
         }
         self.set_template_data({
             **self.template_data,
@@ -128,33 +174,255 @@ class BlueprintToBash(ITranslator):
 
 #   Screen flow ───────────────────────────────────────────────────────────────
 
-    def set_screen_flow_template_variables(self) -> None:
-        screen_options = {}
+    def get_shared_screens(self) -> Dict[str, str]:
+        """
+        Map each screen whose options are the same as those of an earlier
+        screen to that screen, so that it is shown and its keystrokes handled
+        by the earlier screen's functions rather than by copies of them.
+        """
+        first_screens: Dict[str, str] = {}
+        shared_screens: Dict[str, str] = {}
         for screen in self.screens:
-            options = Schema.get_options_for_screen(self.blueprint, screen)
-            screen_options[screen] = options
+            options = json.dumps(self.screen_options[screen], sort_keys=True)
+            if options in first_screens:
+                shared_screens[screen] = first_screens[options]
+            else:
+                first_screens[options] = screen
+        return shared_screens
+
+    def get_actions(self) -> dict:
+        """
+        Name the function running each option's action. Options with the same
+        action, run the same way, share the function defined for the first of
+        them, so that each action is written to the app once.
+        :return: The function of each option by screen and position, or None
+            for links; the actions defined with each screen's functions; and
+            the actions defined by the app itself. Sharded apps define the
+            actions of more than one screen themselves, as the screen defining
+            them may not have been loaded when another screen runs them.
+        """
+        prefix = '_a_' if self.options.get('minify') else 'action_'
+        shared_screens = self.get_shared_screens()
+        action_functions: Dict[str, List[Optional[str]]] = {}
+        screen_actions: Dict[str, List[dict]] = {s: [] for s in self.screens}
+        actions: Dict[Tuple[str, str], dict] = {}
+        action_screens: Dict[str, set] = {}
+        for screen in self.screens:
+            if screen in shared_screens:
+                action_functions[screen] = \
+                    action_functions[shared_screens[screen]]
+                continue
+            action_functions[screen] = []
+            for index, option in enumerate(self.screen_options[screen], 1):
+                if 'action' not in option:
+                    action_functions[screen].append(None)
+                    continue
+                run = Schema.get_action_run(option)
+                if (option['action'], run) not in actions:
+                    action = {'function': f"{prefix}{screen.lower()}_{index}",
+                              'action': option['action'],
+                              'run': run,
+                              'name': option['name']}
+                    actions[(option['action'], run)] = action
+                    action_screens[action['function']] = set()
+                    screen_actions[screen].append(action)
+                function = actions[(option['action'], run)]['function']
+                action_screens[function].add(screen)
+                action_functions[screen].append(function)
+
+        app_actions: List[dict] = []
+        if self.options.get('shard'):
+            app_actions = [a for a in actions.values()
+                           if len(action_screens[a['function']]) > 1]
+            for screen in self.screens:
+                screen_actions[screen] = [a for a in screen_actions[screen]
+                                          if a not in app_actions]
+        return {
+            'action_functions': action_functions,
+            'screen_actions': screen_actions,
+            'app_actions': app_actions
+        }
 
+    def get_deep_links(self) -> dict:
+        """
+        Build what apps follow a path given with `--go` or `--run` through,
+        starting from the home screen, without showing any screen.
+        :return: For each screen, the screen each of its links leads to,
+            keyed by the name of that screen, and the function running each
+            of its actions, keyed by option name, all in lower case.
+        """
+        screen_links: Dict[str, Dict[str, str]] = {
+            screen: {} for screen in self.screens
+        }
+        for screen, link in Schema.get_screen_links(self.blueprint):
+            screen_links[screen][link.lower()] = link.lower()
+
+        action_functions: Dict[str, List[Optional[str]]]
+        if self.options.get('table'):
+            # Apps translated with the 'table' option number their actions.
+            prefix = '_a' if self.options.get('minify') else 'action_'
+            screen_table = self.get_screen_table()
+            action_functions = {}
+            for screen in self.screens:
+                first = screen_table['first_options'][screen.lower()]
+                count = screen_table['options_counts'][screen.lower()]
+                action_functions[screen] = [
+                    f"{prefix}{screen_table['option_actions'][index]}"
+                    if index in screen_table['option_actions'] else None
+                    for index in range(first, first + count)]
+        else:
+            action_functions = self.get_actions()['action_functions']
+        actions: Dict[str, Dict[str, str]] = {
+            screen: {} for screen in self.screens
+        }
+        for screen in self.screens:
+            for option, function in zip(self.screen_options[screen],
+                                        action_functions[screen]):
+                if function is not None:
+                    actions[screen].setdefault(option['name'].lower(),
+                                               function)
+
+        return {'screen_links': screen_links, 'actions': actions}
+
+    def set_screen_flow_template_variables(self) -> None:
+        action_runs = {
+            screen: [Schema.get_action_run(o) for o in options]
+            for screen, options in self.screen_options.items()
+        }
         screen_flow_data = {
             'screens': self.screens,
-            'screen_options': screen_options,
+            'screen_options': self.screen_options,
+            # A set, as templates look screens up in it.
+            'paged_screens': set(Schema.get_paged_screens(self.blueprint)),
+            'sharded': bool(self.options.get('shard')),
+            'table': bool(self.options.get('table')),
+            'option_keys': {
+                screen: [Schema.get_option_key(o) for o in options]
+                for screen, options in self.screen_options.items()
+            },
+            'option_labels': {
+                screen: [Schema.get_option_label(o) for o in options]
+                for screen, options in self.screen_options.items()
+            },
+            'key_prefixes': {
+                screen: Schema.get_key_prefixes(options)
+                for screen, options in self.screen_options.items()
+            },
+            'action_runs': action_runs,
+            # Whether any action runs while the app keeps running.
+            'resident_actions': any(run != 'on_exit'
+                                    for runs in action_runs.values()
+                                    for run in runs),
+            'background_jobs': any('in_background' in runs
+                                   for runs in action_runs.values()),
+            'shared_screens': self.get_shared_screens(),
+            **self.get_actions(),
+            'deep_links': self.get_deep_links()
         }
         self.set_template_data({
             **self.template_data,
             **{'screen_flow': screen_flow_data}
         })
 
-#   Screen rendering ──────────────────────────────────────────────────────────
+#   Screen table ──────────────────────────────────────────────────────────────
 
-    def set_screen_rendering_template_variables(self) -> None:
-        bottom_padding_screen_map = {}
+    def get_screen_table(self) -> dict:
+        """
+        Flatten the options of every screen, in order, into the arrays read
+        by apps translated with the 'table' option.
+        :return: The name and key of every option; the screen each link
+            leads to and the number of each action, by option position; the
+            actions; where each screen's options start and how many there
+            are, keyed by the screen's name in lower case; the option each
+            key selects, keyed by '<screen>:<key>', or -1 for keys that start
+            a longer key; when each action that does not run on exit runs,
+            and the name of its option, by action number; and the height of
+            the tallest screen. Options with the same action share its
+            number, and screens with the same options as an earlier screen
+            share its options.
+        """
+        option_names: List[str] = []
+        option_label_keys: List[str] = []
+        option_links: Dict[int, str] = {}
+        option_actions: Dict[int, int] = {}
+        actions: List[str] = []
+        action_runs: Dict[int, str] = {}
+        action_names: Dict[int, str] = {}
+        first_options: Dict[str, int] = {}
+        options_counts: Dict[str, int] = {}
+        option_keys: Dict[str, int] = {}
+        # Options with the same action, run the same way, share its number.
+        action_numbers: Dict[Tuple[str, str], int] = {}
+        # Screens with the same options as an earlier screen share its options.
+        shared_screens = self.get_shared_screens()
+        screen_keys: Dict[str, Dict[str, int]] = {}
         for screen in self.screens:
-            options = Schema.get_options_for_screen(self.blueprint, screen)
-            max_options = Schema.get_max_screen_options_in_blueprint(self.blueprint)  # noqa
-            bottom_padding = 1 + (max_options - len(options))
-            bottom_padding_screen_map[screen] = bottom_padding
+            # Entries are keyed by the screen's `_SCREEN` constant.
+            name = screen.lower()
+            if screen in shared_screens:
+                first_screen = shared_screens[screen]
+                first_options[name] = first_options[first_screen.lower()]
+                options_counts[name] = options_counts[first_screen.lower()]
+                screen_keys[screen] = screen_keys[first_screen]
+            else:
+                options = self.screen_options[screen]
+                first_options[name] = len(option_names)
+                options_counts[name] = len(options)
+                screen_keys[screen] = {}
+                for option in options:
+                    index = len(option_names)
+                    option_names.append(option['name'])
+                    option_label_keys.append(
+                        Schema.get_option_label(option)[0])
+                    if 'link' in option:
+                        option_links[index] = option['link']
+                    elif 'action' in option:
+                        run = Schema.get_action_run(option)
+                        if (option['action'], run) not in action_numbers:
+                            actions.append(option['action'])
+                            action_numbers[(option['action'], run)] = \
+                                len(actions)
+                            if run != 'on_exit':
+                                action_runs[len(actions)] = run
+                                action_names[len(actions)] = option['name']
+                        option_actions[index] = \
+                            action_numbers[(option['action'], run)]
+                    # When options share a key the first one is chosen.
+                    screen_keys[screen].setdefault(
+                        Schema.get_option_key(option), index)
+                for prefix in Schema.get_key_prefixes(options):
+                    screen_keys[screen].setdefault(prefix, -1)
+            for key, index in screen_keys[screen].items():
+                option_keys[f"{name}:{key}"] = index
+
+        return {
+            'option_names': option_names,
+            'option_label_keys': option_label_keys,
+            'option_links': option_links,
+            'option_actions': option_actions,
+            'actions': actions,
+            'action_runs': action_runs,
+            'action_names': action_names,
+            'first_options': first_options,
+            'options_counts': options_counts,
+            'option_keys': option_keys,
+            'max_screen_height': max(
+                Schema.get_screen_heights(self.blueprint).values())
+        }
+
+    def set_screen_table_template_variables(self) -> None:
+        self.set_template_data({
+            **self.template_data,
+            **{'screen_table': self.get_screen_table()}
+        })
+
+#   Screen rendering ──────────────────────────────────────────────────────────
 
+    def set_screen_rendering_template_variables(self) -> None:
+        bottom_padding_screen_map = Schema.get_bottom_paddings(self.blueprint)
         screen_rendering_data = {
             'show_made_with_on_exit': self.blueprint['meta']['show_made_with_on_exit'],  # noqa
+            'differential_redraw': self.blueprint['meta']['differential_redraw'],  # noqa
             'bottom_padding_screen_map': bottom_padding_screen_map
         }
         self.set_template_data({
@@ -162,8 +430,44 @@ class BlueprintToBash(ITranslator):
             **{'screen_rendering': screen_rendering_data}
         })
 
+#   Shared runtime ────────────────────────────────────────────────────────────
+
+    def get_runtime_version(self) -> str:
+        # Minified apps only work with a runtime minified the same way.
+        if self.options.get('minify'):
+            return f"{__version__}-min"
+        return __version__
+
+    def get_runtime_file_name(self) -> str:
+        # Runtimes of different versions of Nacar are kept side by side, so
+        # rebuilding one app does not break the apps built next to it.
+        if self.options.get('minify'):
+            return f"nacar-runtime-{__version__}.min.sh"
+        return f"nacar-runtime-{__version__}.sh"
+
+    def set_runtime_template_variables(self) -> None:
+        runtime_data = {
+            'shared': bool(self.options.get('runtime')),
+            'version': self.get_runtime_version(),
+            'file_name': self.get_runtime_file_name()
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'runtime': runtime_data}
+        })
+
 #   Translate blueprint to Bash ───────────────────────────────────────────────
 
+    def set_all_template_variables(self) -> None:
+        self.set_heading_template_variables()
+        self.set_app_config_template_variables()
+        self.set_utilities_template_variables()
+        self.set_screen_flow_template_variables()
+        if self.options.get('table'):
+            self.set_screen_table_template_variables()
+        self.set_screen_rendering_template_variables()
+        self.set_runtime_template_variables()
+
     def translate_blueprint(self) -> str:
         """
         Given a blueprint (a Python object built by parsing a YAML blueprint),
@@ -171,13 +475,87 @@ class BlueprintToBash(ITranslator):
         to be persisted to a file and used as a Nacar application.
         """
 
-        self.set_heading_template_variables()
-        self.set_app_config_template_variables()
-        self.set_utilities_template_variables()
-        self.set_screen_flow_template_variables()
-        self.set_screen_rendering_template_variables()
+        self.set_all_template_variables()
 
         template = self.jinja_env.get_template('base.sh.template')
         bash_translation: str = template.render(self.template_data)
 
         return bash_translation
+
+    def translate_screen_chunks(self) -> Dict[str, str]:
+        """
+        When the 'shard' option is set, return the bash code defining each
+        screen, keyed by the screen's name in lower case, which the app
+        sources its file by, to be written to the directory the app sources
+        screens from. Screens shown by an earlier screen's functions have no
+        chunk. Return no chunks otherwise.
+        """
+        if not self.options.get('shard'):
+            return {}
+
+        if 'screen_flow' not in self.template_data:
+            self.set_all_template_variables()
+
+        template = self.jinja_env.get_template('screen_chunk.sh.template')
+        shared_screens = self.get_shared_screens()
+        return {screen.lower(): template.render({**self.template_data,
+                                                 'screen': screen})
+                for screen in self.screens if screen not in shared_screens}
+
+    def translate_runtime(self) -> Dict[str, str]:
+        """
+        When the 'runtime' option is set, return the code apps source from
+        their shared runtime, keyed by the name of the file to write it to
+        next to the app. The runtime does not depend on the blueprint, so it
+        is the same for every app translated with the same options and
+        version of Nacar. Return no runtime otherwise.
+        """
+        if not self.options.get('runtime'):
+            return {}
+
+        self.set_utilities_template_variables()
+        self.set_runtime_template_variables()
+
+        template = self.jinja_env.get_template('runtime.sh.template')
+        return {self.get_runtime_file_name():
+                template.render(self.template_data)}
+
+    def translate_sections(self) -> Dict[str, str]:
+        """
+        Return the code of each section of the app, eg. its utilities or its
+        screen flow, keyed by section name in the order the sections appear.
+        Together the sections make up the translation.
+        """
+        if 'screen_flow' not in self.template_data:
+            self.set_all_template_variables()
+
+        return self.render_template_blocks('base.sh.template')
+
+    def translate_screens(self) -> Dict[str, str]:
+        """
+        Return the code defining each screen, keyed by screen name: its
+        keystroke handler and the function that shows it. Apps describing
+        screens with tables have no code of their own per screen, so return
+        no screens for them. Neither do screens shown by an earlier screen's
+        functions.
+        """
+        if self.options.get('table'):
+            return {}
+
+        if 'screen_flow' not in self.template_data:
+            self.set_all_template_variables()
+
+        templates = [
+            self.jinja_env.get_template('screen_keystroke_handler.sh.template'),  # noqa
+            self.jinja_env.get_template('screen_show.sh.template')
+        ]
+        shared_screens = self.get_shared_screens()
+        screens: Dict[str, str] = {}
+        for screen in self.screens:
+            if screen in shared_screens:
+                continue
+            screen_data = {**self.template_data, 'screen': screen}
+            # Each function is followed by a blank line, as in the app.
+            screens[screen] = ''.join(f"{template.render(screen_data)}\n\n"
+                                      for template in templates)
+        return screens
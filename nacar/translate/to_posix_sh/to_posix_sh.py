@@ -0,0 +1,358 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Blueprint to POSIX sh translator
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Implements the ITranslator interface to turn blueprints into Nacar apps that
+run on any POSIX shell, such as dash. POSIX sh has no arrays and no `printf
+-v`, so every line that does not depend on the breadcrumbs is built here,
+when translating, and written into the app as a shell word.
+Find out more about translators by reading `/docs/Translators.md`.
+"""
+
+from os.path import dirname, abspath
+from shlex import quote
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from nacar.__version__ import __version__
+from nacar.schema import Schema
+from nacar.translate.itranslator import ITranslator
+from nacar.translate.target_language import TargetLanguage
+
+
+class BlueprintToPosixSh(ITranslator):
+    """
+    template_data: dict
+    set_template_data(data: dict) -> None
+    screens: List[str]
+    screen_options: Dict[str, list]
+    set_screens() -> None
+    __init__(blueprint: dict, options: dict) -> None
+
+    POSIX sh translator utilities
+      ├ get_target_language() -> TargetLanguage
+      └ get_styled_word(*segments: str) -> str
+
+    File heading
+      └ set_heading_template_variables() -> None
+
+    Utilities
+      ├ get_sh_styles() -> dict
+      └ set_utilities_template_variables() -> None
+
+    Screen-building utilities
+      ├ get_static_screen_lines() -> Dict[str, str]
+      └ set_screen_building_template_variables() -> None
+
+    Screen flow
+      ├ get_key_pattern(key: str) -> str
+      ├ has_background_jobs() -> bool
+      └ set_screen_flow_template_variables() -> None
+
+    Screen-rendering code
+      ├ get_option_line(option: dict, key: str) -> str
+      ├ get_screen_pages(screen: str, bottom_padding: int) -> list
+      └ set_screen_rendering_template_variables() -> None
+
+    Translate blueprint to POSIX sh
+      ├ translate_blueprint() -> str
+      └ translate_sections() -> Dict[str, str]
+    """
+
+    template_data: dict
+
+    def set_template_data(self, data: dict) -> None:
+        self.template_data = data
+
+    screens: List[str]
+    screen_options: Dict[str, list]
+
+    def set_screens(self) -> None:
+        self.screens = Schema.get_screen_names(self.blueprint)
+        self.screen_options = Schema.get_options_by_screen(self.blueprint)
+
+    def __init__(self, blueprint: dict, options: Optional[dict]=None) -> None:
+        """
+        :param blueprint: A validated blueprint with optional attributes set.
+        :param options: Output options. None are supported by this translator.
+        """
+        translator_dir = dirname(abspath(__file__))
+        super().__init__(blueprint, translator_dir, options)
+        # Write strings into the app as single-quoted shell words.
+        self.jinja_env.filters['quote'] = quote
+
+#   POSIX sh translator utilities ─────────────────────────────────────────────
+
+    @staticmethod
+    def get_target_language() -> TargetLanguage:
+        return TargetLanguage.POSIX_SH
+
+    @staticmethod
+    def get_styled_word(*segments: str) -> str:
+        """
+        Join text and style variables into a single shell word.
+        Use: `get_styled_word('[', '$YEL', 'B', '$END', ']uild')`.
+        :param segments: Alternating text and style variables, starting with
+            text. The text is quoted so it is never expanded by the shell.
+        """
+        word = ''
+        for index, segment in enumerate(segments):
+            if index % 2 == 0:
+                word += quote(segment) if segment else ''
+            else:
+                word += f'"{segment}"'
+        return word
+
+#   File heading ──────────────────────────────────────────────────────────────
+
+    def set_heading_template_variables(self) -> None:
+        """
+        Set data used to render the title, copyright, year, and authors.
+        """
+        heading_data = {
+            'title': self.blueprint['title'],
+            'current_year': datetime.now().year,
+            'authors': ', '.join(self.blueprint['meta']['authors']),
+            'nacar_version': __version__,
+            'current_date': datetime.now().date().isoformat()
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'heading': heading_data}
+        })
+
+#   Nacar app config ──────────────────────────────────────────────────────────
+
+    def set_app_config_template_variables(self) -> None:
+        app_config_data = {
+            'screen_width': self.blueprint['meta']['width'],
+            'page_size': self.blueprint['meta']['page_size']
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'app_config': app_config_data}
+        })
+
+#   Utilities ─────────────────────────────────────────────────────────────────
+
+    def get_sh_styles(self) -> dict:
+        # The styles used by bash Nacar apps, without their leading escape.
+        return {
+            'BLD': '[1m',
+            'DIM': '[2m',
+            'UND': '[4m',
+
+            'RED': '[1;91m',
+            'GRN': '[1;32m',
+            'YEL': '[1;93m',
+            'BLU': '[1;34m',
+            'END': '[0m'
+        }
+
+    def set_utilities_template_variables(self) -> None:
+        utilities_data = {
+            'sh_styles': self.get_sh_styles()
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'utilities': utilities_data}
+        })
+
+#   Screen-building utilities ─────────────────────────────────────────────────
+
+    def get_static_screen_lines(self) -> Dict[str, str]:
+        """
+        Build the lines that only depend on the screen width and title.
+        :return: Shell words for the top and bottom lines of the screen, a
+            blank line, and the lines showing the keys to navigate back and
+            exit, as drawn on the home screen and on every other screen.
+        """
+        width = self.blueprint['meta']['width']
+        title = self.blueprint['title']
+
+        topline_width = width - (2 + len(title) + 2)
+        topline_width_left = topline_width // 2
+        topline_width_right = topline_width_left + (topline_width % 2)
+        top_line = (f"╭{'─' * topline_width_left} {title} "
+                    f"{'─' * topline_width_right}╮")
+
+        return {
+            'top': quote(top_line),
+            'home_navigation': self.get_styled_word(
+                f"│ {' ' * (width - 10)} [", '$RED', 'ESC', '$END',
+                '] │'),
+            'navigation': self.get_styled_word(
+                '│ [', '$BLU', '◀', '$END',
+                f" ] {' ' * (width - 15)} [", '$RED', 'ESC', '$END',
+                '] │'),
+            'blank': quote(f"│ {' ' * (width - 4)} │"),
+            'bottom': quote(f"╰{'─' * (width - 2)}╯")
+        }
+
+    def set_screen_building_template_variables(self) -> None:
+        screen_building_data = {
+            'lines': self.get_static_screen_lines()
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'screen_building': screen_building_data}
+        })
+
+#   Screen flow ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def get_key_pattern(key: str) -> str:
+        """
+        Return the `case` pattern matching a key typed in either case, eg.
+        '[Dd][Ee]' for the key 'de'. POSIX sh has no way to lower the case of
+        the keys typed without forking, so patterns match both cases instead.
+        """
+        return ''.join(f"[{char.upper()}{char}]" if char.upper() != char
+                       else quote(char) for char in key)
+
+    def has_background_jobs(self) -> bool:
+        return any(Schema.get_action_run(option) == 'in_background'
+                   for options in self.screen_options.values()
+                   for option in options)
+
+    def set_screen_flow_template_variables(self) -> None:
+        action_runs = {
+            screen: [Schema.get_action_run(o) for o in options]
+            for screen, options in self.screen_options.items()
+        }
+        screen_flow_data = {
+            'screens': self.screens,
+            'screen_options': self.screen_options,
+            'key_patterns': {
+                screen: [self.get_key_pattern(Schema.get_option_key(o))
+                         for o in options]
+                for screen, options in self.screen_options.items()
+            },
+            'key_prefix_patterns': {
+                screen: [self.get_key_pattern(prefix)
+                         for prefix in Schema.get_key_prefixes(options)]
+                for screen, options in self.screen_options.items()
+            },
+            # A set, as templates look screens up in it.
+            'paged_screens': set(Schema.get_paged_screens(self.blueprint)),
+            'action_runs': action_runs,
+            'in_place_actions': any('in_place' in runs
+                                    for runs in action_runs.values()),
+            'background_jobs': self.has_background_jobs()
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'screen_flow': screen_flow_data}
+        })
+
+#   Screen rendering ──────────────────────────────────────────────────────────
+
+    def get_option_line(self, option: dict, key: str = '') -> str:
+        """
+        :param option: The option, from the blueprint.
+        :param key: The digit that selects the option on a paged screen.
+            Options on other screens are selected by their key.
+        :return: A shell word for the line showing the option.
+        """
+        width = self.blueprint['meta']['width']
+        if key:
+            name = option['name']
+            padding = ' ' * (width - (len(name) + 9))
+            return self.get_styled_word(
+                '│ [', '$YEL', key, '$END',
+                f"] {name} {padding} │")
+
+        label_key, label_rest = Schema.get_option_label(option)
+        padding = ' ' * (width - (len(label_key) + len(label_rest) + 7))
+        return self.get_styled_word(
+            '│ [', '$YEL', label_key, '$END',
+            f"]{label_rest} {padding} │")
+
+    def get_screen_pages(self,
+                         screen: str,
+                         bottom_padding: int) -> List[List[str]]:
+        """
+        Build the lines of a screen below its breadcrumbs, down to the bottom
+        of the screen.
+        :param bottom_padding: The blank lines above the bottom of the screen.
+        :return: One list of shell words per page of options. Screens that
+            fit all their options on the page have a single page.
+        """
+        width = self.blueprint['meta']['width']
+        page_size = self.blueprint['meta']['page_size']
+        blank = '"$BLANK_SCREEN_LINE"'
+        bottom = [blank] * bottom_padding + ['"$SCREEN_BOTTOM_LINE"']
+        if self.has_background_jobs():
+            # The status of background jobs takes the last blank line.
+            bottom[-2] = '"$JOB_STATUS_LINE"'
+        options = self.screen_options[screen]
+
+        # The check made by `Schema.get_paged_screens()`, for this screen only.
+        if page_size == 0 or len(options) <= page_size:
+            return [[self.get_option_line(o) for o in options]
+                    + bottom]
+
+        pages = []
+        pages_count = -(-len(options) // page_size)
+        for page in range(pages_count):
+            page_options = options[page * page_size:(page + 1) * page_size]
+            page_lines = [
+                self.get_option_line(o, str((index + 1) % 10))
+                for index, o in enumerate(page_options)
+            ]
+            page_lines += [blank] * (page_size - len(page_options))
+            pager = f"Page {page + 1}/{pages_count}  [PgUp] [PgDn]"
+            page_lines.append(self.get_styled_word(
+                '│ ', '$DIM', pager.ljust(width - 4), '$END', ' │'))
+            pages.append(page_lines + bottom)
+        return pages
+
+    def set_screen_rendering_template_variables(self) -> None:
+        bottom_padding_screen_map = Schema.get_bottom_paddings(self.blueprint)
+
+        screen_pages = {
+            screen: self.get_screen_pages(screen,
+                                          bottom_padding_screen_map[screen])
+            for screen in self.screens
+        }
+
+        screen_rendering_data = {
+            'show_made_with_on_exit': self.blueprint['meta']['show_made_with_on_exit'],  # noqa
+            'screen_pages': screen_pages
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'screen_rendering': screen_rendering_data}
+        })
+
+#   Translate blueprint to POSIX sh ───────────────────────────────────────────
+
+    def translate_blueprint(self) -> str:
+        """
+        Given a blueprint (a Python object built by parsing a YAML blueprint),
+        return a string containing the blueprint's translation to POSIX sh,
+        ready to be persisted to a file and used as a Nacar application.
+        """
+
+        self.set_heading_template_variables()
+        self.set_app_config_template_variables()
+        self.set_utilities_template_variables()
+        self.set_screen_building_template_variables()
+        self.set_screen_flow_template_variables()
+        self.set_screen_rendering_template_variables()
+
+        template = self.jinja_env.get_template('base.sh.template')
+        posix_sh_translation: str = template.render(self.template_data)
+
+        return posix_sh_translation
+
+    def translate_sections(self) -> Dict[str, str]:
+        """
+        Return the code of each section of the app last translated by
+        `translate_blueprint()`, eg. its utilities or its screen flow, keyed
+        by section name in the order the sections appear.
+        """
+        return self.render_template_blocks('base.sh.template')
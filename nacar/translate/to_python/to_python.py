@@ -0,0 +1,218 @@
+"""
+Nacar
+Copyright 2022 Alberto Morón Hernández
+[github.com/albertomh/Nacar]
+
+Blueprint to Python translator
+▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+Implements the ITranslator interface to turn blueprints into Nacar apps
+written in Python, which draw screens with `curses` in a single process.
+Find out more about translators by reading `/docs/Translators.md`.
+"""
+
+from os.path import dirname, abspath
+from typing import Dict, List, Optional
+from datetime import datetime
+
+from nacar.__version__ import __version__
+from nacar.schema import Schema
+from nacar.translate.itranslator import ITranslator
+from nacar.translate.target_language import TargetLanguage
+
+
+class BlueprintToPython(ITranslator):
+    """
+    template_data: dict
+    set_template_data(data: dict) -> None
+    screens: List[str]
+    screen_options: Dict[str, list]
+    set_screens() -> None
+    __init__(blueprint: dict, options: dict) -> None
+
+    Python translator utilities
+      └ get_target_language() -> TargetLanguage
+
+    File heading
+      └ set_heading_template_variables() -> None
+
+    Utilities
+      ├ get_curses_colours() -> dict
+      └ set_utilities_template_variables() -> None
+
+    Screen flow
+      ├ get_screen_keys(options: list) -> Dict[str, int]
+      └ set_screen_flow_template_variables() -> None
+
+    Screen-rendering code
+      └ set_screen_rendering_template_variables() -> None
+
+    Translate blueprint to Python
+      ├ translate_blueprint() -> str
+      └ translate_sections() -> Dict[str, str]
+    """
+
+    template_data: dict
+
+    def set_template_data(self, data: dict) -> None:
+        self.template_data = data
+
+    screens: List[str]
+    screen_options: Dict[str, list]
+
+    def set_screens(self) -> None:
+        self.screens = Schema.get_screen_names(self.blueprint)
+        self.screen_options = Schema.get_options_by_screen(self.blueprint)
+
+    def __init__(self, blueprint: dict, options: Optional[dict]=None) -> None:
+        """
+        :param blueprint: A validated blueprint with optional attributes set.
+        :param options: Output options. None are supported by this translator.
+        """
+        translator_dir = dirname(abspath(__file__))
+        super().__init__(blueprint, translator_dir, options)
+        # Write strings into the app as Python literals.
+        self.jinja_env.filters['repr'] = repr
+
+#   Python translator utilities ───────────────────────────────────────────────
+
+    @staticmethod
+    def get_target_language() -> TargetLanguage:
+        return TargetLanguage.PYTHON
+
+#   File heading ──────────────────────────────────────────────────────────────
+
+    def set_heading_template_variables(self) -> None:
+        """
+        Set data used to render the title, copyright, year, and authors.
+        """
+        heading_data = {
+            'title': self.blueprint['title'],
+            'current_year': datetime.now().year,
+            'authors': ', '.join(self.blueprint['meta']['authors']),
+            'nacar_version': __version__,
+            'current_date': datetime.now().date().isoformat()
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'heading': heading_data}
+        })
+
+#   Nacar app config ──────────────────────────────────────────────────────────
+
+    def set_app_config_template_variables(self) -> None:
+        app_config_data = {
+            'screen_width': self.blueprint['meta']['width'],
+            'page_size': self.blueprint['meta']['page_size']
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'app_config': app_config_data}
+        })
+
+#   Utilities ─────────────────────────────────────────────────────────────────
+
+    def get_curses_colours(self) -> dict:
+        # The colours used by bash Nacar apps, as `curses` constants.
+        return {
+            'RED': 'COLOR_RED',
+            'GRN': 'COLOR_GREEN',
+            'YEL': 'COLOR_YELLOW',
+            'BLU': 'COLOR_BLUE'
+        }
+
+    def set_utilities_template_variables(self) -> None:
+        utilities_data = {
+            'curses_colours': self.get_curses_colours()
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'utilities': utilities_data}
+        })
+
+#   Screen flow ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def get_screen_keys(options: list) -> Dict[str, int]:
+        """
+        Map the keys that select a screen's options, in lower case, to the
+        index of the option, and the keys typed on the way to typing a longer
+        key to -1. When options share a key it selects the first of them, as
+        in bash Nacar apps.
+        """
+        keys: Dict[str, int] = {}
+        for index, option in enumerate(options):
+            keys.setdefault(Schema.get_option_key(option), index)
+        for prefix in Schema.get_key_prefixes(options):
+            keys.setdefault(prefix, -1)
+        return keys
+
+    def set_screen_flow_template_variables(self) -> None:
+        action_runs = {
+            screen: [Schema.get_action_run(o) for o in options]
+            for screen, options in self.screen_options.items()
+        }
+        screen_keys = {screen: self.get_screen_keys(options)
+                       for screen, options in self.screen_options.items()}
+
+        screen_flow_data = {
+            'screens': self.screens,
+            'screen_options': self.screen_options,
+            'screen_keys': screen_keys,
+            'option_labels': {
+                screen: [Schema.get_option_label(o) for o in options]
+                for screen, options in self.screen_options.items()
+            },
+            # A set, as templates look screens up in it.
+            'paged_screens': set(Schema.get_paged_screens(self.blueprint)),
+            'action_runs': action_runs,
+            'in_place_actions': any('in_place' in runs
+                                    for runs in action_runs.values()),
+            'background_jobs': any('in_background' in runs
+                                   for runs in action_runs.values())
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'screen_flow': screen_flow_data}
+        })
+
+#   Screen rendering ──────────────────────────────────────────────────────────
+
+    def set_screen_rendering_template_variables(self) -> None:
+        bottom_padding_screen_map = Schema.get_bottom_paddings(self.blueprint)
+
+        screen_rendering_data = {
+            'show_made_with_on_exit': self.blueprint['meta']['show_made_with_on_exit'],  # noqa
+            'bottom_padding_screen_map': bottom_padding_screen_map
+        }
+        self.set_template_data({
+            **self.template_data,
+            **{'screen_rendering': screen_rendering_data}
+        })
+
+#   Translate blueprint to Python ─────────────────────────────────────────────
+
+    def translate_blueprint(self) -> str:
+        """
+        Given a blueprint (a Python object built by parsing a YAML blueprint),
+        return a string containing the blueprint's translation to Python, ready
+        to be persisted to a file and used as a Nacar application.
+        """
+
+        self.set_heading_template_variables()
+        self.set_app_config_template_variables()
+        self.set_utilities_template_variables()
+        self.set_screen_flow_template_variables()
+        self.set_screen_rendering_template_variables()
+
+        template = self.jinja_env.get_template('base.py.template')
+        python_translation: str = template.render(self.template_data)
+
+        return python_translation
+
+    def translate_sections(self) -> Dict[str, str]:
+        """
+        Return the code of each section of the app last translated by
+        `translate_blueprint()`, eg. its utilities or its screen flow, keyed
+        by section name in the order the sections appear.
+        """
+        return self.render_template_blocks('base.py.template')
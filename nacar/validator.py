@@ -7,10 +7,11 @@ Custom Cerberus Validator
 ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
 Extend the Validator with rules that cannot be expressed directly
 using a Cerberus schema. Avoid screen name collisions,
-infinite loops, and pointers to inexistent screens.
+infinite loops, pointers to inexistent screens, and options
+that cannot be selected because of another option's key.
 """
 
-from typing import List
+from typing import Dict, List, Tuple
 
 from cerberus import Validator
 
@@ -19,8 +20,15 @@ from nacar.schema import Schema
 
 class NacarValidator(Validator):
 
-    # def __init__(self, *args, **kwargs):  # TODO: reinstate?
-    #     super(NacarValidator, self).__init__(*args, **kwargs)
+    def __init__(self, *args, **kwargs):
+        # Child validators, created for every nested field, are handed the
+        # registry of the validator that created them.
+        if 'schema_registry' not in kwargs:
+            kwargs['schema_registry'] = Schema.get_schema_registry()
+        super(NacarValidator, self).__init__(*args, **kwargs)
+        # Problems found by the last call to `validate()` that do not make
+        # the document invalid.
+        self.warnings: List[str] = []
 
     def validate(self, document: dict, schema: dict) -> bool:
         if document is None or schema is None:
@@ -70,8 +78,80 @@ class NacarValidator(Validator):
         if not linked_screens_exist:
             super(NacarValidator, self)._error('screens', "Cannot link to an undefined screen.")  # noqa
 
+        # Check every option of a screen can be selected by its key.
+        key_collisions: List[str]
+        key_collisions, self.warnings = self.get_key_collisions(document)
+        for key_collision in key_collisions:
+            super(NacarValidator, self)._error('screens', key_collision)
+
         return (is_valid
+                and not key_collisions
                 and not title_exceeds_app_width
                 and screen_names_are_unique
                 and not screen_links_are_recursive
                 and linked_screens_exist)
+
+    @staticmethod
+    def get_key_collisions(document: dict) -> Tuple[List[str], List[str]]:
+        """
+        Return an error for every option of a screen that cannot be selected
+        because an option of the screen set to the same key comes first, or
+        another option's key starts its key. Options that share the first
+        letter of their names and set no key were valid before options could
+        set a key, so are only warned about, once for each screen: the first
+        of them is selected. Options of paged screens are selected by the
+        digit shown next to them, so their keys are not checked.
+        :return: The errors and the warnings.
+        """
+        meta = document.get('meta')
+        page_size = meta.get('page_size') if isinstance(meta, dict) else 0
+        if not isinstance(page_size, int):
+            page_size = 0
+
+        key_collisions: List[str] = []
+        warnings: List[str] = []
+        screens = document.get('screens')
+        for screen in screens if isinstance(screens, list) else []:
+            options = screen.get('options') if isinstance(screen, dict) else []
+            if not isinstance(options, list) or 0 < page_size < len(options):
+                continue
+
+            options_by_key: Dict[str, dict] = {}
+            # Options hidden by an earlier option with the same first letter.
+            hidden_options: List[str] = []
+            for option in options:
+                if (not isinstance(option, dict)
+                        or not isinstance(option.get('name'), str)
+                        or not option['name']
+                        or not isinstance(option.get('key', ''), str)):
+                    continue
+                key = Schema.get_option_key(option)
+                if key not in options_by_key:
+                    options_by_key[key] = option
+                elif 'key' in option or 'key' in options_by_key[key]:
+                    key_collisions.append(
+                        f"Options '{options_by_key[key]['name']}' and "
+                        f"'{option['name']}' of screen '{screen.get('name')}' "
+                        f"share the key '{key}'. Set a different key on one "
+                        f"of them.")
+                else:
+                    hidden_options.append(option['name'])
+            if hidden_options:
+                warnings.append(
+                    f"Screen '{screen.get('name')}' has options that cannot "
+                    f"be selected by key, as an earlier option's name starts "
+                    f"with the same letter: "
+                    f"{', '.join(repr(name) for name in hidden_options)}. "
+                    f"Set `key` on them.")
+
+            # Typing a key that starts a longer key selects its option, so
+            # the longer key could never be typed.
+            for key, option in options_by_key.items():
+                for end in range(1, len(key)):
+                    if key[:end] in options_by_key:
+                        key_collisions.append(
+                            f"The key '{key[:end]}' of option "
+                            f"'{options_by_key[key[:end]]['name']}' of screen "
+                            f"'{screen.get('name')}' starts the key '{key}' "
+                            f"of option '{option['name']}'.")
+        return key_collisions, warnings
@@ -0,0 +1,823 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the runtime of bash Nacar apps
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Translate a blueprint, write the resulting Nacar app to a file, and run
+# it with scripted keystrokes to test its behaviour.
+
+import os
+import subprocess
+from time import monotonic, sleep
+from json import loads as json_loads
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks.forks import get_forking_commands_per_keystroke
+from nacar.__version__ import __version__
+from nacar.file_io import FileIO
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+from nacar.trace_analyzer import TraceAnalyzer
+from tests.utils import render_terminal, run_app_in_terminal
+
+
+# The runtime written next to apps translated with the 'runtime' option.
+RUNTIME_FILE_NAME = f"nacar-runtime-{__version__}.sh"
+
+
+@pytest.fixture
+def blueprint(test_data_dir) -> dict:
+    with open(os.path.join(test_data_dir, 'valid-blueprint.json')) as file:
+        return json_loads(file.read())
+
+
+@pytest.fixture
+def differential_blueprint(blueprint) -> dict:
+    blueprint['meta']['differential_redraw'] = True
+    return blueprint
+
+
+@pytest.fixture
+def paged_blueprint() -> dict:
+    # Every fifth option of the 'logs' screen links back home.
+    return {
+        'title': 'Paged Blueprint',
+        'meta': {'authors': ['Author'], 'page_size': 10},
+        'screens': [
+            {'name': 'home', 'options': [{'name': 'Logs', 'link': 'logs'}]},
+            {'name': 'logs', 'options': [
+                {'name': f"Home {i}", 'link': 'home'} if i % 5 == 0
+                else {'name': f"Log {i}", 'action': f"echo 'log {i}'"}
+                for i in range(25)
+            ]}
+        ]
+    }
+
+
+@pytest.fixture
+def deep_blueprint() -> dict:
+    # A chain of screens, each linking to the next with its 'Next' option.
+    screens = [{'name': f"level{i}",
+                'options': [{'name': 'Next', 'link': f"level{i + 1}"}]}
+               for i in range(11)]
+    screens[0]['name'] = 'home'
+    screens[-1]['options'] = [{'name': 'Done', 'action': "echo 'done'"}]
+    return {
+        'title': 'Deep Blueprint',
+        'meta': {'authors': ['Author'], 'width': 40},
+        'screens': screens
+    }
+
+
+@pytest.fixture
+def mixed_case_blueprint() -> dict:
+    # Screens are named in mixed case, and shown by the lower case names of
+    # their `_SCREEN` constants.
+    return {
+        'title': 'Mixed Case Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [
+            {'name': 'home', 'options': [{'name': 'Deploy',
+                                          'link': 'Deploy'}]},
+            {'name': 'Deploy', 'options': [
+                {'name': 'Staging', 'action': "echo 'deploy staging'"},
+                {'name': 'Production', 'action': "echo 'deploy production'"}
+            ]}
+        ]
+    }
+
+
+def write_bash_app(blueprint: dict,
+                   app_path: str,
+                   options: dict = None) -> str:
+    blueprint = Schema.set_missing_optional_attributes(blueprint)
+    translator = BlueprintToBash(blueprint, options)
+    FileIO.write_nacar_app_to_file(translator.translate_blueprint(),
+                                   app_path,
+                                   TargetLanguage.BASH)
+    screen_chunks = translator.translate_screen_chunks()
+    if screen_chunks:
+        FileIO.write_nacar_app_screens_to_dir(screen_chunks,
+                                              f"{app_path}.screens",
+                                              TargetLanguage.BASH)
+    runtime_files = translator.translate_runtime()
+    if runtime_files:
+        FileIO.write_nacar_runtime_to_dir(runtime_files,
+                                          os.path.dirname(app_path),
+                                          TargetLanguage.BASH)
+    return app_path
+
+
+@pytest.fixture
+def bash_app_path(blueprint, tmp_path) -> str:
+    return write_bash_app(blueprint, str(tmp_path / 'valid-blueprint'))
+
+
+@pytest.fixture
+def differential_bash_app_path(differential_blueprint, tmp_path) -> str:
+    return write_bash_app(differential_blueprint,
+                          str(tmp_path / 'differential'))
+
+
+@pytest.fixture
+def paged_bash_app_path(paged_blueprint, tmp_path) -> str:
+    return write_bash_app(paged_blueprint, str(tmp_path / 'paged'))
+
+
+@pytest.fixture
+def sharded_bash_app_path(blueprint, tmp_path) -> str:
+    return write_bash_app(blueprint, str(tmp_path / 'sharded'),
+                          {'shard': True})
+
+
+@pytest.fixture
+def table_bash_app_path(blueprint, tmp_path) -> str:
+    return write_bash_app(blueprint, str(tmp_path / 'table'),
+                          {'table': True})
+
+
+@pytest.fixture
+def shared_runtime_bash_app_path(blueprint, tmp_path) -> str:
+    return write_bash_app(blueprint, str(tmp_path / 'shared-runtime'),
+                          {'runtime': True})
+
+
+@pytest.fixture
+def paged_table_bash_app_path(paged_blueprint, tmp_path) -> str:
+    return write_bash_app(paged_blueprint, str(tmp_path / 'paged-table'),
+                          {'table': True})
+
+
+def run_app(app_path: str,
+            keystrokes: str,
+            cwd: str = None,
+            env: dict = None,
+            args: list = None) -> str:
+    result = subprocess.run([app_path, *(args or [])],
+                            input=keystrokes.encode('utf-8'),
+                            stdout=subprocess.PIPE,
+                            cwd=cwd,
+                            env={**os.environ, 'LC_ALL': 'C.UTF-8',
+                                 **(env or {})},
+                            timeout=10)
+    return result.stdout.decode('utf-8')
+
+
+def get_last_frame(output: str) -> list:
+    # Drop the exit screen, which is drawn once input runs out.
+    return render_terminal(output[:output.rindex('\x1bc')])
+
+
+#   Test navigation ────────────────────────────────────────────────────────────
+
+def test_invoking_an_action(bash_app_path):
+    output = run_app(bash_app_path, 'db')
+    assert output.endswith("build code\n")
+
+
+def test_navigating_back_with_left_arrow(bash_app_path):
+    output = run_app(bash_app_path, 'd\x1b[Dtr')
+    assert output.endswith("run tests\n")
+
+
+def test_breadcrumbs_show_the_path_to_the_active_screen(deep_blueprint,
+                                                        tmp_path):
+    app_path = write_bash_app(deep_blueprint, str(tmp_path / 'deep'))
+    breadcrumbs = get_last_frame(run_app(app_path, 'nn'))[3]
+    assert breadcrumbs == "│ home › level1 › level2               │"
+
+
+def test_breadcrumbs_that_overflow_are_truncated(deep_blueprint, tmp_path):
+    app_path = write_bash_app(deep_blueprint, str(tmp_path / 'deep'))
+    breadcrumbs = get_last_frame(run_app(app_path, 'n' * 10))[3]
+    assert breadcrumbs == "│ … level7 › level8 › level9 › level10 │"
+
+    # Going back shows the same breadcrumbs as going forward did.
+    for depth in range(2, 10):
+        assert (get_last_frame(run_app(app_path, 'n' * 10
+                                       + '\x1b[D' * (10 - depth)))[3]
+                == get_last_frame(run_app(app_path, 'n' * depth))[3])
+
+
+#   Test keys ──────────────────────────────────────────────────────────────────
+
+UP, DOWN, ENTER = '\x1b[A', '\x1b[B', '\n'
+
+
+@pytest.fixture
+def keyed_blueprint() -> dict:
+    return {
+        'title': 'Keyed Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [{'name': 'home', 'options': [
+            {'name': 'Deploy', 'key': 'de', 'action': "echo 'deploy'"},
+            {'name': 'Docs', 'key': 'do', 'action': "echo 'docs'"},
+            {'name': 'Build', 'key': '2', 'action': "echo 'build'"},
+            {'name': 'Test', 'action': "echo 'test'"},
+        ]}]
+    }
+
+
+@pytest.mark.parametrize('options', [{}, {'table': True}, {'minify': True}])
+@pytest.mark.parametrize('keystrokes,expected_output', [
+    ('de', "deploy\n"),
+    ('DO', "docs\n"),
+    ('2', "build\n"),
+    # A key that does not carry on from the keys before it starts afresh.
+    ('dt', "test\n"),
+    (DOWN * 2 + ENTER, "docs\n"),
+    (UP + ENTER, "test\n"),
+    # The highlight stops at the first and last options.
+    (DOWN * 6 + UP + ENTER, "build\n"),
+])
+def test_selecting_options_by_key_and_arrows(
+    keyed_blueprint,
+    tmp_path,
+    options: dict,
+    keystrokes: str,
+    expected_output: str
+):
+    app_path = write_bash_app(keyed_blueprint, str(tmp_path / 'keyed'),
+                              options)
+    assert run_app(app_path, keystrokes).endswith(expected_output)
+
+
+def test_options_are_shown_with_their_key(keyed_blueprint, tmp_path):
+    app_path = write_bash_app(keyed_blueprint, str(tmp_path / 'keyed'))
+    frame = get_last_frame(run_app(app_path, DOWN * 2))
+    assert frame[5].startswith("│ [DE]ploy ")
+    # The highlighted option is pointed at.
+    assert frame[6].startswith("│▸[DO]cs ")
+    assert frame[7].startswith("│ [2] Build ")
+    assert frame[8].startswith("│ [T]est ")
+
+
+def test_arrows_highlight_options_on_the_page(paged_bash_app_path):
+    keystrokes = 'l' + UP
+    frame = get_last_frame(run_app(paged_bash_app_path, keystrokes))
+    assert frame[14].startswith("│▸[0] Log 9 ")
+
+    # Moving past the page turns to the next one.
+    keystrokes += DOWN
+    frame = get_last_frame(run_app(paged_bash_app_path, keystrokes))
+    assert frame[5].startswith("│▸[1] Home 10 ")
+    assert "Page 2/3" in frame[15]
+    assert run_app(paged_bash_app_path,
+                   keystrokes + DOWN + ENTER).endswith("log 11\n")
+
+
+@pytest.mark.parametrize('app_path_fixture', [
+    'bash_app_path', 'table_bash_app_path'
+])
+def test_escape_exits_at_once(request, app_path_fixture: str):
+    app_path = request.getfixturevalue(app_path_fixture)
+    started = monotonic()
+    output = run_app_in_terminal(app_path, '\x1b')
+    assert "Exited" in output
+    # ESC is told apart from the start of an escape sequence without waiting
+    # for more input, as apps once did for a tenth of a second.
+    assert monotonic() - started < 0.1
+
+
+def test_arrows_and_enter_in_a_terminal(bash_app_path):
+    output = run_app_in_terminal(bash_app_path, DOWN + '\r' + DOWN + '\r')
+    assert output.endswith("build code\r\n")
+
+
+#   Test actions run in place and in the background ────────────────────────────
+
+@pytest.fixture
+def resident_blueprint() -> dict:
+    return {
+        'title': 'Resident Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [
+            {'name': 'home', 'options': [
+                {'name': 'Ops', 'link': 'ops'},
+                {'name': 'Quit', 'action': "echo 'quit'"},
+            ]},
+            {'name': 'ops', 'options': [
+                # Actions run in place cannot exit the app.
+                {'name': 'Status', 'action': "echo 'status'; exit 3",
+                 'run': 'in_place'},
+                {'name': 'Build', 'action': "sleep 0.3", 'run': 'in_background'},  # noqa
+                {'name': 'Fail', 'action': "false", 'run': 'in_background'},
+            ]},
+        ]
+    }
+
+
+@pytest.mark.parametrize('options', [
+    {}, {'table': True}, {'minify': True}, {'shard': True}
+])
+def test_actions_run_in_place_return_to_the_screen(resident_blueprint,
+                                                   tmp_path,
+                                                   options: dict):
+    app_path = write_bash_app(resident_blueprint, str(tmp_path / 'resident'),
+                              options)
+    # Any key returns to the screen after the action.
+    output = run_app(app_path, 'os ')
+    assert "status\n" in output
+    assert "Finished with status 3." in output
+    frame = get_last_frame(output)
+    assert frame[3].startswith("│ home › ops ")
+
+    assert run_app(app_path, 'os \x1b[Dq').endswith("quit\n")
+
+
+@pytest.mark.parametrize('options', [{}, {'table': True}])
+def test_background_jobs_show_their_status(resident_blueprint,
+                                           tmp_path,
+                                           options: dict):
+    app_path = write_bash_app(resident_blueprint, str(tmp_path / 'resident'),
+                              options)
+    frame = get_last_frame(run_app(app_path, 'o'))
+    assert frame[-3] == f"│{' ' * 78}│"
+
+    app = subprocess.Popen([app_path], stdin=subprocess.PIPE,
+                           stdout=subprocess.PIPE,
+                           env={**os.environ, 'LC_ALL': 'C.UTF-8'})
+    app.stdin.write(b'obf')
+    app.stdin.flush()
+    # The screen is shown again while jobs run, without a key being pressed.
+    sleep(1.5)
+    output, _ = app.communicate(b'\x1b', timeout=10)
+    frames = output.decode('utf-8').split('\x1bc')
+    # Whether Fail has failed by the time the frame after starting it is
+    # drawn depends on timing.
+    assert any("Build: running  Fail: " in frame for frame in frames)
+    assert "Build: done  Fail: failed (1)" in frames[-2]
+
+
+#   Test paging ────────────────────────────────────────────────────────────────
+
+PAGE_UP, PAGE_DOWN = '\x1b[5~', '\x1b[6~'
+
+
+def test_paged_screen_shows_a_page_of_options(paged_bash_app_path):
+    frame = get_last_frame(run_app(paged_bash_app_path, 'l'))
+    assert "[1] Home 0" in frame[5]
+    assert "[0] Log 9" in frame[14]
+    assert "Page 1/3" in frame[15]
+    assert not any('Log 10' in line for line in frame)
+
+
+def test_turning_pages(paged_bash_app_path):
+    keystrokes = 'l' + PAGE_DOWN * 3
+    frame = get_last_frame(run_app(paged_bash_app_path, keystrokes))
+    # The last page is not full, and paging stops there.
+    assert "[5] Log 24" in frame[9]
+    assert "Page 3/3" in frame[15]
+
+    keystrokes += PAGE_UP
+    frame = get_last_frame(run_app(paged_bash_app_path, keystrokes))
+    assert "Page 2/3" in frame[15]
+
+
+@pytest.mark.parametrize('keystrokes,expected_output', [
+    ('l3', "log 2\n"),
+    ('l' + PAGE_DOWN + '0', "log 19\n"),
+    ('l' + PAGE_DOWN + '1l' + PAGE_DOWN * 2 + '4', "log 23\n"),
+])
+def test_selecting_paged_options_by_digit(
+    paged_bash_app_path,
+    keystrokes: str,
+    expected_output: str
+):
+    assert run_app(paged_bash_app_path, keystrokes).endswith(expected_output)
+
+
+def test_digits_past_the_last_option_are_ignored(paged_bash_app_path):
+    keystrokes = 'l' + PAGE_DOWN * 2 + '9'
+    frame = get_last_frame(run_app(paged_bash_app_path, keystrokes))
+    assert "Page 3/3" in frame[15]
+
+
+#   Test differential redraw ───────────────────────────────────────────────────
+
+@pytest.mark.parametrize('keystrokes', ['', 'd', 'd\x1b[Dt', 'dx\x1b[D'])
+def test_differential_redraw_shows_the_same_frame(
+    bash_app_path,
+    differential_bash_app_path,
+    keystrokes: str
+):
+    full_output = run_app(bash_app_path, keystrokes)
+    differential_output = run_app(differential_bash_app_path, keystrokes)
+    assert (get_last_frame(differential_output)
+            == get_last_frame(full_output))
+    assert 'home' in ''.join(get_last_frame(differential_output))
+
+
+def test_differential_redraw_writes_fewer_bytes(
+    bash_app_path,
+    differential_bash_app_path
+):
+    def bytes_per_keystroke(app_path: str) -> float:
+        first_frame = run_app(app_path, '')
+        output = run_app(app_path, 'd\x1b[Dtx\x1b[D')
+        return (len(output) - len(first_frame)) / 5
+
+    assert (bytes_per_keystroke(differential_bash_app_path) * 4
+            < bytes_per_keystroke(bash_app_path))
+
+
+#   Test minifying ─────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('blueprint_fixture,keystrokes', [
+    ('blueprint', 'd\x1b[Dtx\x1b[Dd'),
+    ('blueprint', 'db'),
+    ('differential_blueprint', 'd\x1b[Dtx'),
+    ('paged_blueprint', 'l' + PAGE_DOWN * 2 + PAGE_UP + '3'),
+])
+def test_minified_app_behaves_the_same(
+    request,
+    tmp_path,
+    blueprint_fixture: str,
+    keystrokes: str
+):
+    blueprint = request.getfixturevalue(blueprint_fixture)
+    app_path = write_bash_app(blueprint, str(tmp_path / 'app'))
+    minified_app_path = write_bash_app(blueprint, str(tmp_path / 'minified'),
+                                       {'minify': True})
+    assert (run_app(minified_app_path, keystrokes)
+            == run_app(app_path, keystrokes))
+
+
+#   Test sharding ─────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('blueprint_fixture,options,keystrokes', [
+    ('blueprint', {}, 'd\x1b[Dtx\x1b[Dd'),
+    ('blueprint', {}, 'db'),
+    ('blueprint', {'minify': True}, 'd\x1b[Dtr'),
+    ('differential_blueprint', {}, 'd\x1b[Dtx'),
+    ('paged_blueprint', {}, 'l' + PAGE_DOWN * 2 + PAGE_UP + '3'),
+    ('mixed_case_blueprint', {}, 'd\x1b[Ddp'),
+])
+def test_sharded_app_behaves_the_same(
+    request,
+    tmp_path,
+    blueprint_fixture: str,
+    options: dict,
+    keystrokes: str
+):
+    blueprint = request.getfixturevalue(blueprint_fixture)
+    app_path = write_bash_app(blueprint, str(tmp_path / 'app'))
+    sharded_app_path = write_bash_app(blueprint, str(tmp_path / 'sharded'),
+                                      {**options, 'shard': True})
+    assert (run_app(sharded_app_path, keystrokes)
+            == run_app(app_path, keystrokes))
+
+
+def test_sharded_app_only_loads_the_screens_shown(sharded_bash_app_path):
+    os.remove(f"{sharded_bash_app_path}.screens/test.sh")
+    output = run_app(sharded_bash_app_path, 'db')
+    assert output.endswith("build code\n")
+
+
+def test_sharded_app_shows_screens_named_in_mixed_case(mixed_case_blueprint,
+                                                       tmp_path):
+    app_path = write_bash_app(mixed_case_blueprint, str(tmp_path / 'app'),
+                              {'shard': True})
+    assert sorted(os.listdir(f"{app_path}.screens")) == ['deploy.sh',
+                                                         'home.sh']
+    output = run_app(app_path, 'dp')
+    assert output.endswith("deploy production\n")
+
+
+def test_sharded_app_finds_its_screens_from_another_directory(
+    sharded_bash_app_path,
+    tmp_path
+):
+    app_dir, app_file_name = os.path.split(sharded_bash_app_path)
+    other_dir = tmp_path / 'other'
+    other_dir.mkdir()
+    relative_app_path = os.path.join('..', app_file_name)
+    output = run_app(relative_app_path, 'db', cwd=str(other_dir))
+    assert output.endswith("build code\n")
+
+
+#   Test screen tables ─────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('blueprint_fixture,options,keystrokes', [
+    ('blueprint', {}, 'd\x1b[Dtx\x1b[Dd'),
+    ('blueprint', {}, 'DB'),
+    ('blueprint', {'minify': True}, 'd\x1b[Dtr'),
+    ('differential_blueprint', {}, 'd\x1b[Dtx'),
+    ('paged_blueprint', {}, 'l' + PAGE_DOWN * 3 + PAGE_UP + '3'),
+    ('paged_blueprint', {}, 'l' + PAGE_DOWN * 2 + '9l' + PAGE_DOWN + '0'),
+    ('mixed_case_blueprint', {}, 'd\x1b[Ddp'),
+])
+def test_table_app_behaves_the_same(
+    request,
+    tmp_path,
+    blueprint_fixture: str,
+    options: dict,
+    keystrokes: str
+):
+    blueprint = request.getfixturevalue(blueprint_fixture)
+    app_path = write_bash_app(blueprint, str(tmp_path / 'app'))
+    table_app_path = write_bash_app(blueprint, str(tmp_path / 'table'),
+                                    {**options, 'table': True})
+    assert (run_app(table_app_path, keystrokes)
+            == run_app(app_path, keystrokes))
+
+
+def test_table_app_shows_screens_named_in_mixed_case(mixed_case_blueprint,
+                                                     tmp_path):
+    app_path = write_bash_app(mixed_case_blueprint, str(tmp_path / 'app'),
+                              {'table': True})
+    output = run_app(app_path, 'dp')
+    assert "syntax error" not in output
+    assert output.endswith("deploy production\n")
+
+
+#   Test shared runtimes ──────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('blueprint_fixture,options,keystrokes', [
+    ('blueprint', {}, 'd\x1b[Dtx\x1b[Dd'),
+    ('blueprint', {}, 'db'),
+    ('blueprint', {'minify': True}, 'd\x1b[Dtr'),
+    ('blueprint', {'shard': True}, 'd\x1b[Dtr'),
+    ('blueprint', {'table': True}, 'd\x1b[Dtr'),
+    ('differential_blueprint', {}, 'd\x1b[Dtx'),
+    ('paged_blueprint', {}, 'l' + PAGE_DOWN * 2 + PAGE_UP + '3'),
+])
+def test_app_sharing_a_runtime_behaves_the_same(
+    request,
+    tmp_path,
+    blueprint_fixture: str,
+    options: dict,
+    keystrokes: str
+):
+    blueprint = request.getfixturevalue(blueprint_fixture)
+    app_path = write_bash_app(blueprint, str(tmp_path / 'app'))
+    shared_runtime_app_path = write_bash_app(blueprint,
+                                             str(tmp_path / 'shared-runtime'),
+                                             {**options, 'runtime': True})
+    assert (run_app(shared_runtime_app_path, keystrokes)
+            == run_app(app_path, keystrokes))
+
+
+def test_apps_share_one_runtime(blueprint, paged_blueprint, tmp_path):
+    write_bash_app(blueprint, str(tmp_path / 'app'), {'runtime': True})
+    write_bash_app(paged_blueprint, str(tmp_path / 'paged'),
+                   {'runtime': True})
+    assert sorted(os.listdir(tmp_path)) == ['app', RUNTIME_FILE_NAME,
+                                            'paged']
+    assert run_app(str(tmp_path / 'paged'), 'l3').endswith("log 2\n")
+
+
+def test_apps_built_by_other_versions_keep_their_runtime(blueprint,
+                                                         tmp_path):
+    with patch('nacar.translate.to_bash.to_bash.__version__', '0.0.1'):
+        write_bash_app(blueprint, str(tmp_path / 'old'), {'runtime': True})
+    write_bash_app(blueprint, str(tmp_path / 'app'), {'runtime': True})
+    assert sorted(os.listdir(tmp_path)) == ['app', 'nacar-runtime-0.0.1.sh',
+                                            RUNTIME_FILE_NAME, 'old']
+    for app_name in ['old', 'app']:
+        output = run_app(str(tmp_path / app_name), 'db')
+        assert output.endswith("build code\n")
+
+
+def test_apps_find_their_runtime_from_another_directory(
+    shared_runtime_bash_app_path,
+    tmp_path
+):
+    app_dir, app_file_name = os.path.split(shared_runtime_bash_app_path)
+    other_dir = tmp_path / 'other'
+    other_dir.mkdir()
+    relative_app_path = os.path.join('..', app_file_name)
+    output = run_app(relative_app_path, 'db', cwd=str(other_dir))
+    assert output.endswith("build code\n")
+
+    # Running `bash <app>` from the app's directory.
+    result = subprocess.run(['bash', app_file_name], input=b'db',
+                            stdout=subprocess.PIPE, cwd=app_dir, timeout=10)
+    assert result.stdout.decode('utf-8').endswith("build code\n")
+
+
+def test_apps_source_the_runtime_set_in_the_environment(
+    shared_runtime_bash_app_path,
+    tmp_path
+):
+    runtime_path = tmp_path / RUNTIME_FILE_NAME
+    moved_runtime_path = tmp_path / 'lib' / 'runtime.sh'
+    moved_runtime_path.parent.mkdir()
+    os.rename(runtime_path, moved_runtime_path)
+
+    output = run_app(shared_runtime_bash_app_path, 'db',
+                     env={'NACAR_RUNTIME': str(moved_runtime_path)})
+    assert output.endswith("build code\n")
+
+
+def test_apps_check_the_runtime_version(shared_runtime_bash_app_path,
+                                        tmp_path):
+    runtime_path = tmp_path / RUNTIME_FILE_NAME
+    runtime = runtime_path.read_text()
+    runtime_path.write_text(runtime.replace('NACAR_RUNTIME_VERSION="',
+                                            'NACAR_RUNTIME_VERSION="0.0.1+'))
+
+    result = subprocess.run([shared_runtime_bash_app_path], input=b'db',
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            timeout=10)
+    assert result.returncode == 1
+    assert result.stdout == b''
+    assert b"needs version" in result.stderr
+    assert b"is version 0.0.1+" in result.stderr
+
+
+def test_apps_without_their_runtime_exit(shared_runtime_bash_app_path,
+                                         tmp_path):
+    os.remove(tmp_path / RUNTIME_FILE_NAME)
+
+    result = subprocess.run([shared_runtime_bash_app_path], input=b'db',
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            timeout=10)
+    assert result.returncode == 1
+    assert b"Could not find the Nacar runtime" in result.stderr
+
+
+#   Test deduplicating ─────────────────────────────────────────────────────────
+
+@pytest.fixture
+def duplicate_blueprint() -> dict:
+    # 'production' has the same options as 'staging', and 'Quick deploy' runs
+    # the same action as their 'Deploy' option.
+    deploy_options = [{'name': 'Deploy', 'action': "echo 'deploy'"},
+                      {'name': 'Home', 'link': 'home'}]
+    return {
+        'title': 'Duplicate Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [
+            {'name': 'home', 'options': [
+                {'name': 'Staging', 'link': 'staging'},
+                {'name': 'Production', 'link': 'production'},
+                {'name': 'Quick deploy', 'action': "echo 'deploy'"},
+            ]},
+            {'name': 'staging', 'options': deploy_options},
+            {'name': 'production', 'options': deploy_options},
+        ]
+    }
+
+
+@pytest.fixture
+def paged_duplicate_blueprint(duplicate_blueprint) -> dict:
+    duplicate_blueprint['meta']['page_size'] = 1
+    return duplicate_blueprint
+
+
+def test_shared_screens_are_shown_as_themselves(duplicate_blueprint,
+                                                tmp_path):
+    app_path = write_bash_app(duplicate_blueprint, str(tmp_path / 'app'))
+    frame = get_last_frame(run_app(app_path, 'p'))
+    assert frame[3].startswith("│ home › production ")
+    assert "[D]eploy" in frame[5]
+
+    assert run_app(app_path, 'pd').endswith("deploy\n")
+    assert run_app(app_path, 'phq').endswith("deploy\n")
+
+
+@pytest.mark.parametrize('blueprint_fixture,keystrokes', [
+    ('duplicate_blueprint', 'sh\x1b[D\x1b[Dpd'),
+    ('duplicate_blueprint', 'phq'),
+    ('paged_duplicate_blueprint', (PAGE_DOWN + '1') * 2 + PAGE_DOWN * 2 + '1'),
+    ('paged_duplicate_blueprint', PAGE_DOWN + '11'),
+])
+@pytest.mark.parametrize('options', [
+    {'shard': True}, {'table': True}, {'minify': True},
+    {'shard': True, 'minify': True}
+])
+def test_deduplicated_app_behaves_the_same(
+    request,
+    tmp_path,
+    blueprint_fixture: str,
+    keystrokes: str,
+    options: dict
+):
+    blueprint = request.getfixturevalue(blueprint_fixture)
+    app_path = write_bash_app(blueprint, str(tmp_path / 'app'))
+    other_app_path = write_bash_app(blueprint, str(tmp_path / 'other'),
+                                    options)
+    output = run_app(app_path, keystrokes)
+    assert output.endswith("deploy\n")
+    assert run_app(other_app_path, keystrokes) == output
+
+
+#   Test deep links ───────────────────────────────────────────────────────────
+
+DEEP_LINK_OPTIONS = [{}, {'minify': True}, {'shard': True}, {'table': True},
+                     {'runtime': True}]
+
+
+@pytest.mark.parametrize('options', DEEP_LINK_OPTIONS)
+def test_go_opens_the_screen_the_path_leads_to(blueprint, tmp_path,
+                                               options: dict):
+    app_path = write_bash_app(blueprint, str(tmp_path / 'app'), options)
+    output = run_app(app_path, '', args=['--go', 'Develop'])
+    # Only the screen the path leads to is shown.
+    assert output.count('\x1bc') == 2
+    frame = get_last_frame(output)
+    assert frame[3].startswith("│ home › develop ")
+
+    output = run_app(app_path, '\x1b[Dtr', args=['--go', 'develop'])
+    assert output.endswith("run tests\n")
+
+
+@pytest.mark.parametrize('options', DEEP_LINK_OPTIONS)
+def test_run_runs_the_action_without_showing_anything(resident_blueprint,
+                                                      tmp_path,
+                                                      options: dict):
+    app_path = write_bash_app(resident_blueprint, str(tmp_path / 'app'),
+                              options)
+    result = subprocess.run([app_path, '--run', 'ops/Status'],
+                            stdout=subprocess.PIPE, timeout=10)
+    assert result.stdout == b"status\n"
+    assert result.returncode == 3
+
+
+def test_run_follows_shared_screens(duplicate_blueprint, tmp_path):
+    app_path = write_bash_app(duplicate_blueprint, str(tmp_path / 'app'),
+                              {'shard': True})
+    for path in ['production/deploy', 'quick deploy']:
+        assert run_app(app_path, '', args=['--run', path]) == "deploy\n"
+
+
+@pytest.mark.parametrize('args,message', [
+    (['--go', 'develop/test'],
+     "No link to a 'test' screen on the 'develop' screen."),
+    (['--run', 'develop'], "No 'develop' action on the 'home' screen."),
+    (['--run', 'develop/run'], "No 'run' action on the 'develop' screen."),
+    (['--run', ''], "No action given to run."),
+    (['--go'], "Usage:"),
+    (['develop'], "Usage:"),
+])
+@pytest.mark.parametrize('options', DEEP_LINK_OPTIONS)
+def test_invalid_deep_links_fail(blueprint, tmp_path, args: list, message: str,
+                                 options: dict):
+    app_path = write_bash_app(blueprint, str(tmp_path / 'app'), options)
+    result = subprocess.run([app_path, *args], stdin=subprocess.DEVNULL,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            timeout=10)
+    assert result.returncode == 2
+    assert result.stdout == b""
+    assert result.stderr.decode('utf-8').startswith(message)
+
+
+#   Test tracing ──────────────────────────────────────────────────────────────
+
+def test_tracing_logs_screens_keystrokes_and_actions(bash_app_path, tmp_path):
+    trace_path = tmp_path / 'app.trace'
+    output = run_app(bash_app_path, 'dx\x1b[Ddb',
+                     env={'NACAR_TRACE': str(trace_path)})
+    assert output.endswith("build code\n")
+
+    events = TraceAnalyzer.parse_trace_file(str(trace_path))
+    assert [f"{e.code} {e.subject}" for e in events] == [
+        'N home', 'S home', 'D home',
+        'K d', 'N develop', 'S develop', 'D develop',
+        'K x', 'S develop', 'D develop',
+        "K $'\\E'", 'N home', 'S home', 'D home',
+        'K d', 'N develop', 'S develop', 'D develop',
+        'K b', 'A action_develop_1',
+    ]
+    timestamps = [e.timestamp for e in events]
+    assert timestamps == sorted(timestamps)
+
+
+def test_tracing_is_off_by_default(bash_app_path, tmp_path):
+    run_app(bash_app_path, 'db')
+    assert os.listdir(tmp_path) == ['valid-blueprint']
+
+
+#   Test forks ─────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('app_path_fixture', [
+    'bash_app_path',
+    'differential_bash_app_path',
+    'paged_bash_app_path',
+    'sharded_bash_app_path',
+    'table_bash_app_path',
+    'paged_table_bash_app_path',
+    'shared_runtime_bash_app_path'
+])
+def test_navigation_does_not_fork(request, app_path_fixture: str):
+    app_path = request.getfixturevalue(app_path_fixture)
+    # Navigate down, press an unbound key, go back, and down again.
+    keystrokes = ['d', 'x', '\x1b[D', 't', 'x', '\x1b[D', 'd']
+    if app_path_fixture.startswith('paged_'):
+        keystrokes = ['l', PAGE_DOWN, PAGE_DOWN, '9', PAGE_UP, '1', 'l']
+    steps = get_forking_commands_per_keystroke(app_path, ''.join(keystrokes))
+
+    # Startup, one step per keystroke, and reading the end of input.
+    assert len(steps) == 1 + len(keystrokes) + 1
+    assert steps == [[] for _ in steps]
+
+
+def test_tracing_does_not_fork(bash_app_path, tmp_path, monkeypatch):
+    monkeypatch.setenv('NACAR_TRACE', str(tmp_path / 'app.trace'))
+    steps = get_forking_commands_per_keystroke(bash_app_path, 'dx\x1b[Ddb')
+    assert steps == [[] for _ in steps]
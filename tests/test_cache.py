@@ -0,0 +1,162 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the blueprint cache
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Test keying, storing and loading validated blueprints, and translating
+# blueprints found in the cache without parsing or validating them again.
+
+import os
+import shutil
+from copy import deepcopy
+from json import loads as json_loads
+
+import pytest
+
+from nacar.cache import BlueprintCache, get_schema_version
+from nacar.file_io import FileIO
+from nacar.main import Nacar
+from nacar.schema import Schema, InvalidSchemaError
+from nacar.stages import Stage, StageHooks
+from nacar.validator import NacarValidator
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+
+
+@pytest.fixture
+def blueprint(test_data_dir) -> dict:
+    with open(os.path.join(test_data_dir, 'valid-blueprint.json')) as file:
+        return Schema.set_missing_optional_attributes(json_loads(file.read()))
+
+
+@pytest.fixture
+def blueprint_path(test_data_dir, tmp_path) -> str:
+    blueprint_path = str(tmp_path / 'app.yml')
+    shutil.copy(os.path.join(test_data_dir, 'valid-blueprint.yml'),
+                blueprint_path)
+    return blueprint_path
+
+
+@pytest.fixture
+def cache(tmp_path) -> BlueprintCache:
+    return BlueprintCache(str(tmp_path / 'cache'))
+
+
+class RecordingHooks(StageHooks):
+    def __init__(self):
+        self.stages = []
+
+    def on_stage_start(self, stage: Stage) -> None:
+        self.stages.append(stage)
+
+
+def run_nacar(blueprint_path: str, cache: BlueprintCache) -> list:
+    """
+    :return: The stages that ran.
+    """
+    hooks = RecordingHooks()
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  hooks=[hooks], cache=cache)
+    nacar.run(blueprint_path)
+    return hooks.stages
+
+
+#   Test keying entries ────────────────────────────────────────────────────────
+
+def test_get_key(monkeypatch, cache: BlueprintCache, blueprint_path: str):
+    key = cache.get_key(blueprint_path)
+    assert cache.get_key(blueprint_path) == key
+
+    with open(blueprint_path, 'a') as file:
+        file.write('\n')
+    assert cache.get_key(blueprint_path) != key
+
+    monkeypatch.setattr('nacar.cache.__version__', '0.0.1')
+    assert (BlueprintCache(cache.cache_dir).get_key(blueprint_path)
+            != cache.get_key(blueprint_path))
+
+
+def test_schema_version_changes_with_the_schema(monkeypatch):
+    version = get_schema_version()
+    subschemas = deepcopy(Schema.get_blueprint_subschemas())
+    subschemas['meta']['width']['max'] = 200
+    monkeypatch.setattr(Schema, 'get_blueprint_subschemas',
+                        staticmethod(lambda: subschemas))
+    assert get_schema_version() != version
+
+
+#   Test storing and loading entries ──────────────────────────────────────────
+
+def test_store_and_load(cache: BlueprintCache, blueprint: dict):
+    assert cache.load('missing') is None
+    cache.store('key', blueprint)
+    assert cache.load('key') == blueprint
+    assert os.listdir(cache.cache_dir) == ['key.marshal']
+
+
+def test_unreadable_entries_are_missed(cache: BlueprintCache,
+                                       blueprint: dict):
+    cache.store('key', blueprint)
+    with open(cache.get_entry_path('key'), 'r+b') as entry:
+        entry.truncate(10)
+    assert cache.load('key') is None
+
+
+
+def test_entries_that_cannot_be_written_are_skipped(capsys, tmp_path,
+                                                    blueprint: dict,
+                                                    blueprint_path: str):
+    # A file stands where the cache directory would be made.
+    (tmp_path / 'file').write_text('')
+    cache = BlueprintCache(str(tmp_path / 'file' / 'cache'))
+    cache.store('key', blueprint)
+    assert cache.load('key') is None
+
+    assert Stage.TRANSLATE in run_nacar(blueprint_path, cache)
+    assert os.path.exists(os.path.splitext(blueprint_path)[0])
+
+
+#   Test running with a cache ─────────────────────────────────────────────────
+
+def test_cached_blueprints_skip_parsing_and_validating(
+    capsys,
+    cache: BlueprintCache,
+    blueprint_path: str
+):
+    app_path = os.path.splitext(blueprint_path)[0]
+    assert run_nacar(blueprint_path, cache) == [
+        Stage.CACHE_LOAD, Stage.PARSE, Stage.SCHEMA_LOAD, Stage.VALIDATE,
+        Stage.SET_DEFAULTS, Stage.CACHE_STORE, Stage.TRANSLATE, Stage.WRITE,
+        Stage.REPORT
+    ]
+    with open(app_path) as app:
+        translation = app.read()
+
+    assert run_nacar(blueprint_path, cache) == [
+        Stage.CACHE_LOAD, Stage.TRANSLATE, Stage.WRITE, Stage.REPORT
+    ]
+    with open(app_path) as app:
+        assert app.read() == translation
+    assert len(os.listdir(cache.cache_dir)) == 1
+
+
+def test_changed_blueprints_are_validated_again(capsys,
+                                                cache: BlueprintCache,
+                                                blueprint_path: str):
+    run_nacar(blueprint_path, cache)
+    with open(blueprint_path) as file:
+        content = file.read()
+    with open(blueprint_path, 'w') as file:
+        file.write(content.replace('title:', 'titel:', 1))
+
+    with pytest.raises(InvalidSchemaError):
+        run_nacar(blueprint_path, cache)
+    assert len(os.listdir(cache.cache_dir)) == 1
+
+
+def test_missing_blueprints_are_reported(capsys, cache: BlueprintCache,
+                                         tmp_path):
+    assert run_nacar(str(tmp_path / 'missing.yml'), cache) == [
+        Stage.CACHE_LOAD, Stage.PARSE
+    ]
+    assert "does not exist" in capsys.readouterr().out
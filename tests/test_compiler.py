@@ -0,0 +1,302 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the compiler
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Test compiling blueprints in memory, in many threads at once, and from an
+# asyncio event loop: offloading to an executor, bounding concurrency,
+# cancelling, and compiling concurrent requests for the same blueprint once.
+
+import os
+import sys
+import asyncio
+import datetime
+import threading
+from time import sleep
+from contextlib import ExitStack
+from unittest.mock import patch
+from copy import deepcopy
+from json import loads as json_loads
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import pytest
+from cerberus import schema_registry
+
+from nacar.compiler import (AsyncCompiler, CompiledApp, compile_blueprint,
+                            get_blueprint_key)
+from nacar.file_io import FileIO
+from nacar.main import Nacar, TRANSLATORS
+from nacar.schema import Schema, InvalidSchemaError
+from nacar.validator import NacarValidator
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+
+
+@pytest.fixture
+def blueprint(test_data_dir) -> dict:
+    with open(os.path.join(test_data_dir, 'valid-blueprint.json')) as file:
+        return json_loads(file.read())
+
+
+@pytest.fixture
+def blueprint_yml(test_data_dir) -> str:
+    with open(os.path.join(test_data_dir, 'valid-blueprint.yml')) as file:
+        return file.read()
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """
+    A thread pool that counts the compiles it was handed, and the most that
+    ran at once. Compiles take at least `delay` seconds.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(max_workers=8)
+        self.delay = delay
+        self.submitted = 0
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+
+        def run():
+            with self.lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            try:
+                sleep(self.delay)
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.running -= 1
+
+        return super().submit(run)
+
+
+def get_nacar(executor=None, max_concurrency: int = 4) -> Nacar:
+    return Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                 executor=executor, max_concurrency=max_concurrency)
+
+
+#   Test compiling in memory ───────────────────────────────────────────────────
+
+@pytest.fixture
+def fixed_date():
+    # Apps are headed by the date they were translated on, which must not
+    # change between compiles that are compared.
+    translator_modules = ['nacar.translate.to_bash.to_bash',
+                          'nacar.translate.to_python.to_python',
+                          'nacar.translate.to_posix_sh.to_posix_sh']
+    with ExitStack() as stack:
+        for module in translator_modules:
+            dt = stack.enter_context(patch(f"{module}.datetime",
+                                           wraps=datetime.datetime))
+            dt.now.return_value = datetime.datetime(2022, 1, 1)
+        yield
+
+
+def test_compile_blueprint(fixed_date, blueprint: dict, blueprint_yml: str):
+    expected_translation = BlueprintToBash(
+        Schema.set_missing_optional_attributes(deepcopy(blueprint))
+    ).translate_blueprint()
+
+    for source in (blueprint, blueprint_yml):
+        app = compile_blueprint(source, BlueprintToBash)
+        assert app == CompiledApp(expected_translation, {},
+                                  TargetLanguage.BASH)
+
+
+def test_compile_blueprint_leaves_the_blueprint_unchanged(blueprint: dict):
+    original = deepcopy(blueprint)
+    compile_blueprint(blueprint, BlueprintToBash)
+    assert blueprint == original
+
+
+def test_compile_invalid_blueprint(blueprint: dict):
+    del blueprint['title']
+    with pytest.raises(InvalidSchemaError):
+        compile_blueprint(blueprint, BlueprintToBash)
+
+
+def test_get_blueprint_key(blueprint: dict):
+    key = get_blueprint_key(blueprint, BlueprintToBash)
+    reordered = dict(reversed(list(blueprint.items())))
+    assert get_blueprint_key(reordered, BlueprintToBash) == key
+    assert get_blueprint_key(blueprint, BlueprintToBash,
+                             {'minify': True}) != key
+    blueprint['title'] = 'Another title'
+    assert get_blueprint_key(blueprint, BlueprintToBash) != key
+
+
+#   Test compiling in threads ──────────────────────────────────────────────────
+
+PARALLEL_COMPILES = 350
+# The distinct blueprints and options compiled.
+SCENARIOS = 35
+
+
+@pytest.fixture
+def frequent_thread_switches():
+    # Switch threads fifty times as often as by default to bring out races.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-4)
+    yield
+    sys.setswitchinterval(switch_interval)
+
+
+def test_compiling_in_many_threads_at_once(frequent_thread_switches,
+                                           fixed_date,
+                                           blueprint: dict):
+    scenarios = []
+    translator_options = [{}, {'minify': True}, {'shard': True},
+                          {'table': True}, {'runtime': True}]
+    for index in range(SCENARIOS):
+        scenario_blueprint = deepcopy(blueprint)
+        scenario_blueprint['title'] = f"Blueprint {index}"
+        scenario_blueprint['screens'][1]['options'][0]['action'] = \
+            f"echo 'build {index}'"
+        if index % 7 == 0:
+            del scenario_blueprint['screens'][0]['options'][0]['link']
+        if index % 3 == 0:
+            translator_class = TRANSLATORS[['python', 'sh'][index % 2]]
+            options = {}
+        else:
+            translator_class = BlueprintToBash
+            options = translator_options[index % len(translator_options)]
+        scenarios.append((scenario_blueprint, translator_class, options))
+
+    def compile_scenario(scenario):
+        try:
+            return compile_blueprint(*scenario)
+        except InvalidSchemaError as err:
+            return err.message
+
+    expected = [compile_scenario(scenario) for scenario in scenarios]
+    # Each scenario is compiled several times, interleaved with the others.
+    repeats = PARALLEL_COMPILES // SCENARIOS
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        assert (list(executor.map(compile_scenario, scenarios * repeats))
+                == expected * repeats)
+    # Every seventh blueprint links nowhere, so is not valid.
+    assert sum(isinstance(app, str) for app in expected) == SCENARIOS // 7
+    # Compiling never touches Cerberus' global registry.
+    assert schema_registry.all() == {}
+
+
+#   Test compiling asynchronously ──────────────────────────────────────────────
+
+def test_compile_async(blueprint_yml: str):
+    app = asyncio.run(get_nacar().compile_async(blueprint_yml))
+    assert app == compile_blueprint(blueprint_yml, BlueprintToBash)
+
+
+def test_compile_async_in_a_process_pool(blueprint_yml: str):
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        nacar = get_nacar(executor)
+        app = asyncio.run(nacar.compile_async(blueprint_yml))
+        assert app == compile_blueprint(blueprint_yml, BlueprintToBash)
+
+        # Errors raised in the worker reach the caller.
+        with pytest.raises(InvalidSchemaError):
+            asyncio.run(nacar.compile_async("title: Missing screens"))
+
+
+def test_identical_concurrent_requests_compile_once(blueprint: dict):
+    executor = CountingExecutor(delay=0.05)
+    nacar = get_nacar(executor)
+
+    async def burst():
+        return await asyncio.gather(*[nacar.compile_async(blueprint)
+                                      for _ in range(10)])
+
+    apps = asyncio.run(burst())
+    assert executor.submitted == 1
+    assert all(app == apps[0] for app in apps)
+    assert nacar.async_compiler.in_flight == {}
+
+    # Requests made once the compile has finished compile again.
+    asyncio.run(nacar.compile_async(blueprint))
+    assert executor.submitted == 2
+    executor.shutdown()
+
+
+def test_concurrency_is_bounded(blueprint: dict):
+    executor = CountingExecutor(delay=0.05)
+    nacar = get_nacar(executor, max_concurrency=2)
+
+    async def burst():
+        blueprints = []
+        for index in range(6):
+            blueprints.append(deepcopy(blueprint))
+            blueprints[-1]['title'] = f"Blueprint {index}"
+        return await asyncio.gather(*[nacar.compile_async(b)
+                                      for b in blueprints])
+
+    asyncio.run(burst())
+    assert executor.submitted == 6
+    assert executor.max_running == 2
+    executor.shutdown()
+
+
+def test_cancelling_one_caller_leaves_the_others(blueprint: dict):
+    executor = CountingExecutor(delay=0.1)
+    nacar = get_nacar(executor)
+
+    async def cancel_one():
+        cancelled = asyncio.ensure_future(nacar.compile_async(blueprint))
+        kept = asyncio.ensure_future(nacar.compile_async(blueprint))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        app = await kept
+        assert cancelled.cancelled()
+        return app
+
+    app = asyncio.run(cancel_one())
+    assert app == compile_blueprint(blueprint, BlueprintToBash)
+    assert executor.submitted == 1
+    executor.shutdown()
+
+
+def test_cancelling_a_waiting_compile_never_runs_it(blueprint: dict):
+    executor = CountingExecutor(delay=0.1)
+    nacar = get_nacar(executor, max_concurrency=1)
+    other_blueprint = deepcopy(blueprint)
+    other_blueprint['title'] = 'Another title'
+
+    async def cancel_waiting():
+        running = asyncio.ensure_future(nacar.compile_async(blueprint))
+        waiting = asyncio.ensure_future(nacar.compile_async(other_blueprint))
+        await asyncio.sleep(0.01)
+        waiting.cancel()
+        await running
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(cancel_waiting())
+    assert executor.submitted == 1
+    assert nacar.async_compiler.in_flight == {}
+    executor.shutdown()
+
+
+def test_compile_async_does_not_block_the_event_loop(monkeypatch,
+                                                      blueprint: dict):
+    def slow_compile(*args):
+        sleep(0.2)
+        return compile_blueprint(*args)
+
+    monkeypatch.setattr('nacar.compiler.compile_blueprint', slow_compile)
+    compiler = AsyncCompiler(BlueprintToBash)
+
+    async def tick_while_compiling():
+        ticks = 0
+        compiling = asyncio.ensure_future(compiler.compile(blueprint))
+        while not compiling.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        await compiling
+        return ticks
+
+    assert asyncio.run(tick_while_compiling()) >= 10
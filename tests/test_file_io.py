@@ -119,6 +119,18 @@ def test_writing_bash_app_to_file(nacar_app_as_string):
     assert bash_result_str == ('-' * 42)
 
 
+def test_writing_python_app_to_file():
+    tmp_file_path = os.path.join('/tmp', 'nacar_test-writing-python-app.py')
+    FileIO.write_nacar_app_to_file(
+        "#!/usr/bin/env python3\nprint('-' * 42)\n",
+        tmp_file_path,
+        TargetLanguage.PYTHON
+    )
+
+    python_result = subprocess.run([tmp_file_path], stdout=subprocess.PIPE)
+    assert python_result.stdout.decode('utf-8') == ('-' * 42) + '\n'
+
+
 def test_writing_bash_app_to_file_sets_executable_permissions(nacar_app_as_string):  # noqa
     tmp_file_path = os.path.join('/tmp', 'nacar_test-writing-bash-sets-executable-permissions')  # noqa
     FileIO.write_nacar_app_to_file(
@@ -127,3 +139,43 @@ def test_writing_bash_app_to_file_sets_executable_permissions(nacar_app_as_strin
         TargetLanguage.BASH
     )
     assert file_is_executable_by_everyone(tmp_file_path) is True
+
+
+#   Test `write_nacar_app_screens_to_dir()` ───────────────────────────────────
+
+def test_writing_bash_app_screens_replaces_stale_screens(tmp_path):
+    screens_dir = tmp_path / 'app.screens'
+    screens_dir.mkdir()
+    (screens_dir / 'removed.sh').write_text('show_removed_screen() { :; }')
+
+    FileIO.write_nacar_app_screens_to_dir(
+        {'home': 'show_home_screen() { :; }'},
+        str(screens_dir),
+        TargetLanguage.BASH
+    )
+    assert os.listdir(screens_dir) == ['home.sh']
+    assert (screens_dir / 'home.sh').read_text() == 'show_home_screen() { :; }'  # noqa
+
+
+#   Test `write_nacar_runtime_to_dir()` ────────────────────────────────────────
+
+def test_writing_bash_runtime_skips_identical_runtimes(tmp_path):
+    runtime_files = {'nacar-runtime.sh': 'clear_screen() { :; }'}
+    runtime_path = tmp_path / 'nacar-runtime.sh'
+
+    assert FileIO.write_nacar_runtime_to_dir(
+        runtime_files, str(tmp_path), TargetLanguage.BASH
+    ) == ['nacar-runtime.sh']
+    modified_at = os.stat(runtime_path).st_mtime_ns
+    assert FileIO.write_nacar_runtime_to_dir(
+        runtime_files, str(tmp_path), TargetLanguage.BASH
+    ) == []
+    assert os.stat(runtime_path).st_mtime_ns == modified_at
+
+    FileIO.write_nacar_runtime_to_dir(
+        {'nacar-runtime.sh': 'clear_screen() { printf "\\033c"; }'},
+        str(tmp_path),
+        TargetLanguage.BASH
+    )
+    assert runtime_path.read_text() == 'clear_screen() { printf "\\033c"; }'
+    assert os.listdir(tmp_path) == ['nacar-runtime.sh']
@@ -7,15 +7,25 @@
 # Test parsing blueprint path from arguments, injecting dependencies,
 # instantiating the Nacar class, and calling `run()` on it.
 
+import io
 import os
+import json
+import shutil
+import tracemalloc
 
 import pytest
 
+from nacar.__version__ import __version__
 from nacar.file_io import FileIO
 from nacar.schema import Schema
 from nacar.validator import NacarValidator
 from nacar.translate.to_bash.to_bash import BlueprintToBash
+from nacar.translate.to_python.to_python import BlueprintToPython
+from nacar.translate.to_posix_sh.to_posix_sh import BlueprintToPosixSh
 from nacar.main import Nacar
+from nacar.stages import (Stage, StageHooks, StageTimings, StageMemory,
+                          MemoryBudgetExceededError, format_memory_size,
+                          parse_memory_size)
 
 
 @pytest.fixture
@@ -37,9 +47,299 @@ def test_get_blueprint_path_from_arguments(arguments: list, error_type, error_ms
         Nacar.get_blueprint_path_from_arguments(arguments)
 
 
+@pytest.mark.parametrize('arguments,target,minify,shard,table', [
+    (['main.py', 'blueprint.yml'], 'bash', False, False, False),
+    (['main.py', 'blueprint.yml', '--minify'], 'bash', True, False, False),
+    (['main.py', 'blueprint.yml', '--shard', '--minify'], 'bash', True, True, False),  # noqa
+    (['main.py', 'blueprint.yml', '--table', '--minify'], 'bash', True, False, True),  # noqa
+    (['main.py', 'blueprint.yml', '--target', 'python'], 'python', False, False, False),  # noqa
+    (['main.py', 'blueprint.yml', '--target', 'sh'], 'sh', False, False, False),  # noqa
+])
+def test_get_options_from_arguments(arguments: list, target: str, minify: bool, shard: bool, table: bool):  # noqa
+    options = Nacar.get_options_from_arguments(arguments)
+    assert options.target == target
+    assert options.minify is minify
+    assert options.shard is shard
+    assert options.table is table
+
+
+@pytest.mark.parametrize('arguments', [
+    ['main.py', 'blueprint.yml', '--target', 'cobol'],
+    ['main.py', 'blueprint.yml', '--target', 'python', '--minify'],
+    ['main.py', 'blueprint.yml', '--target', 'python', '--shard'],
+    ['main.py', 'blueprint.yml', '--target', 'sh', '--minify'],
+    ['main.py', 'blueprint.yml', '--target', 'sh', '--table'],
+    ['main.py', 'blueprint.yml', '--target', 'python', '--runtime'],
+    ['main.py', 'blueprint.yml', '--shard', '--table'],
+])
+def test_get_invalid_options_from_arguments(capsys, arguments: list):
+    with pytest.raises(SystemExit):
+        Nacar.get_options_from_arguments(arguments)
+    assert "nacar: error:" in capsys.readouterr().err
+
+
 def test_success_message(capsys, test_data_dir, nacar: Nacar):
     path_to_blueprint = os.path.join(test_data_dir, 'valid-blueprint.yml')
     nacar.run(path_to_blueprint)
     captured = capsys.readouterr()
-    assert captured.out == "\nConverted blueprint 'valid-blueprint.yml' to bash Nacar app 'valid-blueprint'. Wrote 255 lines.\n\n"  # noqa
+    assert captured.out == "\nConverted blueprint 'valid-blueprint.yml' to bash Nacar app 'valid-blueprint'. Wrote 553 lines.\n\n"  # noqa
+    os.remove(os.path.join(test_data_dir, 'valid-blueprint'))
+
+
+def test_minified_app_is_shorter(capsys, test_data_dir):
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  {'minify': True})
+    path_to_blueprint = os.path.join(test_data_dir, 'valid-blueprint.yml')
+    nacar.run(path_to_blueprint)
+    captured = capsys.readouterr()
+    assert captured.out == "\nConverted blueprint 'valid-blueprint.yml' to bash Nacar app 'valid-blueprint'. Wrote 372 lines.\n\n"  # noqa
     os.remove(os.path.join(test_data_dir, 'valid-blueprint'))
+
+
+def test_sharded_app_writes_a_file_per_screen(capsys, test_data_dir):
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  {'shard': True})
+    path_to_blueprint = os.path.join(test_data_dir, 'valid-blueprint.yml')
+    nacar.run(path_to_blueprint)
+    captured = capsys.readouterr()
+    assert captured.out == "\nConverted blueprint 'valid-blueprint.yml' to bash Nacar app 'valid-blueprint'. Wrote 475 lines and 3 screen files to 'valid-blueprint.screens'.\n\n"  # noqa
+    screens_dir = os.path.join(test_data_dir, 'valid-blueprint.screens')
+    assert sorted(os.listdir(screens_dir)) == ['develop.sh', 'home.sh',
+                                               'test.sh']
+    os.remove(os.path.join(test_data_dir, 'valid-blueprint'))
+    shutil.rmtree(screens_dir)
+
+
+def test_table_app_success_message(capsys, test_data_dir):
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  {'table': True})
+    path_to_blueprint = os.path.join(test_data_dir, 'valid-blueprint.yml')
+    nacar.run(path_to_blueprint)
+    captured = capsys.readouterr()
+    assert captured.out == "\nConverted blueprint 'valid-blueprint.yml' to bash Nacar app 'valid-blueprint'. Wrote 582 lines.\n\n"  # noqa
+    os.remove(os.path.join(test_data_dir, 'valid-blueprint'))
+
+
+def test_apps_sharing_a_runtime_write_it_once(capsys, tmp_path,
+                                             test_data_dir):
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  {'runtime': True})
+    for app_name in ['first', 'second']:
+        shutil.copy(os.path.join(test_data_dir, 'valid-blueprint.yml'),
+                    tmp_path / f"{app_name}.yml")
+    nacar.run(str(tmp_path / 'first.yml'))
+    nacar.run(str(tmp_path / 'second.yml'))
+    captured = capsys.readouterr()
+    runtime_file_name = f"nacar-runtime-{__version__}.sh"
+    assert captured.out == (
+        f"\nConverted blueprint 'first.yml' to bash Nacar app 'first'. Wrote 324 lines. Wrote the runtime it sources to '{runtime_file_name}'.\n\n"  # noqa
+        f"\nConverted blueprint 'second.yml' to bash Nacar app 'second'. Wrote 324 lines. The runtime it sources in '{runtime_file_name}' was already up to date.\n\n"  # noqa
+    )
+    assert sorted(os.listdir(tmp_path)) == ['first', 'first.yml',
+                                            runtime_file_name, 'second',
+                                            'second.yml']
+
+
+def test_python_app_success_message(capsys, test_data_dir):
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToPython)
+    path_to_blueprint = os.path.join(test_data_dir, 'valid-blueprint.yml')
+    nacar.run(path_to_blueprint)
+    captured = capsys.readouterr()
+    assert captured.out == "\nConverted blueprint 'valid-blueprint.yml' to Python Nacar app 'valid-blueprint.py'. Wrote 366 lines.\n\n"  # noqa
+    os.remove(os.path.join(test_data_dir, 'valid-blueprint.py'))
+
+
+def test_posix_sh_app_success_message(capsys, test_data_dir):
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToPosixSh)
+    path_to_blueprint = os.path.join(test_data_dir, 'valid-blueprint.yml')
+    nacar.run(path_to_blueprint)
+    captured = capsys.readouterr()
+    assert captured.out == "\nConverted blueprint 'valid-blueprint.yml' to POSIX sh Nacar app 'valid-blueprint'. Wrote 304 lines.\n\n"  # noqa
+    os.remove(os.path.join(test_data_dir, 'valid-blueprint'))
+
+
+def test_options_hidden_by_key_are_warned_about(capsys, monkeypatch,
+                                                tmp_path, nacar: Nacar):
+    stderr = io.StringIO()
+    monkeypatch.setattr('nacar.main.stderr', stderr)
+    blueprint_path = tmp_path / 'blueprint.yml'
+    blueprint_path.write_text(
+        "title: Blueprint\n"
+        "meta:\n"
+        "  authors: [Author]\n"
+        "screens:\n"
+        "  - name: home\n"
+        "    options:\n"
+        "      - name: Deploy\n"
+        "        action: make deploy\n"
+        "      - name: Debug\n"
+        "        action: make debug\n")
+    nacar.run(str(blueprint_path))
+    captured = capsys.readouterr()
+    assert stderr.getvalue() == "Warning: Screen 'home' has options that cannot be selected by key, as an earlier option's name starts with the same letter: 'Debug'. Set `key` on them.\n"  # noqa
+    assert "Converted blueprint 'blueprint.yml'" in captured.out
+
+
+#   Test stage hooks ───────────────────────────────────────────────────────────
+
+# The stages run when no blueprint cache is used and the app is not measured.
+UNCACHED_STAGES = [stage for stage in Stage
+                   if stage not in (Stage.CACHE_LOAD, Stage.CACHE_STORE,
+                                    Stage.MEASURE)]
+
+
+class RecordingHooks(StageHooks):
+    def __init__(self):
+        self.events = []
+
+    def on_stage_start(self, stage: Stage) -> None:
+        self.events.append(('start', stage))
+
+    def on_stage_end(self, stage: Stage) -> None:
+        self.events.append(('end', stage))
+
+
+@pytest.mark.parametrize('arguments,timings,profile', [
+    (['main.py', 'blueprint.yml'], None, None),
+    (['main.py', 'blueprint.yml', '--timings'], 'table', None),
+    (['main.py', 'blueprint.yml', '--timings', 'json'], 'json', None),
+    (['main.py', 'blueprint.yml', '--profile', 'out.prof'], None, 'out.prof'),  # noqa
+])
+def test_get_instrumentation_options_from_arguments(arguments: list, timings, profile):  # noqa
+    options = Nacar.get_options_from_arguments(arguments)
+    assert options.timings == timings
+    assert options.profile == profile
+
+
+def test_get_cache_option_from_arguments():
+    assert Nacar.get_options_from_arguments(['main.py', 'blueprint.yml']) \
+        .cache is None
+    options = Nacar.get_options_from_arguments(['main.py', 'blueprint.yml',
+                                                '--cache', '/tmp/nacar'])
+    assert options.cache == '/tmp/nacar'
+
+
+def test_hooks_are_told_when_each_stage_starts_and_ends(capsys, test_data_dir):  # noqa
+    hooks = RecordingHooks()
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  hooks=[hooks])
+    nacar.run(os.path.join(test_data_dir, 'valid-blueprint.yml'))
+    os.remove(os.path.join(test_data_dir, 'valid-blueprint'))
+
+    expected_events = []
+    for stage in UNCACHED_STAGES:
+        expected_events += [('start', stage), ('end', stage)]
+    assert hooks.events == expected_events
+
+
+def test_failed_stage_still_ends(capsys, test_data_dir):
+    hooks = RecordingHooks()
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  hooks=[hooks])
+    nacar.run(os.path.join(test_data_dir, 'inexistent.yml'))
+    assert hooks.events == [('start', Stage.PARSE), ('end', Stage.PARSE)]
+
+
+def test_stage_timings(capsys, test_data_dir):
+    timings = StageTimings()
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  hooks=[timings])
+    nacar.run(os.path.join(test_data_dir, 'valid-blueprint.yml'))
+    os.remove(os.path.join(test_data_dir, 'valid-blueprint'))
+
+    assert list(timings.timings) == UNCACHED_STAGES
+    report = json.loads(timings.to_json())
+    assert list(report['stages']) == [stage.value for stage in UNCACHED_STAGES]  # noqa
+    assert report['total']['wall_ms'] >= report['stages']['translate']['wall_ms']  # noqa
+    table = timings.to_table().split('\n')
+    assert table[0].split() == ['stage', 'wall', 'ms', 'cpu', 'ms']
+    assert table[-1].startswith('total')
+
+
+#   Test memory accounting ─────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('size,expected_bytes', [
+    ('1024', 1024),
+    ('512K', 512 * 1024),
+    ('1.5M', 3 * 2 ** 19),
+    ('2G', 2 * 2 ** 30),
+    ('64MiB', 64 * 2 ** 20),
+    ('64mb', 64 * 2 ** 20),
+])
+def test_parse_memory_size(size: str, expected_bytes: int):
+    assert parse_memory_size(size) == expected_bytes
+
+
+@pytest.mark.parametrize('size,expected', [
+    (0, '0 B'),
+    (1023, '1023 B'),
+    (1536, '1.5 KiB'),
+    (3 * 2 ** 19, '1.5 MiB'),
+])
+def test_format_memory_size(size: int, expected: str):
+    assert format_memory_size(size) == expected
+
+
+@pytest.mark.parametrize('size', ['', 'M', '12X', '-1G'])
+def test_parse_invalid_memory_size(size: str):
+    with pytest.raises(ValueError):
+        parse_memory_size(size)
+
+
+@pytest.mark.parametrize('arguments,memory,max_memory', [
+    (['main.py', 'blueprint.yml', '--memory'], 'table', None),
+    (['main.py', 'blueprint.yml', '--memory', 'json'], 'json', None),
+    (['main.py', 'blueprint.yml', '--max-memory', '2G'], None, 2 * 2 ** 30),
+])
+def test_get_memory_options_from_arguments(arguments: list, memory, max_memory):  # noqa
+    options = Nacar.get_options_from_arguments(arguments)
+    assert options.memory == memory
+    assert options.max_memory == max_memory
+
+
+def test_stage_memory(capsys, test_data_dir):
+    memory = StageMemory()
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  hooks=[memory])
+    nacar.run(os.path.join(test_data_dir, 'valid-blueprint.yml'))
+    memory.stop()
+    os.remove(os.path.join(test_data_dir, 'valid-blueprint'))
+
+    assert list(memory.memory) == UNCACHED_STAGES
+    translate = memory.memory[Stage.TRANSLATE]
+    assert translate['peak_bytes'] >= translate['current_bytes'] > 0
+    report = json.loads(memory.to_json())
+    assert report['peak_bytes'] >= translate['peak_bytes']
+    assert report['budget_bytes'] is None
+
+
+def test_stage_memory_without_reset_peak(monkeypatch):
+    # Python 3.7 and 3.8 cannot reset the peak at the start of each stage.
+    monkeypatch.delattr(tracemalloc, 'reset_peak', raising=False)
+    memory = StageMemory()
+    memory.on_stage_start(Stage.PARSE)
+    allocated = bytearray(2 ** 20)
+    del allocated
+    memory.on_stage_end(Stage.PARSE)
+    memory.on_stage_start(Stage.VALIDATE)
+    memory.on_stage_end(Stage.VALIDATE)
+    memory.stop()
+
+    assert memory.memory[Stage.PARSE]['peak_bytes'] >= 2 ** 20
+    # The peak reached by the first stage is not counted towards the next.
+    assert memory.memory[Stage.VALIDATE]['peak_bytes'] < 2 ** 20
+
+
+def test_exceeding_the_memory_budget_aborts_the_run(capsys, test_data_dir):
+    timings = StageTimings()
+    memory = StageMemory(budget=1)
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  hooks=[timings, memory])
+    with pytest.raises(MemoryBudgetExceededError,
+                       match="The 'parse' stage allocated .* [KM]iB, over "
+                             "the memory budget of 1 B."):
+        nacar.run(os.path.join(test_data_dir, 'valid-blueprint.yml'))
+    memory.stop()
+
+    assert list(timings.timings) == [Stage.PARSE]
+    assert not os.path.exists(os.path.join(test_data_dir, 'valid-blueprint'))
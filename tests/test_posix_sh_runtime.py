@@ -0,0 +1,210 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the runtime of POSIX sh Nacar apps
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Translate a blueprint, write the resulting Nacar app to a file, and run it
+# with dash and scripted keystrokes, checking it behaves as the bash app does.
+
+import os
+import shutil
+import subprocess
+from json import loads as json_loads
+from time import sleep
+
+import pytest
+
+from nacar.file_io import FileIO
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_posix_sh.to_posix_sh import BlueprintToPosixSh
+from tests.test_bash_runtime import write_bash_app
+from tests.utils import run_app_in_terminal
+
+
+pytestmark = pytest.mark.skipif(shutil.which('dash') is None,
+                                reason="dash is not installed.")
+
+LEFT_ARROW, ESC = '\x1b[D', '\x1b'
+PAGE_UP, PAGE_DOWN = '\x1b[5~', '\x1b[6~'
+
+
+@pytest.fixture
+def blueprint(test_data_dir) -> dict:
+    with open(os.path.join(test_data_dir, 'valid-blueprint.json')) as file:
+        return json_loads(file.read())
+
+
+@pytest.fixture
+def paged_blueprint() -> dict:
+    # Every fifth option of the 'logs' screen links back home.
+    return {
+        'title': 'Paged Blueprint',
+        'meta': {'authors': ['Author'], 'page_size': 10},
+        'screens': [
+            {'name': 'home', 'options': [{'name': 'Logs', 'link': 'logs'}]},
+            {'name': 'logs', 'options': [
+                {'name': f"Home {i}", 'link': 'home'} if i % 5 == 0
+                else {'name': f"Log {i}", 'action': f"echo 'log {i}'"}
+                for i in range(25)
+            ]}
+        ]
+    }
+
+
+@pytest.fixture
+def keyed_blueprint() -> dict:
+    return {
+        'title': 'Keyed Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [{'name': 'home', 'options': [
+            {'name': 'Deploy', 'key': 'de', 'action': "echo 'deploy'"},
+            {'name': 'Docs', 'key': 'do', 'action': "echo 'docs'"},
+            {'name': 'Build', 'key': '2', 'action': "echo 'build'"},
+            {'name': 'Test', 'action': "echo 'test'"},
+        ]}]
+    }
+
+
+@pytest.fixture
+def resident_blueprint() -> dict:
+    return {
+        'title': 'Resident Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [
+            {'name': 'home', 'options': [
+                {'name': 'Ops', 'link': 'ops'},
+                {'name': 'Quit', 'action': "echo 'quit'"},
+            ]},
+            {'name': 'ops', 'options': [
+                # Actions run in place cannot exit the app.
+                {'name': 'Status', 'action': "echo 'status'; exit 3",
+                 'run': 'in_place'},
+                {'name': 'Build', 'action': "sleep 0.3", 'run': 'in_background'},  # noqa
+                {'name': 'Fail', 'action': "false", 'run': 'in_background'},
+            ]},
+        ]
+    }
+
+
+def write_posix_sh_app(blueprint: dict, app_path: str) -> str:
+    blueprint = Schema.set_missing_optional_attributes(blueprint)
+    FileIO.write_nacar_app_to_file(
+        BlueprintToPosixSh(blueprint).translate_blueprint(),
+        app_path,
+        TargetLanguage.POSIX_SH
+    )
+    return app_path
+
+
+@pytest.fixture
+def posix_sh_app_path(blueprint, tmp_path) -> str:
+    return write_posix_sh_app(blueprint, str(tmp_path / 'app'))
+
+
+def run_app(command: list, keystrokes: str) -> str:
+    result = subprocess.run(command,
+                            input=keystrokes.encode('utf-8'),
+                            stdout=subprocess.PIPE,
+                            env={**os.environ, 'LC_ALL': 'C.UTF-8'},
+                            timeout=10)
+    return result.stdout.decode('utf-8')
+
+
+#   Test behaviour ─────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('blueprint_fixture,keystrokes', [
+    ('blueprint', ''),
+    ('blueprint', 'db'),
+    ('blueprint', 'DB'),
+    ('blueprint', 'd' + LEFT_ARROW + 'tr'),
+    ('blueprint', 'dx' + LEFT_ARROW + LEFT_ARROW + 't' + ESC),
+    ('blueprint', 'd\x1b[Cb'),
+    ('paged_blueprint', 'l' + PAGE_DOWN * 3 + PAGE_UP),
+    ('paged_blueprint', 'l3'),
+    ('paged_blueprint', 'l' + PAGE_DOWN + '1l' + PAGE_DOWN * 2 + '4'),
+    ('paged_blueprint', 'l' + PAGE_DOWN * 2 + '9'),
+    ('keyed_blueprint', 'de'),
+    ('keyed_blueprint', 'DO'),
+    ('keyed_blueprint', '2'),
+    # A key that does not carry on from the keys before it starts afresh.
+    ('keyed_blueprint', 'dt'),
+    ('keyed_blueprint', 'd' + ESC),
+    ('resident_blueprint', 'os '),
+    ('resident_blueprint', 'os ' + LEFT_ARROW + 'q'),
+    # Build is still running when the frame after starting it is drawn.
+    # Whether Fail has failed by then depends on timing.
+    ('resident_blueprint', 'ob' + ESC),
+])
+def test_app_run_by_dash_behaves_as_the_bash_app(
+    request,
+    tmp_path,
+    blueprint_fixture: str,
+    keystrokes: str
+):
+    blueprint = request.getfixturevalue(blueprint_fixture)
+    bash_app_path = write_bash_app(blueprint, str(tmp_path / 'bash'))
+    posix_sh_app_path = write_posix_sh_app(blueprint, str(tmp_path / 'sh'))
+    assert (run_app(['dash', posix_sh_app_path], keystrokes)
+            == run_app([bash_app_path], keystrokes))
+
+
+def test_app_runs_with_sh(posix_sh_app_path):
+    with open(posix_sh_app_path) as app:
+        assert app.readline() == "#!/bin/sh\n"
+
+
+def test_option_names_are_not_expanded(tmp_path):
+    blueprint = {
+        'title': "It's $TITLE",
+        'meta': {'authors': ['Author']},
+        'screens': [{'name': 'home', 'options': [
+            {'name': "Show $HOME's `pwd`", 'action': "echo 'shown'"}
+        ]}]
+    }
+    app_path = write_posix_sh_app(blueprint, str(tmp_path / 'app'))
+    output = run_app(['dash', app_path], 's')
+    assert "It's $TITLE" in output
+    assert "]how $HOME's `pwd` " in output
+    assert output.endswith("shown\n")
+
+
+def test_background_jobs_show_their_status(resident_blueprint, tmp_path):
+    app_path = write_posix_sh_app(resident_blueprint, str(tmp_path / 'app'))
+    app = subprocess.Popen(['dash', app_path], stdin=subprocess.PIPE,
+                           stdout=subprocess.PIPE,
+                           env={**os.environ, 'LC_ALL': 'C.UTF-8'})
+    app.stdin.write(b'obf')
+    app.stdin.flush()
+    # Piped input cannot be waited on for a second at a time, so the status
+    # is updated by the next key.
+    sleep(1)
+    output, _ = app.communicate(b'x\x1b', timeout=10)
+    frames = output.decode('utf-8').split('\x1bc')
+    assert "Build: running  Fail: " in frames[-3]
+    assert "Build: done  Fail: failed (1)" in frames[-2]
+
+
+#   Test terminal ──────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('keystrokes,expected_output', [
+    ('db', "build code\r\n"),
+    ('d' + LEFT_ARROW + 'tr', "run tests\r\n"),
+    ('d' + ESC, "Exited \U0001F41A Made with Nacar \r\n\r\n"),
+])
+def test_reading_keystrokes_from_a_terminal(
+    posix_sh_app_path,
+    keystrokes: str,
+    expected_output: str
+):
+    output = run_app_in_terminal(posix_sh_app_path, keystrokes)
+    assert output.endswith(expected_output)
+
+
+
+def test_actions_run_in_place_in_a_terminal(resident_blueprint, tmp_path):
+    app_path = write_posix_sh_app(resident_blueprint, str(tmp_path / 'app'))
+    output = run_app_in_terminal(app_path, 'os ' + LEFT_ARROW + 'q')
+    assert "Finished with status 3." in output
+    assert output.endswith("quit\r\n")
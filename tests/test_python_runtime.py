@@ -0,0 +1,234 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the runtime of Python Nacar apps
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Translate a blueprint, write the resulting Nacar app to a file, and run
+# it under a pseudo-terminal with scripted keystrokes to test its behaviour.
+
+import os
+import re
+from json import loads as json_loads
+from typing import Dict
+
+import pytest
+
+from nacar.file_io import FileIO
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_python.to_python import BlueprintToPython
+from tests.utils import run_app_in_terminal
+
+
+LEFT_ARROW, ESC = '\x1b[D', '\x1b'
+PAGE_UP, PAGE_DOWN = '\x1b[5~', '\x1b[6~'
+
+
+@pytest.fixture
+def blueprint(test_data_dir) -> dict:
+    with open(os.path.join(test_data_dir, 'valid-blueprint.json')) as file:
+        return json_loads(file.read())
+
+
+@pytest.fixture
+def paged_blueprint() -> dict:
+    # Every fifth option of the 'logs' screen links back home.
+    return {
+        'title': 'Paged Blueprint',
+        'meta': {'authors': ['Author'], 'page_size': 10},
+        'screens': [
+            {'name': 'home', 'options': [{'name': 'Logs', 'link': 'logs'}]},
+            {'name': 'logs', 'options': [
+                {'name': f"Home {i}", 'link': 'home'} if i % 5 == 0
+                else {'name': f"Log {i}", 'action': f"echo 'log {i}'"}
+                for i in range(25)
+            ]}
+        ]
+    }
+
+
+@pytest.fixture
+def keyed_blueprint() -> dict:
+    return {
+        'title': 'Keyed Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [{'name': 'home', 'options': [
+            {'name': 'Deploy', 'key': 'de', 'action': "echo 'deploy'"},
+            {'name': 'Docs', 'key': 'do', 'action': "echo 'docs'"},
+            {'name': 'Build', 'key': '2', 'action': "echo 'build'"},
+            {'name': 'Test', 'action': "echo 'test'"},
+        ]}]
+    }
+
+
+@pytest.fixture
+def resident_blueprint() -> dict:
+    return {
+        'title': 'Resident Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [
+            {'name': 'home', 'options': [
+                {'name': 'Ops', 'link': 'ops'},
+                {'name': 'Quit', 'action': "echo 'quit'"},
+            ]},
+            {'name': 'ops', 'options': [
+                # Actions run in place cannot exit the app.
+                {'name': 'Status', 'action': "echo 'status'; exit 3",
+                 'run': 'in_place'},
+                {'name': 'Build', 'action': "sleep 0.3", 'run': 'in_background'},  # noqa
+                {'name': 'Fail', 'action': "false", 'run': 'in_background'},
+            ]},
+        ]
+    }
+
+
+def write_python_app(blueprint: dict, app_path: str) -> str:
+    blueprint = Schema.set_missing_optional_attributes(blueprint)
+    FileIO.write_nacar_app_to_file(
+        BlueprintToPython(blueprint).translate_blueprint(),
+        app_path,
+        TargetLanguage.PYTHON
+    )
+    return app_path
+
+
+@pytest.fixture
+def python_app_path(blueprint, tmp_path) -> str:
+    return write_python_app(blueprint, str(tmp_path / 'app.py'))
+
+
+@pytest.fixture
+def paged_python_app_path(paged_blueprint, tmp_path) -> str:
+    return write_python_app(paged_blueprint, str(tmp_path / 'paged.py'))
+
+
+def get_text(output: str) -> str:
+    # Drop the escape sequences curses uses to move around and style text.
+    return re.sub(r'\x1b(\[[?0-9;]*[A-Za-z]|\([AB]|[=>])|\x08', '', output)
+
+
+#   Test navigation ────────────────────────────────────────────────────────────
+
+def test_first_frame_shows_the_home_screen(python_app_path):
+    text = get_text(run_app_in_terminal(python_app_path, ESC))
+    assert "Global Title" in text
+    assert "[D]evelop" in text
+    assert "[T]est" in text
+
+
+@pytest.mark.parametrize('keystrokes,expected_output', [
+    ('db', "build code\r\n"),
+    ('DB', "build code\r\n"),
+    ('d' + LEFT_ARROW + 'tr', "run tests\r\n"),
+    # Unbound keys and escape sequences are ignored.
+    ('xd\x1b[Cb', "build code\r\n"),
+    # Arrow keys as sent by terminals in application mode.
+    ('d\x1bODtr', "run tests\r\n"),
+])
+def test_invoking_an_action(
+    python_app_path,
+    keystrokes: str,
+    expected_output: str
+):
+    output = run_app_in_terminal(python_app_path, keystrokes)
+    assert output.endswith(expected_output)
+
+
+def test_escape_exits_at_once(python_app_path):
+    timings: Dict[str, float] = {}
+    output = run_app_in_terminal(python_app_path, ESC, timings)
+    assert "Exited" in output
+    # ESC is told apart from the start of an escape sequence without waiting
+    # for more input, as apps once did for a tenth of a second.
+    assert timings['exited'] - timings['keystrokes_sent'] < 0.1
+
+
+def test_exiting_with_escape(python_app_path):
+    output = run_app_in_terminal(python_app_path, 'd' + ESC)
+    assert output.endswith("Exited \U0001F41A Made with Nacar \r\n\r\n")
+
+
+def test_navigating_back_redraws_the_home_screen(python_app_path):
+    output = run_app_in_terminal(python_app_path, 'd' + LEFT_ARROW + ESC)
+    text = get_text(output)
+    assert text.rindex("home") > text.rindex("develop")
+
+
+#   Test keys ──────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('keystrokes,expected_output', [
+    ('de', "deploy\r\n"),
+    ('DO', "docs\r\n"),
+    ('2', "build\r\n"),
+    # A key that does not carry on from the keys before it starts afresh.
+    ('dt', "test\r\n"),
+])
+def test_selecting_options_by_keys_of_many_characters(
+    keyed_blueprint,
+    tmp_path,
+    keystrokes: str,
+    expected_output: str
+):
+    app_path = write_python_app(keyed_blueprint, str(tmp_path / 'keyed.py'))
+    output = run_app_in_terminal(app_path, keystrokes)
+    assert output.endswith(expected_output)
+
+
+def test_options_are_shown_with_their_key(keyed_blueprint, tmp_path):
+    app_path = write_python_app(keyed_blueprint, str(tmp_path / 'keyed.py'))
+    text = get_text(run_app_in_terminal(app_path, ESC))
+    assert "[DE]ploy" in text
+    assert "[2] Build" in text
+
+
+#   Test actions run in place and in the background ────────────────────────────
+
+def test_actions_run_in_place_return_to_the_screen(resident_blueprint,
+                                                   tmp_path):
+    app_path = write_python_app(resident_blueprint,
+                                str(tmp_path / 'resident.py'))
+    # Any key returns to the screen after the action.
+    output = run_app_in_terminal(app_path, 'os ' + LEFT_ARROW + 'q')
+    assert "status\r\n" in output
+    assert "Finished with status 3." in output
+    assert output.endswith("quit\r\n")
+
+
+def test_background_jobs_show_their_status(resident_blueprint, tmp_path):
+    app_path = write_python_app(resident_blueprint,
+                                str(tmp_path / 'resident.py'))
+    output = run_app_in_terminal(app_path, 'obf' + ESC)
+    assert "Build: running" in get_text(output)
+    assert output.endswith("Exited \U0001F41A Made with Nacar \r\n\r\n")
+
+
+#   Test paging ────────────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('keystrokes,expected_output', [
+    ('l3', "log 2\r\n"),
+    ('l' + PAGE_DOWN + '0', "log 19\r\n"),
+    ('l' + PAGE_DOWN * 3 + PAGE_UP + '0', "log 19\r\n"),
+    ('l' + PAGE_DOWN + '1l' + PAGE_DOWN * 2 + '4', "log 23\r\n"),
+])
+def test_selecting_paged_options_by_digit(
+    paged_python_app_path,
+    keystrokes: str,
+    expected_output: str
+):
+    output = run_app_in_terminal(paged_python_app_path, keystrokes)
+    assert output.endswith(expected_output)
+
+
+def test_paged_screen_shows_the_pager(paged_python_app_path):
+    text = get_text(run_app_in_terminal(paged_python_app_path, 'l' + ESC))
+    assert "Home 0" in text
+    assert "[0] Log 9" in text
+    assert "Page 1/3  [PgUp] [PgDn]" in text
+    assert "Log 10" not in text
+
+
+def test_digits_past_the_last_option_are_ignored(paged_python_app_path):
+    keystrokes = 'l' + PAGE_DOWN * 2 + '9' + ESC
+    output = run_app_in_terminal(paged_python_app_path, keystrokes)
+    assert output.endswith("Exited \U0001F41A Made with Nacar \r\n\r\n")
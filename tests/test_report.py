@@ -0,0 +1,171 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the compile report
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Test breaking Nacar apps down by section and screen, accounting for their
+# bytes and lines, and failing builds whose apps are over a size budget.
+
+import os
+import json
+import sys
+import shutil
+
+import pytest
+
+from nacar import main as nacar_main
+from nacar.file_io import FileIO
+from nacar.main import Nacar, TRANSLATORS
+from nacar.report import (AppReport, SizeBudgetExceededError, count_bytes,
+                          count_lines)
+from nacar.schema import Schema
+from nacar.stages import Stage, StageTimings
+from nacar.validator import NacarValidator
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+
+
+@pytest.fixture
+def blueprint(test_data_dir) -> dict:
+    with open(os.path.join(test_data_dir, 'valid-blueprint.json')) as file:
+        return Schema.set_missing_optional_attributes(json.loads(file.read()))
+
+
+@pytest.fixture
+def blueprint_path(test_data_dir, tmp_path) -> str:
+    blueprint_path = str(tmp_path / 'app.yml')
+    shutil.copy(os.path.join(test_data_dir, 'valid-blueprint.yml'),
+                blueprint_path)
+    return blueprint_path
+
+
+#   Test breaking apps down ────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('target,options', [
+    ('bash', {}),
+    ('bash', {'minify': True}),
+    ('bash', {'shard': True}),
+    ('bash', {'table': True}),
+    ('bash', {'runtime': True}),
+    ('sh', {}),
+    ('python', {}),
+])
+def test_sections_make_up_the_translation(blueprint: dict, target: str,
+                                          options: dict):
+    translator = TRANSLATORS[target](blueprint, options)
+    translation = translator.translate_blueprint()
+    sections = translator.translate_sections()
+    assert ''.join(sections.values()) == translation
+    assert list(sections)[0] == 'heading'
+    assert list(sections)[-1] == 'main_loop'
+    assert ('runtime_source' in sections) == bool(options.get('runtime'))
+    assert ('utilities' in sections) != bool(options.get('runtime'))
+
+
+def test_translate_screens(blueprint: dict):
+    translator = BlueprintToBash(blueprint)
+    translation = translator.translate_blueprint()
+    screens = translator.translate_screens()
+    assert list(screens) == ['home', 'develop', 'test']
+    for screen, code in screens.items():
+        assert f"show_{screen}_screen() {{" in code
+        for function in code.split('\n\n'):
+            assert f"{function}\n\n" in translation
+
+    # The code of sharded screens is in their screen files.
+    sharded = BlueprintToBash(blueprint, {'shard': True})
+    chunks = sharded.translate_screen_chunks()
+    for screen, code in sharded.translate_screens().items():
+        assert code.rstrip('\n') in chunks[screen]
+
+    assert BlueprintToBash(blueprint, {'table': True}).translate_screens() \
+        == {}
+
+
+#   Test accounting for bytes and lines ───────────────────────────────────────
+
+def test_count_bytes_and_lines():
+    assert count_bytes("─") == 3
+    assert count_lines("") == 0
+    assert count_lines("a\nb\n") == 2
+    assert count_lines("a\nb") == 2
+
+
+def test_app_report():
+    report = AppReport("#!/bin/bash\n\nx=1\ny=2\nmain\n",
+                       {'heading': "#!/bin/bash\n\n", 'config': "x=1\ny=2\n"},
+                       {'home': "a\n", 'about': "abcd\n", 'help': "abc\n"},
+                       {'home': "chunk\n"})
+    assert report.sections == {
+        'heading': {'bytes': 13, 'lines': 2},
+        'config': {'bytes': 8, 'lines': 2},
+        # Code not in any section.
+        'other': {'bytes': 5, 'lines': 1},
+        'screen_files': {'bytes': 6, 'lines': 1}
+    }
+    assert report.get_size() == 32
+    assert list(report.get_largest_screens(2)) == ['about', 'help']
+
+    report_json = json.loads(report.to_json(top=1))
+    assert report_json['total'] == {'bytes': 32, 'lines': 6}
+    assert report_json['largest_screens'] == {'about': {'bytes': 5,
+                                                        'lines': 1}}
+    table = report.to_table(top=1).split('\n')
+    assert table[0].split() == ['section', 'bytes', 'lines', '%']
+    assert table[5].split() == ['total', '32', '6', '100.0']
+    assert table[-1].split() == ['about', '5', '1']
+
+
+def test_check_size_budget():
+    report = AppReport("echo\n", {})
+    report.check_size_budget(None)
+    report.check_size_budget(5)
+    with pytest.raises(SizeBudgetExceededError,
+                       match="The Nacar app is 5 bytes, over the size "
+                             "budget of 4 bytes."):
+        report.check_size_budget(4)
+
+
+#   Test reporting when running ───────────────────────────────────────────────
+
+def test_apps_are_only_measured_when_asked(capsys, blueprint_path: str):
+    timings = StageTimings()
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  hooks=[timings])
+    nacar.run(blueprint_path)
+    assert Stage.MEASURE not in timings.timings
+    assert nacar.app_report is None
+
+    nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                  hooks=[timings], report=True)
+    nacar.run(blueprint_path)
+    assert Stage.MEASURE in timings.timings
+    with open(os.path.splitext(blueprint_path)[0]) as app:
+        assert nacar.app_report.get_size() == count_bytes(app.read())
+
+
+def test_report_option(monkeypatch, capsys, blueprint_path: str):
+    monkeypatch.setattr(nacar_main, 'stderr', sys.stderr)
+    monkeypatch.setattr(nacar_main, 'argv',
+                        ['main.py', blueprint_path, '--shard',
+                         '--report', 'json', '--top-screens', '2'])
+    nacar_main.main()
+    report = json.loads(capsys.readouterr().err)
+    assert list(report['sections'])[-1] == 'screen_files'
+    assert list(report['largest_screens']) == ['home', 'develop']
+
+
+def test_exceeding_the_size_budget_fails_the_build(monkeypatch, capsys,
+                                                   blueprint_path: str):
+    monkeypatch.setattr(nacar_main, 'stderr', sys.stderr)
+    monkeypatch.setattr(nacar_main, 'argv',
+                        ['main.py', blueprint_path, '--max-size', '4K',
+                         '--report'])
+    with pytest.raises(SystemExit) as exit_info:
+        nacar_main.main()
+    assert exit_info.value.code == 1
+
+    captured = capsys.readouterr()
+    assert "over the size budget of 4096 bytes." in captured.out
+    assert 'largest screens' in captured.err
+    assert not os.path.exists(os.path.splitext(blueprint_path)[0])
@@ -0,0 +1,198 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test how compiling scales
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Compile synthetic blueprints of geometrically increasing size, fit how the
+# time taken by each stage of `Nacar.run()` grows with the number of screens
+# and options, and fail if any stage grows faster than linearly. Stages that
+# are too quick to time are covered by counting how many times screens and
+# options are read while validating and translating, which does not depend
+# on timing so runs by default, as does checking how many bytes each screen
+# adds to the launcher of sharded apps.
+# The timing tests are slow so are not run by default. Run them with
+# `python3 -m pytest -m scaling`.
+
+import os
+from copy import deepcopy
+from math import log
+from typing import Dict, List, Optional
+
+import pytest
+from yaml import safe_dump
+
+from benchmarks.shard import MAX_LAUNCHER_BYTES_PER_SCREEN, \
+    get_launcher_bytes_per_screen
+from benchmarks.synthetic import generate_blueprint
+from nacar.file_io import FileIO
+from nacar.main import Nacar
+from nacar.schema import Schema
+from nacar.stages import Stage, StageTimings
+from nacar.validator import NacarValidator
+from nacar.translate.to_bash.to_bash import BlueprintToBash
+
+
+SIZES = [125, 250, 500, 999]
+REPEAT = 3
+# Linear stages fit an exponent of about 1. Quadratic ones fit close to 2.
+MAX_EXPONENT = 1.3
+# Stages that take less CPU time than this at the largest size are too quick
+# for their growth to be told apart from noise.
+MIN_MS = 10.0
+# Reads are counted exactly, so smaller blueprints will do.
+COUNTED_SIZES = [50, 100, 200, 400]
+
+
+def compile_blueprint(blueprint: dict, tmp_path) -> Dict[Stage, float]:
+    """
+    :return: The least CPU time in milliseconds taken by each stage over
+        `REPEAT` runs.
+    """
+    blueprint_path = os.path.join(tmp_path, 'blueprint.yml')
+    with open(blueprint_path, 'w') as file:
+        safe_dump(blueprint, file, sort_keys=False)
+
+    cpu_ms: Dict[Stage, float] = {}
+    for _ in range(REPEAT):
+        timings = StageTimings()
+        nacar = Nacar(FileIO(), Schema(), NacarValidator(), BlueprintToBash,
+                      hooks=[timings])
+        nacar.run(blueprint_path)
+        for stage, timing in timings.timings.items():
+            cpu_ms[stage] = min(cpu_ms.get(stage, timing['cpu_ms']),
+                                timing['cpu_ms'])
+    return cpu_ms
+
+
+def get_growth_exponent(sizes: List[int],
+                        times: List[float],
+                        baseline: float) -> float:
+    """
+    Fit `time = baseline + c * size ** exponent` by least squares on a
+    log-log scale. Taking away the time for the smallest blueprint keeps
+    fixed costs, such as loading templates, from hiding how a stage grows.
+    """
+    xs = [log(size) for size in sizes]
+    ys = [log(max(time - baseline, 1e-3)) for time in times]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+def test_get_growth_exponent():
+    sizes = [10, 20, 40, 80]
+    assert get_growth_exponent(sizes, [5 + 2 * s for s in sizes], 5) \
+        == pytest.approx(1)
+    assert get_growth_exponent(sizes, [5 + s ** 2 for s in sizes], 5) \
+        == pytest.approx(2)
+
+
+def blueprint_of_size(axis: str, size: int) -> dict:
+    if axis == 'screens':
+        return generate_blueprint(size, 4)
+    return generate_blueprint(4, size)
+
+
+@pytest.mark.scaling
+@pytest.mark.parametrize('axis', ['screens', 'options'])
+def test_stages_grow_linearly(capsys, tmp_path, axis: str):
+    baseline = compile_blueprint(
+        blueprint_of_size(axis, 1 if axis == 'screens' else 4), tmp_path)
+    stage_times = [compile_blueprint(blueprint_of_size(axis, size), tmp_path)
+                   for size in SIZES]
+
+    exponents = {}
+    for stage in Stage:
+        # Cache stages only run when a blueprint cache is used.
+        if stage not in stage_times[-1]:
+            continue
+        times = [cpu_ms[stage] for cpu_ms in stage_times]
+        if times[-1] < MIN_MS:
+            continue
+        exponents[stage.value] = round(
+            get_growth_exponent(SIZES, times, baseline[stage]), 2)
+
+    super_linear = {stage: exponent for stage, exponent in exponents.items()
+                    if exponent > MAX_EXPONENT}
+    assert super_linear == {}, \
+        f"Stages grow super-linearly in the number of {axis}: {exponents}"
+
+
+#   Test counting reads ────────────────────────────────────────────────────────
+
+class CountingList(list):
+    """
+    A list that counts the items read from it, by iterating over it or by
+    indexing it, in `reads`. Copies made by Cerberus count on their own.
+    """
+
+    def __init__(self, items, reads: Optional[List[int]] = None):
+        super().__init__(items)
+        self.reads = reads if reads is not None else [0]
+
+    def __iter__(self):
+        for item in super().__iter__():
+            self.reads[0] += 1
+            yield item
+
+    def __getitem__(self, index):
+        self.reads[0] += 1
+        return super().__getitem__(index)
+
+
+def count_reads(blueprint: dict) -> int:
+    """
+    Validate a blueprint and translate it to bash, as is and with each of
+    the translator's options.
+    :return: The number of times its screens and options were read.
+    """
+    reads = [0]
+    blueprint = Schema.set_missing_optional_attributes(deepcopy(blueprint))
+    for screen in blueprint['screens']:
+        screen['options'] = CountingList(screen['options'], reads)
+    blueprint['screens'] = CountingList(blueprint['screens'], reads)
+
+    assert NacarValidator().validate(blueprint, Schema.get_blueprint_schema())
+    for options in [{}, {'shard': True}, {'table': True}]:
+        translator = BlueprintToBash(blueprint, options)
+        translator.translate_blueprint()
+        translator.translate_screen_chunks()
+    return reads[0]
+
+
+def get_reads_growth_exponent(axis: str) -> float:
+    baseline = count_reads(blueprint_of_size(axis, 1 if axis == 'screens'
+                                             else 4))
+    reads = [count_reads(blueprint_of_size(axis, size))
+             for size in COUNTED_SIZES]
+    return get_growth_exponent(COUNTED_SIZES, reads, baseline)
+
+
+@pytest.mark.parametrize('axis', ['screens', 'options'])
+def test_reads_grow_linearly(axis: str):
+    exponent = get_reads_growth_exponent(axis)
+    assert exponent < MAX_EXPONENT, \
+        f"Screens and options are read {exponent:.2f} times as often as " \
+        f"the number of {axis} grows."
+
+
+def test_counting_reads_finds_quadratic_helpers(monkeypatch):
+    # Look each screen's options up by searching the screens, as
+    # `get_options_by_screen()` once did.
+    def get_options_by_screen(blueprint: dict) -> Dict[str, list]:
+        return {name: Schema.get_options_for_screen(blueprint, name)
+                for name in Schema.get_screen_names(blueprint)}
+
+    monkeypatch.setattr(Schema, 'get_options_by_screen',
+                        staticmethod(get_options_by_screen))
+    assert get_reads_growth_exponent('screens') > MAX_EXPONENT
+
+
+#   Test the size of sharded launchers ─────────────────────────────────────────
+
+def test_sharded_launcher_grows_within_budget():
+    launcher_bytes_per_screen = get_launcher_bytes_per_screen(SIZES[-1], 10)
+    assert launcher_bytes_per_screen <= MAX_LAUNCHER_BYTES_PER_SCREEN, \
+        f"The sharded launcher grows by {launcher_bytes_per_screen:.1f} " \
+        f"bytes for each screen."
@@ -4,13 +4,14 @@
 #
 # Test the Schema module
 # ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
-# Test adding subschemas to the registry, setting missing optional attributes,
+# Test adding subschemas to a registry, setting missing optional attributes,
 # schema property getters, and raising custom InvalidSchemaErrors.
 
 import pytest
 from cerberus import schema_registry
 
 from nacar.schema import Schema, InvalidSchemaError
+from nacar.validator import NacarValidator
 from tests.utils import get_nested_key
 
 
@@ -46,8 +47,7 @@ def cerberus_registry_contains_expected_subschemas(registry) -> bool:
     expected_subschema_names = sorted([
         'meta',
         'screen',
-        'screen__option--link',
-        'screen__option--action'
+        'screen__option'
     ])
     actual_subschema_keys = sorted(registry.all().keys())
 
@@ -55,21 +55,34 @@ def cerberus_registry_contains_expected_subschemas(registry) -> bool:
             and (expected_subschema_names == actual_subschema_keys))
 
 
-def test_instantiating_schema_adds_subschemas_to_cerberus() -> None:
+def test_instantiating_schema_sets_a_private_registry() -> None:
     schema_registry.clear()
-    Schema()
-    assert cerberus_registry_contains_expected_subschemas(schema_registry) is True  # noqa
+    schema = Schema()
+    assert cerberus_registry_contains_expected_subschemas(schema.schema_registry) is True  # noqa
+    assert schema_registry.all() == {}
 
 
-def test_add_blueprint_subschemas_to_registry():
-    schema_registry.clear()
-    Schema.add_blueprint_subschemas_to_registry()
-    assert cerberus_registry_contains_expected_subschemas(schema_registry) is True  # noqa
+def test_validators_can_share_the_schema_registry() -> None:
+    schema = Schema()
+    validator = NacarValidator(schema_registry=schema.schema_registry)
+    assert validator.schema_registry is schema.schema_registry
+    assert validator.validate({'title': 'Title', 'meta': {'authors': ['A']},
+                               'screens': [{'name': 'home', 'options': [
+                                   {'name': 'Quit', 'action': 'exit'}]}]},
+                              Schema.get_blueprint_schema())
+
+
+def test_get_schema_registry():
+    registry = Schema.get_schema_registry()
+    assert cerberus_registry_contains_expected_subschemas(registry) is True
+    assert Schema.get_schema_registry() is not registry
 
 
 @pytest.mark.parametrize('path_chain,default_value', [
     (['meta', 'width'], 80),
     (['meta', 'show_made_with_on_exit'], True),
+    (['meta', 'differential_redraw'], False),
+    (['meta', 'page_size'], 0),
 ])
 def test_set_missing_optional_attributes__meta_width(
     blueprint: dict,
@@ -113,6 +126,64 @@ def test_get_options_for_screen(
     assert options_for_screen == expected_options
 
 
+def test_get_options_by_screen(blueprint: dict):
+    options_by_screen = Schema.get_options_by_screen(blueprint)
+    assert list(options_by_screen) == ['home', 'develop', 'test']
+    for screen_name, options in options_by_screen.items():
+        assert options == Schema.get_options_for_screen(blueprint, screen_name)  # noqa
+
+
+def test_get_paged_screens(blueprint: dict):
+    blueprint['meta']['page_size'] = 0
+    assert Schema.get_paged_screens(blueprint) == []
+
+    blueprint['meta']['page_size'] = 1
+    assert Schema.get_paged_screens(blueprint) == ['home']
+
+
+def test_get_screen_heights_and_bottom_paddings(blueprint: dict):
+    blueprint['meta']['page_size'] = 0
+    assert Schema.get_screen_heights(blueprint) == {'home': 2, 'develop': 1,
+                                                    'test': 1}
+    assert Schema.get_bottom_paddings(blueprint) == {'home': 1, 'develop': 2,
+                                                     'test': 2}
+
+    # Paged screens show a page of options followed by a pager line.
+    blueprint['meta']['page_size'] = 1
+    assert Schema.get_screen_heights(blueprint) == {'home': 2, 'develop': 1,
+                                                    'test': 1}
+    blueprint['screens'][0]['options'].append({'name': 'Run', 'link': 'test'})
+    assert Schema.get_screen_heights(blueprint)['home'] == 2
+
+
+@pytest.mark.parametrize('option,expected_key,expected_label', [
+    ({'name': 'Develop'}, 'd', ('D', 'evelop')),
+    ({'name': 'Deploy', 'key': 'DE'}, 'de', ('DE', 'ploy')),
+    ({'name': 'Build', 'key': '2'}, '2', ('2', ' Build')),
+])
+def test_get_option_key_and_label(
+    option: dict,
+    expected_key: str,
+    expected_label: tuple
+) -> None:
+    assert Schema.get_option_key(option) == expected_key
+    assert Schema.get_option_label(option) == expected_label
+
+
+@pytest.mark.parametrize('option,expected_run', [
+    ({'name': 'build', 'action': 'make'}, 'on_exit'),
+    ({'name': 'build', 'action': 'make', 'run': 'in_place'}, 'in_place'),
+])
+def test_get_action_run(option: dict, expected_run: str):
+    assert Schema.get_action_run(option) == expected_run
+
+
+def test_get_key_prefixes():
+    options = [{'name': 'Deploy', 'key': 'dep'}, {'name': 'Docs', 'key': 'do'},
+               {'name': 'Test'}]
+    assert Schema.get_key_prefixes(options) == ['d', 'de']
+
+
 @pytest.mark.parametrize('validator_errors,err_message', [
     ({'meta': [{'width': ['min value is 40']}]},
      "Please amend these schema errors in your blueprint:\nmeta.width: Min value is 40."),  # noqa
@@ -0,0 +1,65 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the trace analyzer
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Test parsing trace files written by bash Nacar apps and summarising how
+# long each screen takes to render.
+
+import pytest
+
+from nacar.trace_analyzer import TraceAnalyzer, TraceEvent
+
+
+@pytest.fixture
+def trace_events() -> list:
+    trace_lines = [
+        '100.000 N home',
+        '100.001 S home',
+        '100.003 D home',
+        '100.100 K d',
+        '100.101 N develop',
+        '100.102 S develop',
+        '100.112 D develop',
+        '100.200 K x',
+        '100.201 S develop',
+        '100.207 D develop',
+        '100.300 K b',
+        '100.301 A action_develop_1',
+    ]
+    return [TraceAnalyzer.parse_trace_line(line) for line in trace_lines]
+
+
+@pytest.mark.parametrize('line,event', [
+    ('1656675000.123456 S home\n', TraceEvent(1656675000.123456, 'S', 'home')),
+    ('1656675000,5 K d', TraceEvent(1656675000.5, 'K', 'd')),
+    ("1656675000.5 K $'\\E'", TraceEvent(1656675000.5, 'K', "$'\\E'")),
+    ('1656675000.5 K \\ ', TraceEvent(1656675000.5, 'K', '\\ ')),
+    ('S home', None),
+    ('', None),
+])
+def test_parse_trace_line(line: str, event: TraceEvent):
+    assert TraceAnalyzer.parse_trace_line(line) == event
+
+
+def test_get_screen_timings(trace_events):
+    timings = TraceAnalyzer.get_screen_timings(trace_events)
+
+    assert list(timings.keys()) == ['home', 'develop']
+    assert timings['home']['render'] == pytest.approx([0.002])
+    # The first frame is not drawn in response to a keystroke.
+    assert timings['home']['response'] == []
+    assert timings['develop']['render'] == pytest.approx([0.010, 0.006])
+    assert timings['develop']['response'] == pytest.approx([0.012, 0.007])
+
+
+def test_summarize_screen_timings(trace_events):
+    lines = TraceAnalyzer.summarize_screen_timings(trace_events)
+
+    assert lines[0].split() == ['screen', 'renders', 'mean', 'ms', 'median',
+                                'ms', 'max', 'ms', 'response', 'ms']
+    # Slowest screen first.
+    assert lines[1].split() == ['develop', '2', '8.00', '8.00', '10.00',
+                                '9.50']
+    assert lines[2].split() == ['home', '1', '2.00', '2.00', '2.00', '-']
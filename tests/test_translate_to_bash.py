@@ -11,16 +11,21 @@
 from os import path as os_path
 from os.path import dirname, abspath
 from json import loads as json_loads
+import copy
 import datetime
 import hashlib
+import re
 
 from unittest.mock import patch
 import pytest
 from jinja2 import Environment as JinjaEnvironment
 from jinja2.loaders import FileSystemLoader as JinjaFSLoader
 
+from nacar.__version__ import __version__
 from nacar.translate.target_language import TargetLanguage
 from nacar.translate.to_bash.to_bash import BlueprintToBash
+from nacar.translate.to_bash.minify import (MinifyingLoader,
+                                            minify_bash_template)
 
 
 # scope='module' ensures this is instantiated only once per test module
@@ -33,6 +38,8 @@ def to_bash_translator(test_data_dir) -> BlueprintToBash:
         blueprint = json_loads(file.read())
         # Set optional parameters to emulate `Schema.set_missing_optional_attributes()`.  # noqa
         blueprint['meta']['show_made_with_on_exit'] = True
+        blueprint['meta']['differential_redraw'] = False
+        blueprint['meta']['page_size'] = 0
 
     return BlueprintToBash(blueprint)
 
@@ -96,7 +103,8 @@ def test_set_heading_template_variables(to_bash_translator):
 
 def get_expected_app_config_template_variables() -> dict:
     return {
-        'screen_width': 80
+        'screen_width': 80,
+        'page_size': 0
     }
 
 
@@ -126,6 +134,45 @@ def get_expected_screen_flow_template_variables() -> dict:
             'home': [{'link': 'develop', 'name': 'Develop'}, {'link': 'test', 'name': 'Test'}],
             'develop': [{'action': "echo 'build code'", 'name': 'build'}],
             'test': [{'action': "echo 'run tests'", 'name': 'run'}]
+        },
+        'paged_screens': set(),
+        'sharded': False,
+        'table': False,
+        'option_keys': {'home': ['d', 't'], 'develop': ['b'], 'test': ['r']},
+        'option_labels': {
+            'home': [('D', 'evelop'), ('T', 'est')],
+            'develop': [('B', 'uild')],
+            'test': [('R', 'un')]
+        },
+        'key_prefixes': {'home': [], 'develop': [], 'test': []},
+        'action_runs': {
+            'home': ['on_exit', 'on_exit'],
+            'develop': ['on_exit'],
+            'test': ['on_exit']
+        },
+        'resident_actions': False,
+        'background_jobs': False,
+        'shared_screens': {},
+        'action_functions': {
+            'home': [None, None],
+            'develop': ['action_develop_1'],
+            'test': ['action_test_1']
+        },
+        'screen_actions': {
+            'home': [],
+            'develop': [{'function': 'action_develop_1',
+                         'action': "echo 'build code'",
+                         'run': 'on_exit', 'name': 'build'}],
+            'test': [{'function': 'action_test_1',
+                      'action': "echo 'run tests'",
+                      'run': 'on_exit', 'name': 'run'}]
+        },
+        'app_actions': [],
+        'deep_links': {
+            'screen_links': {'home': {'develop': 'develop', 'test': 'test'},
+                             'develop': {}, 'test': {}},
+            'actions': {'home': {}, 'develop': {'build': 'action_develop_1'},
+                        'test': {'run': 'action_test_1'}}
         }
     }
 
@@ -142,11 +189,153 @@ def test_set_screen_flow_template_variables(to_bash_translator):
     assert result == expected
 
 
+def get_blueprint_with_duplicates(blueprint: dict) -> dict:
+    """
+    Add a screen with the same options as 'develop', and have 'home' run the
+    same action as 'test'.
+    """
+    blueprint = copy.deepcopy(blueprint)
+    blueprint['screens'].append({'name': 'build',
+                                 'options': copy.deepcopy(
+                                     blueprint['screens'][1]['options'])})
+    blueprint['screens'][0]['options'].append(
+        {'name': 'quick', 'action': "echo 'run tests'"})
+    return blueprint
+
+
+def test_get_shared_screens(to_bash_translator):
+    assert to_bash_translator.get_shared_screens() == {}
+
+    translator = BlueprintToBash(
+        get_blueprint_with_duplicates(to_bash_translator.blueprint))
+    assert translator.get_shared_screens() == {'build': 'develop'}
+
+
+def test_get_actions(to_bash_translator):
+    blueprint = get_blueprint_with_duplicates(to_bash_translator.blueprint)
+    actions = BlueprintToBash(blueprint).get_actions()
+    assert actions['action_functions'] == {
+        'home': [None, None, 'action_home_3'],
+        'develop': ['action_develop_1'],
+        'test': ['action_home_3'],
+        'build': ['action_develop_1']
+    }
+    assert ([a['function'] for a in actions['screen_actions']['home']]
+            == ['action_home_3'])
+    assert actions['screen_actions']['test'] == []
+    assert actions['screen_actions']['build'] == []
+    assert actions['app_actions'] == []
+
+    # The same action run another way has a function of its own.
+    blueprint['screens'][2]['options'][0]['run'] = 'in_place'
+    actions = BlueprintToBash(blueprint).get_actions()
+    assert actions['action_functions']['test'] == ['action_test_1']
+
+    # Sharded apps define actions run by more than one screen themselves.
+    del blueprint['screens'][2]['options'][0]['run']
+    actions = BlueprintToBash(blueprint, {'shard': True,
+                                          'minify': True}).get_actions()
+    assert actions['action_functions']['test'] == ['_a_home_3']
+    assert actions['screen_actions']['home'] == []
+    assert [a['function'] for a in actions['app_actions']] == ['_a_home_3']
+
+
+def test_duplicates_are_translated_once(to_bash_translator):
+    blueprint = get_blueprint_with_duplicates(to_bash_translator.blueprint)
+    translation = BlueprintToBash(blueprint).translate_blueprint()
+    assert translation.count("echo 'run tests'") == 1
+    assert translation.count("echo 'build code'") == 1
+    assert 'show_build_screen' not in translation
+    assert 'handle_build_keystroke' not in translation
+    assert '    [build]=develop\n' in translation
+
+    translator = BlueprintToBash(blueprint, {'shard': True})
+    assert list(translator.translate_screen_chunks()) == ['home', 'develop',
+                                                         'test']
+
+    # A screen that differs by an option's name has functions of its own.
+    blueprint['screens'][3]['options'][0]['name'] = 'bundle'
+    assert (len(BlueprintToBash(blueprint).translate_blueprint())
+            > len(translation))
+
+
+def test_get_deep_links(to_bash_translator):
+    blueprint = get_blueprint_with_duplicates(to_bash_translator.blueprint)
+    blueprint['screens'][0]['options'].append({'name': 'Build',
+                                               'link': 'build'})
+    deep_links = BlueprintToBash(blueprint).get_deep_links()
+    assert deep_links['screen_links'] == {
+        'home': {'develop': 'develop', 'test': 'test', 'build': 'build'},
+        'develop': {}, 'test': {}, 'build': {}}
+    assert deep_links['actions'] == {'home': {'quick': 'action_home_3'},
+                                     'develop': {'build': 'action_develop_1'},
+                                     'test': {'run': 'action_home_3'},
+                                     'build': {'build': 'action_develop_1'}}
+
+    # Apps translated with the 'table' option number their actions.
+    deep_links = BlueprintToBash(blueprint, {'table': True,
+                                             'minify': True}).get_deep_links()
+    assert deep_links['actions'] == {'home': {'quick': '_a1'},
+                                     'develop': {'build': '_a2'},
+                                     'test': {'run': '_a1'},
+                                     'build': {'build': '_a2'}}
+
+
+#   Test screen table ──────────────────────────────────────────────────────────
+
+def test_get_screen_table(to_bash_translator):
+    assert to_bash_translator.get_screen_table() == {
+        'option_names': ['Develop', 'Test', 'build', 'run'],
+        'option_label_keys': ['D', 'T', 'B', 'R'],
+        'option_links': {0: 'develop', 1: 'test'},
+        'option_actions': {2: 1, 3: 2},
+        'actions': ["echo 'build code'", "echo 'run tests'"],
+        'action_runs': {},
+        'action_names': {},
+        'first_options': {'home': 0, 'develop': 2, 'test': 3},
+        'options_counts': {'home': 2, 'develop': 1, 'test': 1},
+        'option_keys': {'home:d': 0, 'home:t': 1, 'develop:b': 2,
+                        'test:r': 3},
+        'max_screen_height': 2
+    }
+
+
+def test_get_screen_table_shares_duplicates(to_bash_translator):
+    blueprint = get_blueprint_with_duplicates(to_bash_translator.blueprint)
+    screen_table = BlueprintToBash(blueprint).get_screen_table()
+    assert screen_table['actions'] == ["echo 'run tests'", "echo 'build code'"]
+    assert screen_table['option_actions'] == {2: 1, 3: 2, 4: 1}
+    assert screen_table['first_options']['build'] == 3
+    assert screen_table['options_counts']['build'] == 1
+    assert screen_table['option_keys']['build:b'] == 3
+
+
+def test_table_translation_has_no_functions_per_screen(to_bash_translator):
+    translation = BlueprintToBash(to_bash_translator.blueprint,
+                                  {'table': True}).translate_blueprint()
+    for screen in ['home', 'develop', 'test']:
+        assert f"{screen}_screen() {{" not in translation
+        assert f"handle_{screen}_keystroke" not in translation
+    assert "\nshow_screen() {\n" in translation
+    assert "\nhandle_keystroke() {\n" in translation
+    assert "\naction_1() {\n    echo 'build code'\n}" in translation
+
+
+def test_table_translation_quotes_option_names(to_bash_translator):
+    blueprint = copy.deepcopy(to_bash_translator.blueprint)
+    blueprint['screens'][1]['options'][0]['name'] = "it's $HOME"
+    translation = BlueprintToBash(blueprint,
+                                  {'table': True}).translate_blueprint()
+    assert "    'it'\"'\"'s $HOME'\n" in translation
+    assert "    [develop:i]=2\n" in translation
+
+
 #   Test screen rendering utilities ────────────────────────────────────────────
 
 def get_expected_screen_rendering_template_variables() -> dict:
     return {
         'show_made_with_on_exit': True,
+        'differential_redraw': False,
         'bottom_padding_screen_map': {'develop': 2, 'home': 1, 'test': 2}
     }
 
@@ -164,6 +353,18 @@ def test_set_screen_rendering_template_variables(to_bash_translator):
     assert result == expected
 
 
+def test_bottom_padding_is_set_by_the_page_size_when_paging(to_bash_translator):  # noqa
+    to_bash_translator.blueprint['meta']['page_size'] = 1
+    to_bash_translator.set_screen_rendering_template_variables()
+    to_bash_translator.blueprint['meta']['page_size'] = 0
+
+    # 'home' shows one option and a pager line.
+    bottom_padding_screen_map = (to_bash_translator
+                                 .template_data['screen_rendering']
+                                 ['bottom_padding_screen_map'])
+    assert bottom_padding_screen_map == {'home': 1, 'develop': 2, 'test': 2}
+
+
 #   Test main loop writer ──────────────────────────────────────────────────────
 
 # Tests for these methods intentionally not implemented since dynamic behaviour
@@ -173,7 +374,124 @@ def test_set_screen_rendering_template_variables(to_bash_translator):
 #   Test translating blueprint to Bash ─────────────────────────────────────────
 
 def test_translate_blueprint(to_bash_translator):
-    translation = to_bash_translator.translate_blueprint()
+    with patch('nacar.translate.to_bash.to_bash.datetime', wraps=datetime.datetime) as dt, \
+            patch('nacar.translate.to_bash.to_bash.__version__', '1.2.3'):
+        dt.now.return_value = datetime.datetime(2022, 1, 1)
+        translation = to_bash_translator.translate_blueprint()
     translation_hash = hashlib.md5(translation.encode('utf-8')).hexdigest()
-    expected_hash = '7bbb6b7d8b3cf27f24ed67f0c8124cf1'
+    expected_hash = 'c640eb0b1f60bb9719abfd1a92d149b1'
     assert translation_hash == expected_hash
+
+
+def test_translate_blueprint_emits_a_keystroke_handler_per_screen(to_bash_translator):  # noqa
+    translation = to_bash_translator.translate_blueprint()
+    for screen in ['home', 'develop', 'test']:
+        assert f"handle_{screen}_keystroke() {{" in translation
+    # Keystrokes are dispatched directly rather than through a chain of `if`s.
+    assert 'elif' not in translation
+    assert 'eval' not in translation
+
+
+def test_translate_screen_chunks_without_sharding(to_bash_translator):
+    assert to_bash_translator.translate_screen_chunks() == {}
+
+
+def test_sharded_translation_defines_screens_in_chunks(to_bash_translator):
+    translator = BlueprintToBash(to_bash_translator.blueprint,
+                                 {'shard': True})
+    translation = translator.translate_blueprint()
+    screen_chunks = translator.translate_screen_chunks()
+
+    assert list(screen_chunks.keys()) == ['home', 'develop', 'test']
+    for screen, chunk in screen_chunks.items():
+        assert f"handle_{screen}_keystroke() {{" in chunk
+        assert f"show_{screen}_screen() {{" in chunk
+        assert f"{screen}_screen() {{" not in translation
+        assert f"handle_{screen}_keystroke" not in translation
+    assert "action_develop_1() {" in screen_chunks['develop']
+
+
+def test_translate_runtime_without_sharing(to_bash_translator):
+    assert to_bash_translator.translate_runtime() == {}
+
+
+def test_shared_runtime_translation_sources_the_runtime(to_bash_translator):
+    translator = BlueprintToBash(to_bash_translator.blueprint,
+                                 {'runtime': True})
+    translation = translator.translate_blueprint()
+    runtime = translator.translate_runtime()[
+        f"nacar-runtime-{__version__}.sh"]
+
+    for code in ['clear_screen() {', 'build_static_screen_lines() {',
+                 'navigate_to $HOME_SCREEN']:
+        assert code in runtime
+        assert code not in translation
+    assert 'show_home_screen() {' not in runtime
+    assert 'source "$NACAR_RUNTIME"' in translation
+    assert translation.endswith('\nrun_main_loop "$@"\n')
+
+
+def test_shared_runtime_does_not_depend_on_the_blueprint(to_bash_translator):
+    other_blueprint = copy.deepcopy(to_bash_translator.blueprint)
+    other_blueprint['title'] = 'Another title'
+    other_blueprint['meta']['width'] = 60
+    del other_blueprint['screens'][-1]
+    other_blueprint['screens'][0]['options'].pop()
+
+    runtime = BlueprintToBash(to_bash_translator.blueprint,
+                              {'runtime': True}).translate_runtime()
+    assert BlueprintToBash(other_blueprint,
+                           {'runtime': True}).translate_runtime() == runtime
+
+
+def test_minified_apps_share_a_minified_runtime(to_bash_translator):
+    translator = BlueprintToBash(to_bash_translator.blueprint,
+                                 {'runtime': True, 'minify': True})
+    with patch('nacar.translate.to_bash.to_bash.__version__', '1.2.3'):
+        translation = translator.translate_blueprint()
+        runtime_files = translator.translate_runtime()
+
+    assert list(runtime_files.keys()) == ['nacar-runtime-1.2.3.min.sh']
+    assert 'NACAR_RUNTIME_VERSION="1.2.3-min"' in runtime_files['nacar-runtime-1.2.3.min.sh']  # noqa
+    assert 'NACAR_RUNTIME_REQUIRED="1.2.3-min"' in translation
+
+
+#   Test minifying ─────────────────────────────────────────────────────────────
+
+def test_minify_bash_template():
+    template = '\n'.join([
+        '#!/bin/bash',
+        '# ───── Utilities ─────',
+        '',
+        '# Clear the screen.',
+        'clear_screen() {',
+        '    printf "\\033c"  # Reset the terminal.',
+        '}',
+        'show_{{ screen.lower() }}_screen() {',
+        '{% raw %}    local title_charlen=${#TITLE}{% endraw +%}',
+        '}',
+    ])
+    assert minify_bash_template(template) == '\n'.join([
+        '#!/bin/bash',
+        '_c() {',
+        'printf "\\033c"',
+        '}',
+        '_s_{{ screen.lower() }}() {',
+        '{% raw %}local title_charlen=${#_T}{% endraw +%}',
+        '}',
+    ])
+
+
+def test_minify_option_sets_minifying_loader(to_bash_translator):
+    translator = BlueprintToBash(to_bash_translator.blueprint,
+                                 {'minify': True})
+    assert isinstance(translator.jinja_env.loader, MinifyingLoader)
+
+
+def test_minified_translation_shortens_every_function(to_bash_translator):
+    translation = BlueprintToBash(to_bash_translator.blueprint,
+                                  {'minify': True}).translate_blueprint()
+    function_names = re.findall(r'^(\S+)\(\) \{', translation, re.M)
+    assert len(function_names) > 0
+    assert [n for n in function_names if not n.startswith('_')] == []
+    assert re.findall(r'^\s*#(?!!)', translation, re.M) == []
@@ -0,0 +1,150 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the to_posix_sh Translator
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Test Translator initialisation, generation of the lines built when
+# translating, and composition of resulting Nacar app string.
+
+import re
+import shutil
+import subprocess
+from os import path as os_path
+from os.path import dirname, abspath
+from json import loads as json_loads
+
+import pytest
+
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_posix_sh.to_posix_sh import BlueprintToPosixSh
+
+
+@pytest.fixture
+def to_posix_sh_translator(test_data_dir) -> BlueprintToPosixSh:
+    valid_output_json_path = os_path.join(test_data_dir, 'valid-blueprint.json')  # noqa
+    with open(valid_output_json_path) as file:
+        blueprint = json_loads(file.read())
+
+    return BlueprintToPosixSh(Schema.set_missing_optional_attributes(blueprint))  # noqa
+
+
+def get_word_value(word: str) -> str:
+    # Expand a shell word built by the translator, leaving styles unset.
+    return subprocess.run(['sh', '-c', f"printf '%s' {word}"],
+                          stdout=subprocess.PIPE).stdout.decode('utf-8')
+
+
+#   Test Translator initialisation ─────────────────────────────────────────────
+
+def test_set_screens_was_called_on_init(to_posix_sh_translator):
+    assert to_posix_sh_translator.screens == ['home', 'develop', 'test']
+
+
+def test_jinja_environment_was_set_on_init(to_posix_sh_translator):
+    searchpath = to_posix_sh_translator.jinja_env.loader.searchpath[0]
+    nacar_root = dirname(dirname(abspath(__file__)))
+    expected_path = os_path.join(nacar_root, 'nacar', 'translate', 'to_posix_sh', 'templates')  # noqa
+    assert searchpath == expected_path
+
+
+def test_get_target_language(to_posix_sh_translator):
+    assert (to_posix_sh_translator.get_target_language()
+            == TargetLanguage.POSIX_SH)
+
+
+#   Test POSIX sh translator utilities ─────────────────────────────────────────
+
+def test_get_styled_word():
+    word = BlueprintToPosixSh.get_styled_word('[', '$YEL', "it's", '$END', ']')
+    assert word == """'['"$YEL"'it'"'"'s'"$END"']'"""
+
+
+#   Test screen-building utilities ─────────────────────────────────────────────
+
+def test_static_screen_lines_are_as_wide_as_the_screen(to_posix_sh_translator):  # noqa
+    lines = to_posix_sh_translator.get_static_screen_lines()
+    assert get_word_value(lines['top']) == \
+        f"╭{'─' * 32} Global Title {'─' * 32}╮"
+    for word in lines.values():
+        assert len(get_word_value(word)) == 80
+
+
+#   Test screen flow ───────────────────────────────────────────────────────────
+
+@pytest.mark.parametrize('key,expected_pattern', [
+    ('d', '[Dd]'),
+    ('de', '[Dd][Ee]'),
+    ('2', '2'),
+    ('$', "'$'"),
+])
+def test_get_key_pattern(key: str, expected_pattern: str):
+    assert BlueprintToPosixSh.get_key_pattern(key) == expected_pattern
+
+
+#   Test screen rendering ──────────────────────────────────────────────────────
+
+def test_get_screen_pages(to_posix_sh_translator):
+    pages = to_posix_sh_translator.get_screen_pages('develop', 2)
+    assert len(pages) == 1
+    assert pages[0][1:] == ['"$BLANK_SCREEN_LINE"', '"$BLANK_SCREEN_LINE"',
+                            '"$SCREEN_BOTTOM_LINE"']
+    assert get_word_value(pages[0][0]) == f"│ [B]uild{' ' * 70}│"
+
+
+def test_options_are_shown_with_their_key(to_posix_sh_translator):
+    blueprint = to_posix_sh_translator.blueprint
+    blueprint['screens'][1]['options'][0]['key'] = '2'
+    pages = BlueprintToPosixSh(blueprint).get_screen_pages('develop', 2)
+    assert get_word_value(pages[0][0]) == f"│ [2] build{' ' * 68}│"
+
+
+def test_job_status_takes_the_last_blank_line(to_posix_sh_translator):
+    blueprint = to_posix_sh_translator.blueprint
+    blueprint['screens'][1]['options'][0]['run'] = 'in_background'
+    pages = BlueprintToPosixSh(blueprint).get_screen_pages('develop', 2)
+    assert pages[0][1:] == ['"$BLANK_SCREEN_LINE"', '"$JOB_STATUS_LINE"',
+                            '"$SCREEN_BOTTOM_LINE"']
+
+
+def test_paged_screens_have_a_page_per_page_size(to_posix_sh_translator):
+    blueprint = to_posix_sh_translator.blueprint
+    blueprint['meta']['page_size'] = 2
+    blueprint['screens'][2]['options'] = [
+        {'name': f"run {i}", 'action': f"echo {i}"} for i in range(5)
+    ]
+    pages = BlueprintToPosixSh(blueprint).get_screen_pages('test', 1)
+
+    assert len(pages) == 3
+    # The last page is padded with blank lines up to the page size.
+    assert pages[2][1] == '"$BLANK_SCREEN_LINE"'
+    assert get_word_value(pages[2][0]).startswith("│ [1] run 4 ")
+    assert get_word_value(pages[2][2]).startswith("│ Page 3/3  [PgUp] [PgDn]")
+
+
+#   Test translating blueprint to POSIX sh ─────────────────────────────────────
+
+def test_translate_blueprint(to_posix_sh_translator):
+    translation = to_posix_sh_translator.translate_blueprint()
+    assert translation.startswith('#!/bin/sh\n')
+    for screen in ['home', 'develop', 'test']:
+        assert f"\nshow_{screen}_screen() {{\n" in translation
+        assert f"\nhandle_{screen}_keystroke() {{\n" in translation
+
+
+@pytest.mark.skipif(shutil.which('dash') is None,
+                    reason="dash is not installed.")
+def test_translate_blueprint_is_valid_posix_sh(to_posix_sh_translator):
+    translation = to_posix_sh_translator.translate_blueprint()
+    result = subprocess.run(['dash', '-n'], input=translation.encode('utf-8'),
+                            stderr=subprocess.PIPE)
+    assert result.returncode == 0, result.stderr.decode('utf-8')
+
+
+def test_translate_blueprint_has_no_bashisms(to_posix_sh_translator):
+    translation = to_posix_sh_translator.translate_blueprint()
+    bashisms = [r'\[\[', r'\bdeclare\b', r'\blocal\b', r'\bread -', r"\$'",
+                r'\bprintf -v\b', r'\bsource\b', r'\$\{\w+:\d', r'\+=\(']
+    for bashism in bashisms:
+        assert re.search(bashism, translation) is None, bashism
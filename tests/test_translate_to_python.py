@@ -0,0 +1,127 @@
+# Nacar
+# Copyright 2022 Alberto Morón Hernández
+# [github.com/albertomh/Nacar]
+#
+# Test the to_python Translator
+# ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
+# Test Translator initialisation, generation of the screens' dispatch table,
+# and composition of resulting Nacar app string.
+
+from os import path as os_path
+from os.path import dirname, abspath
+from json import loads as json_loads
+
+import pytest
+
+from nacar.schema import Schema
+from nacar.translate.target_language import TargetLanguage
+from nacar.translate.to_python.to_python import BlueprintToPython
+
+
+@pytest.fixture
+def to_python_translator(test_data_dir) -> BlueprintToPython:
+    valid_output_json_path = os_path.join(test_data_dir, 'valid-blueprint.json')  # noqa
+    with open(valid_output_json_path) as file:
+        blueprint = json_loads(file.read())
+
+    return BlueprintToPython(Schema.set_missing_optional_attributes(blueprint))
+
+
+#   Test Translator initialisation ─────────────────────────────────────────────
+
+def test_set_screens_was_called_on_init(to_python_translator):
+    assert to_python_translator.screens == ['home', 'develop', 'test']
+
+
+def test_jinja_environment_was_set_on_init(to_python_translator):
+    searchpath = to_python_translator.jinja_env.loader.searchpath[0]
+    nacar_root = dirname(dirname(abspath(__file__)))
+    expected_path = os_path.join(nacar_root, 'nacar', 'translate', 'to_python', 'templates')  # noqa
+    assert searchpath == expected_path
+
+
+def test_get_target_language(to_python_translator):
+    assert to_python_translator.get_target_language() == TargetLanguage.PYTHON
+
+
+#   Test screen flow ───────────────────────────────────────────────────────────
+
+def test_get_screen_keys():
+    options = [
+        {'name': 'Develop', 'link': 'develop'},
+        {'name': 'deploy', 'action': "echo 'deploy'"},
+        {'name': 'test', 'action': "echo 'test'"},
+    ]
+    # Options sharing a first letter are selected by it as in bash Nacar apps.
+    assert BlueprintToPython.get_screen_keys(options) == {'d': 0, 't': 2}
+
+
+def test_get_screen_keys_of_many_characters():
+    options = [
+        {'name': 'Deploy', 'key': 'DE', 'action': "echo 'deploy'"},
+        {'name': 'Docs', 'key': 'do', 'action': "echo 'docs'"},
+    ]
+    # Keys typed on the way to typing a longer key select no option.
+    assert BlueprintToPython.get_screen_keys(options) == {
+        'de': 0, 'do': 1, 'd': -1
+    }
+
+
+def test_set_screen_flow_template_variables(to_python_translator):
+    to_python_translator.set_screen_flow_template_variables()
+    screen_flow = to_python_translator.template_data['screen_flow']
+    assert screen_flow['screen_keys'] == {
+        'home': {'d': 0, 't': 1},
+        'develop': {'b': 0},
+        'test': {'r': 0},
+    }
+    assert screen_flow['paged_screens'] == set()
+
+
+#   Test translating blueprint to Python ───────────────────────────────────────
+
+def test_translate_blueprint_is_valid_python(to_python_translator):
+    translation = to_python_translator.translate_blueprint()
+    assert translation.startswith('#!/usr/bin/env python3\n')
+    compile(translation, 'app.py', 'exec')
+
+
+def test_translate_blueprint_compiles_a_dispatch_table(to_python_translator):
+    translation = to_python_translator.translate_blueprint()
+    # Run the app's definitions without starting it.
+    namespace: dict = {'__name__': 'app'}
+    exec(compile(translation, 'app.py', 'exec'), namespace)
+
+    screens = namespace['SCREENS']
+    assert list(screens.keys()) == ['home', 'develop', 'test']
+    assert screens['home'].targets == (('link', 'develop'), ('link', 'test'))
+    assert screens['home'].keys['t'] == 1
+    assert screens['develop'].targets == (('action', "echo 'build code'"),)
+
+
+def test_translate_blueprint_with_actions_run_in_place_and_in_background(
+    to_python_translator
+):
+    blueprint = to_python_translator.blueprint
+    blueprint['screens'][1]['options'][0]['run'] = 'in_place'
+    blueprint['screens'][2]['options'][0]['run'] = 'in_background'
+    translation = BlueprintToPython(blueprint).translate_blueprint()
+    namespace: dict = {'__name__': 'app'}
+    exec(compile(translation, 'app.py', 'exec'), namespace)
+
+    screens = namespace['SCREENS']
+    assert screens['develop'].targets == (('in_place', "echo 'build code'"),)
+    assert screens['test'].targets == (('in_background', "echo 'run tests'"),)
+
+
+def test_translate_blueprint_quotes_strings(to_python_translator):
+    blueprint = to_python_translator.blueprint
+    blueprint['title'] = "It's \"quoted\""
+    blueprint['screens'][1]['options'][0]['action'] = "echo \"it's\" \\ done"
+    translation = BlueprintToPython(blueprint).translate_blueprint()
+    namespace: dict = {'__name__': 'app'}
+    exec(compile(translation, 'app.py', 'exec'), namespace)
+
+    assert namespace['TITLE'] == "It's \"quoted\""
+    assert namespace['SCREENS']['develop'].targets[0][1] == \
+        "echo \"it's\" \\ done"
@@ -18,18 +18,6 @@ from nacar.validator import NacarValidator
 
 #   Test `validate()` ──────────────────────────────────────────────────────────
 
-# scope='module' ensures this is instantiated only once per test module
-# rather than once per test method as is default.
-@pytest.fixture(scope='module', autouse=True)
-def nacar_schema() -> None:
-    """
-    Must instantiate a Schema object before every test since
-    blueprint subschemas are added to the Cerberus registry
-    as part of the Schema object's initialisation.
-    """
-    Schema()
-
-
 @pytest.fixture
 def nacar_validator() -> NacarValidator:
     return NacarValidator()
@@ -95,3 +83,101 @@ def test_validator_rejects_non_unique_screen_names(
     cerberus_errors = super(NacarValidator, nacar_validator).errors
     assert cerberus_errors == expected_errors
     assert is_valid is False
+
+
+@pytest.mark.parametrize('option,expected_errors', [
+    ({'name': 'Neither'},
+     {'action': ['required field'], 'link': ['required field']}),
+    ({'name': 'Both', 'link': 'develop', 'action': 'make'},
+     {'action': ["'link' must not be present with 'action'"],
+      'link': ["'action' must not be present with 'link'"]}),
+    ({'name': 'Link run in place', 'link': 'develop', 'run': 'in_place'},
+     {'run': ["field 'action' is required"]}),
+    ({'name': 'Unknown run', 'action': 'make', 'run': 'later'},
+     {'run': ['unallowed value later']}),
+])
+def test_validator_rejects_options_without_exactly_one_link_or_action(
+    blueprint_schema: dict,
+    nacar_validator: NacarValidator,
+    option: dict,
+    expected_errors: dict
+) -> None:
+    blueprint = {
+        'title': 'Blueprint',
+        'screens': [
+            {'name': 'home', 'options': [option]},
+            {'name': 'develop', 'options': [{'name': 'build', 'action': 'make'}]}  # noqa
+        ]
+    }
+    assert nacar_validator.validate(blueprint, blueprint_schema) is False
+    assert nacar_validator.errors == {
+        'screens': [{0: [{'options': [{0: [expected_errors]}]}]}]
+    }
+
+
+@pytest.mark.parametrize('options,expected_errors', [
+    ([{'name': 'Develop', 'link': 'develop'}, {'name': 'deploy', 'key': 'D', 'action': 'make'}],  # noqa
+     ["Options 'Develop' and 'deploy' of screen 'home' share the key 'd'. Set a different key on one of them."]),  # noqa
+    ([{'name': 'Develop', 'link': 'develop'}, {'name': 'deploy', 'key': 'de', 'action': 'make'}],  # noqa
+     ["The key 'd' of option 'Develop' of screen 'home' starts the key 'de' of option 'deploy'."]),  # noqa
+])
+def test_validator_rejects_options_that_cannot_be_selected(
+    blueprint_schema: dict,
+    nacar_validator: NacarValidator,
+    options: list,
+    expected_errors: list
+) -> None:
+    blueprint = {
+        'title': 'Blueprint',
+        'meta': {'authors': ['Author']},
+        'screens': [
+            {'name': 'home', 'options': options},
+            {'name': 'develop', 'options': [{'name': 'build', 'action': 'make'}]}  # noqa
+        ]
+    }
+    assert nacar_validator.validate(blueprint, blueprint_schema) is False
+    assert nacar_validator.errors == {'screens': expected_errors}
+
+    # Paged screens select options by digit, so their keys may be shared.
+    blueprint['meta']['page_size'] = 1
+    assert nacar_validator.validate(blueprint, blueprint_schema) is True
+
+
+def test_validator_accepts_options_with_distinct_keys(
+    blueprint_schema: dict,
+    nacar_validator: NacarValidator
+) -> None:
+    blueprint = {
+        'title': 'Blueprint',
+        'screens': [{'name': 'home', 'options': [
+            {'name': 'Deploy', 'key': 'de', 'action': 'make deploy'},
+            {'name': 'Docs', 'key': 'DO', 'action': 'make docs'},
+            {'name': 'Develop', 'key': '1', 'action': 'make'},
+        ]}]
+    }
+    assert nacar_validator.validate(blueprint, blueprint_schema) is True
+
+
+def test_validator_accepts_options_sharing_the_first_letter_of_their_names(
+    blueprint_schema: dict,
+    nacar_validator: NacarValidator
+) -> None:
+    # Valid before options could set a key. The first option is selected.
+    blueprint = {
+        'title': 'Blueprint',
+        'screens': [{'name': 'home', 'options': [
+            {'name': 'Deploy', 'action': 'make deploy'},
+            {'name': 'Docs', 'action': 'make docs'},
+            {'name': 'debug', 'action': 'make debug'},
+        ]}]
+    }
+    assert nacar_validator.validate(blueprint, blueprint_schema) is True
+    # The options after the first cannot be selected by key.
+    assert nacar_validator.warnings == [
+        "Screen 'home' has options that cannot be selected by key, as an earlier option's name starts with the same letter: 'Docs', 'debug'. Set `key` on them."  # noqa
+    ]
+
+    blueprint['screens'][0]['options'][1]['key'] = 'o'
+    blueprint['screens'][0]['options'][2]['key'] = 'g'
+    assert nacar_validator.validate(blueprint, blueprint_schema) is True
+    assert nacar_validator.warnings == []
@@ -6,7 +6,13 @@
 # ▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔▔
 # Utility methods accessible to tests across the suite.
 
-from typing import List
+import os
+import pty
+import select
+import re
+import subprocess
+from time import monotonic
+from typing import Dict, List, Optional
 
 
 def get_nested_key(obj: dict, chain: List[str]):
@@ -19,3 +25,86 @@ def get_nested_key(obj: dict, chain: List[str]):
         else:
             return obj[_key]
     return None
+
+
+def render_terminal(output: str) -> List[str]:
+    """
+    Replay the output of a Nacar app on a minimal emulated terminal, which
+    understands resets and the cursor addressing and erasing sequences used
+    by Nacar apps, ignoring styles.
+    :return: The visible lines, without trailing whitespace.
+    """
+    lines: List[List[str]] = [[]]
+    row, col = 0, 0
+    sequence_re = re.compile(r'\x1bc|\x1b\[([0-9;]*)([A-Za-z])|(.)', re.S)
+    for match in sequence_re.finditer(output):
+        params, command, char = match[1], match[2], match[3]
+        if match[0] == '\x1bc':
+            lines, row, col = [[]], 0, 0
+        elif command == 'H':
+            coordinates = (params or '1;1').split(';')
+            row, col = int(coordinates[0]) - 1, int(coordinates[1]) - 1
+        elif command == 'C':
+            col += int(params or 1)
+        elif command in ('K', 'J'):
+            lines[row] = lines[row][:col]
+            if command == 'J':
+                lines = lines[:row + 1]
+        elif char == '\n':
+            row, col = row + 1, 0
+        elif char is not None:
+            lines[row] += [' '] * (col + 1 - len(lines[row]))
+            lines[row][col] = char
+            col += 1
+        while len(lines) <= row:
+            lines.append([])
+
+    return [''.join(line).rstrip() for line in lines]
+
+
+def run_app_in_terminal(app_path: str,
+                        keystrokes: str,
+                        timings: Optional[Dict[str, float]] = None) -> str:
+    """
+    Run a Nacar app under a pseudo-terminal, as apps drawn with curses need
+    one, and type `keystrokes` once the first frame has been drawn.
+    :param timings: If given, set to when the keystrokes were typed and when
+        the app closed the terminal, by `monotonic()`.
+    :return: Everything the app wrote to the terminal.
+    """
+    controller_fd, terminal_fd = pty.openpty()
+    app = subprocess.Popen([app_path], stdin=terminal_fd, stdout=terminal_fd,
+                           stderr=terminal_fd, start_new_session=True,
+                           env={**os.environ, 'LC_ALL': 'C.UTF-8',
+                                'TERM': 'xterm'})
+    os.close(terminal_fd)
+
+    output = b''
+    keystrokes_sent = False
+    deadline = monotonic() + 10
+    try:
+        while monotonic() < deadline:
+            # The bottom right corner of the frame is drawn last.
+            if not keystrokes_sent and '\u256f'.encode('utf-8') in output:
+                os.write(controller_fd, keystrokes.encode('utf-8'))
+                keystrokes_sent = True
+                if timings is not None:
+                    timings['keystrokes_sent'] = monotonic()
+            readable, _, _ = select.select([controller_fd], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                chunk = os.read(controller_fd, 65536)
+            except OSError:  # The app exited and closed the terminal.
+                chunk = b''
+            if chunk == b'':
+                if timings is not None:
+                    timings['exited'] = monotonic()
+                break
+            output += chunk
+    finally:
+        app.kill()
+        app.wait()
+        os.close(controller_fd)
+
+    return output.decode('utf-8')